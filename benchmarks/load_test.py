@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+"""
+Load-Test Harness
+
+Replays scripted agent transcripts (benchmarks/transcripts/*.json) through
+the real pipeline without network access:
+
+- ScriptedModel stands in for claude_agent_sdk.query and is injected through
+  ClaudeAgent(query_fn=...), so ClaudeAgent.handle_query runs its normal
+  message loop (logging, TodoTracker, callback)
+- Tool calls named mcp__<server>__<tool> are executed in-process against the
+  three FastMCP servers (loaded the same way as mcp-servers/server-host.py)
+- Each incident goes through web_ui.handle_query, so previews, the result
+  store and broadcasting run as in production; FakeViewer sockets record
+  WebSocket fan-out latency
+
+Reports messages/sec, tool-call latency percentiles, tracemalloc peak and
+fan-out latency for N concurrent incidents and M viewers.
+
+Usage:
+    python benchmarks/load_test.py --incidents 20 --viewers 10
+    python benchmarks/load_test.py --transcript incident-analysis --model-latency-ms 50 --json
+"""
+
+import argparse
+import asyncio
+import contextlib
+import importlib.util
+import itertools
+import json
+import logging
+import math
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+ROOT = Path(__file__).resolve().parent.parent
+TRANSCRIPTS_DIR = Path(__file__).resolve().parent / "transcripts"
+
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "claude-agent"))
+
+from claude_agent_sdk import AssistantMessage, ResultMessage, TextBlock, ToolResultBlock, ToolUseBlock, UserMessage
+
+import web_ui
+from agent import ClaudeAgent
+
+MCP_TOOL_PREFIX = "mcp__"
+
+
+def percentiles(values: Sequence[float], pcts: Sequence[float] = (50, 95, 99)) -> Dict[str, float]:
+    """Nearest-rank percentiles (ms) of a list of millisecond timings"""
+    if not values:
+        return {f"p{p:g}": None for p in pcts}
+    ordered = sorted(values)
+    result = {}
+    for pct in pcts:
+        index = min(len(ordered) - 1, max(0, math.ceil(pct / 100 * len(ordered)) - 1))
+        result[f"p{pct:g}"] = round(ordered[index], 2)
+    result["max"] = round(ordered[-1], 2)
+    return result
+
+
+def load_host_module():
+    """Import mcp-servers/server-host.py (hyphenated, so not importable by name)"""
+    path = ROOT / "mcp-servers" / "server-host.py"
+    spec = importlib.util.spec_from_file_location("mcp_server_host", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class InProcessTools:
+    """The three MCP servers, called directly instead of over HTTP"""
+
+    def __init__(self):
+        host = load_host_module()
+        self.servers = {name: host.load_server(name) for name in host.SERVER_FILES}
+        self.latencies_ms: Dict[str, List[float]] = defaultdict(list)
+
+    async def call(self, qualified_name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Execute `mcp__<server>__<tool>` and return a ToolResultBlock payload.
+
+        Built-in tools (TodoWrite, ...) are acknowledged without work.
+        """
+        if not qualified_name.startswith(MCP_TOOL_PREFIX):
+            return {"content": [{"type": "text", "text": "ok"}], "is_error": None}
+
+        server_name, tool_name = qualified_name[len(MCP_TOOL_PREFIX):].split("__", 1)
+        started = time.perf_counter()
+        try:
+            result = await self.servers[server_name].call_tool(tool_name, arguments)
+            blocks = result[0] if isinstance(result, tuple) else result
+            content = [{"type": "text", "text": block.text} for block in blocks if hasattr(block, "text")]
+            is_error = None
+        except Exception as e:
+            content = [{"type": "text", "text": f"Error: {e}"}]
+            is_error = True
+        self.latencies_ms[qualified_name].append((time.perf_counter() - started) * 1000)
+        return {"content": content, "is_error": is_error}
+
+    async def prefetch_call(self, server_name: str, tool_name: str, arguments: Dict[str, Any]) -> bool:
+        """ClaudeAgent(call_tool_fn=...) hook; warm-up calls are not counted in tool latencies"""
+        await self.servers[server_name].call_tool(tool_name, arguments)
+        return True
+
+
+class ScriptedModel:
+    """
+    Deterministic stand-in for claude_agent_sdk.query.
+
+    Each transcript turn becomes an AssistantMessage (text + tool uses),
+    followed by one UserMessage carrying the in-process tool results. The
+    last turn is followed by a ResultMessage.
+
+    Args:
+        transcript: Parsed transcript JSON
+        tools: In-process tool executor
+        latency_s: Simulated model time per turn
+    """
+
+    _ids = itertools.count(1)
+
+    def __init__(self, transcript: Dict[str, Any], tools: InProcessTools, latency_s: float = 0.0):
+        self.transcript = transcript
+        self.tools = tools
+        self.latency_s = latency_s
+        self.messages = 0
+
+    async def __call__(self, prompt: str, options=None):
+        started = time.perf_counter()
+        turns = self.transcript["turns"]
+        for turn in turns:
+            if self.latency_s:
+                await asyncio.sleep(self.latency_s)
+
+            blocks = [TextBlock(text=turn["text"])] if turn.get("text") else []
+            calls = [
+                ToolUseBlock(id=f"toolu_bench_{next(self._ids)}", name=tool["name"], input=tool["input"])
+                for tool in turn.get("tools", [])
+            ]
+            self.messages += 1
+            yield AssistantMessage(content=blocks + calls, model="scripted")
+
+            if calls:
+                results = await asyncio.gather(*(self.tools.call(call.name, call.input) for call in calls))
+                self.messages += 1
+                yield UserMessage(content=[
+                    ToolResultBlock(tool_use_id=call.id, content=result["content"], is_error=result["is_error"])
+                    for call, result in zip(calls, results)
+                ])
+
+        self.messages += 1
+        yield ResultMessage(
+            subtype="success",
+            duration_ms=int((time.perf_counter() - started) * 1000),
+            duration_api_ms=0,
+            is_error=False,
+            num_turns=len(turns),
+            session_id=f"bench-{id(self)}",
+            total_cost_usd=0.0,
+            result=turns[-1].get("text") if turns else None
+        )
+
+
+class FakeViewer:
+    """WebSocket stand-in that records when each broadcast reaches it"""
+
+    def __init__(self, sent_at: Dict[int, float]):
+        self.sent_at = sent_at
+        self.frames = 0
+        self.bytes = 0
+        self.latencies_ms: List[float] = []
+
+    async def send_json(self, message: Dict[str, Any]) -> None:
+        # Serialize as Starlette's WebSocket.send_json would
+        self.bytes += len(json.dumps(message, separators=(",", ":"), ensure_ascii=False))
+        self.frames += 1
+        self.latencies_ms.append((time.perf_counter() - self.sent_at[id(message)]) * 1000)
+        await asyncio.sleep(0)
+
+
+async def run_load_test(
+    transcripts: List[Dict[str, Any]],
+    incidents: int,
+    viewers: int,
+    model_latency_ms: float = 0.0,
+    trace_memory: bool = True,
+    prefetch: bool = True
+) -> Dict[str, Any]:
+    """
+    Run `incidents` concurrent incidents (transcripts assigned round-robin)
+    with `viewers` connected WebSocket viewers.
+
+    Returns:
+        Report dict (throughput, tool latency, fan-out latency, memory)
+    """
+    tools = InProcessTools()
+    sent_at: Dict[int, float] = {}
+    fake_viewers = [FakeViewer(sent_at) for _ in range(viewers)]
+
+    # Stamp each broadcast so viewers can measure delivery latency
+    original_broadcast = web_ui.broadcast_message
+
+    async def timed_broadcast(message: Dict[str, Any]) -> None:
+        sent_at[id(message)] = time.perf_counter()
+        try:
+            await original_broadcast(message)
+        finally:
+            del sent_at[id(message)]
+
+    web_ui.broadcast_message = timed_broadcast
+    web_ui.active_connections[:] = fake_viewers
+
+    logs_dir = tempfile.TemporaryDirectory(prefix="load-test-logs-")
+    models = []
+    agents = []
+    for i in range(incidents):
+        transcript = transcripts[i % len(transcripts)]
+        model = ScriptedModel(transcript, tools, model_latency_ms / 1000)
+        agent = ClaudeAgent(query_fn=model, prefetch=prefetch, call_tool_fn=tools.prefetch_call)
+        agent.log_file = Path(logs_dir.name) / f"incident_{i}.log"
+        models.append(model)
+        agents.append((agent, transcript["prompt"]))
+
+    if trace_memory:
+        tracemalloc.start()
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(*(web_ui.handle_query(prompt, agent=agent) for agent, prompt in agents))
+    finally:
+        elapsed = time.perf_counter() - started
+        peak = tracemalloc.get_traced_memory()[1] if trace_memory else None
+        if trace_memory:
+            tracemalloc.stop()
+        web_ui.broadcast_message = original_broadcast
+        web_ui.active_connections.clear()
+        logs_dir.cleanup()
+
+    messages = sum(model.messages for model in models)
+    all_tool_latencies = [ms for values in tools.latencies_ms.values() for ms in values]
+    fanout = [ms for viewer in fake_viewers for ms in viewer.latencies_ms]
+
+    return {
+        "incidents": incidents,
+        "viewers": viewers,
+        "transcripts": sorted({t["name"] for t in transcripts}),
+        "model_latency_ms": model_latency_ms,
+        "prefetch": prefetch,
+        "elapsed_s": round(elapsed, 3),
+        "agent_messages": messages,
+        "messages_per_sec": round(messages / elapsed, 1) if elapsed else None,
+        "tool_calls": len(all_tool_latencies),
+        "tool_latency_ms": percentiles(all_tool_latencies),
+        "tool_latency_by_tool_ms": {
+            name: {"calls": len(values), **percentiles(values)}
+            for name, values in sorted(tools.latencies_ms.items())
+        },
+        "ws_frames": sum(viewer.frames for viewer in fake_viewers),
+        "ws_bytes": sum(viewer.bytes for viewer in fake_viewers),
+        "fanout_latency_ms": percentiles(fanout),
+        "tracemalloc_peak_mb": round(peak / 1e6, 2) if peak is not None else None,
+    }
+
+
+def load_transcripts(names: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    paths = sorted(TRANSCRIPTS_DIR.glob("*.json"))
+    if names:
+        paths = [TRANSCRIPTS_DIR / f"{name}.json" for name in names]
+    return [json.loads(path.read_text()) for path in paths]
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    def fmt(stats):
+        return "  ".join(f"{key}={value}" for key, value in stats.items())
+
+    print(f"Incidents: {report['incidents']}  Viewers: {report['viewers']}  "
+          f"Transcripts: {', '.join(report['transcripts'])}  Model latency: {report['model_latency_ms']}ms  "
+          f"Prefetch: {'on' if report['prefetch'] else 'off'}")
+    print(f"Elapsed:            {report['elapsed_s']}s")
+    print(f"Agent messages:     {report['agent_messages']} ({report['messages_per_sec']}/s)")
+    print(f"Tool calls:         {report['tool_calls']}  latency ms: {fmt(report['tool_latency_ms'])}")
+    for name, stats in report["tool_latency_by_tool_ms"].items():
+        print(f"  {name:<55} {fmt(stats)}")
+    print(f"WebSocket frames:   {report['ws_frames']} ({report['ws_bytes'] / 1e6:.2f} MB)")
+    print(f"Fan-out latency ms: {fmt(report['fanout_latency_ms'])}")
+    if report["tracemalloc_peak_mb"] is not None:
+        print(f"Memory peak:        {report['tracemalloc_peak_mb']} MB (tracemalloc)")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Replay scripted transcripts through the agent, UI and MCP servers")
+    parser.add_argument("--incidents", type=int, default=10, help="Concurrent incidents (default: 10)")
+    parser.add_argument("--viewers", type=int, default=5, help="Connected WebSocket viewers (default: 5)")
+    parser.add_argument("--transcript", action="append", help="Transcript name (repeatable, default: all)")
+    parser.add_argument("--model-latency-ms", type=float, default=0.0, help="Simulated model time per turn")
+    parser.add_argument("--no-prefetch", action="store_true", help="Disable the agent's speculative tool warm-up")
+    parser.add_argument("--no-tracemalloc", action="store_true", help="Skip memory tracing (faster, less overhead)")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    # Per-call tool logging would dominate the output
+    logging.disable(logging.INFO)
+
+    # TodoTracker prints progress to stdout; keep the report readable
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        report = asyncio.run(run_load_test(
+            load_transcripts(args.transcript),
+            incidents=args.incidents,
+            viewers=args.viewers,
+            model_latency_ms=args.model_latency_ms,
+            trace_memory=not args.no_tracemalloc,
+            prefetch=not args.no_prefetch
+        ))
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Parallel Aggregation Benchmark
+
+Speedup of partitioned log aggregation (server_utils/aggregation.py) from 1
+to N worker processes over the same archive. Each worker count gets one
+untimed warm-up call (spawning the pool) and is then timed over several
+runs. Results must be identical for every worker count; the run fails if
+they are not.
+
+Usage:
+    python benchmarks/parallel_aggregation.py                    # 1M rows, 1..cpu_count workers
+    python benchmarks/parallel_aggregation.py --rows 200000 --workers 1 2 4
+    python benchmarks/parallel_aggregation.py --partition-by service
+    python benchmarks/parallel_aggregation.py --archive analytics/archives/live.logz
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "mcp-servers"))
+
+from server_utils.aggregation import PARTITION_MODES, aggregate_archive  # noqa: E402
+from server_utils.log_archive import LogArchive, LogArchiveWriter  # noqa: E402
+from server_utils.log_generator import InjectedIncident, LogGeneratorConfig, generate_logs  # noqa: E402
+
+CHUNK_ROWS = 200_000
+
+
+def default_worker_counts() -> List[int]:
+    cpus = os.cpu_count() or 1
+    counts, n = [], 1
+    while n < cpus:
+        counts.append(n)
+        n *= 2
+    return counts + [cpus]
+
+
+def build_archive(path: Path, rows: int, seed: int) -> None:
+    """Write `rows` generated rows over 24h (in chunks, to bound memory)"""
+    end = time.time()
+    start = end - 86400
+    chunks = max(1, (rows + CHUNK_ROWS - 1) // CHUNK_ROWS)
+    span = (end - start) / chunks
+    with LogArchiveWriter(path) as writer:
+        for i in range(chunks):
+            count = min(CHUNK_ROWS, rows - i * CHUNK_ROWS)
+            config = LogGeneratorConfig(seed=seed + i, incidents=(
+                InjectedIncident("auth-service", "AUTH_TIMEOUT", -span / 4, span / 4),
+            ) if i == chunks - 1 else ())
+            batch = generate_logs(count, start + i * span, start + (i + 1) * span, config)
+            writer.extend(batch.to_records(newest_first=False))
+
+
+def run(path: Path, worker_counts: List[int], partition_by: str, runs: int) -> Dict[str, Any]:
+    results = []
+    reference = None
+    consistent = True
+    for workers in worker_counts:
+        aggregate_archive(path, partition_by=partition_by, workers=workers)  # warm-up: spawn the pool
+        timings = []
+        for _ in range(runs):
+            started = time.perf_counter()
+            result = aggregate_archive(path, partition_by=partition_by, workers=workers)
+            timings.append(time.perf_counter() - started)
+
+        aggregate = result["aggregate"]
+        if reference is None:
+            reference = aggregate
+        elif aggregate != reference:
+            consistent = False
+
+        results.append({
+            "workers": workers,
+            "min_seconds": round(min(timings), 3),
+            "partitions": len(result["execution"]["partitions"]),
+            "rows": aggregate["rows"]
+        })
+
+    baseline = results[0]["min_seconds"]
+    for entry in results:
+        entry["speedup"] = round(baseline / entry["min_seconds"], 2)
+        entry["efficiency"] = round(entry["speedup"] / (entry["workers"] / results[0]["workers"]), 2)
+        entry["rows_per_second"] = int(entry["rows"] / entry["min_seconds"])
+
+    return {"partition_by": partition_by, "consistent": consistent, "results": results}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark partitioned log aggregation speedup")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Rows in the generated archive (default: 1M)")
+    parser.add_argument("--workers", type=int, nargs="+", help="Worker counts (default: 1, 2, 4, ... cpu_count)")
+    parser.add_argument("--partition-by", choices=PARTITION_MODES, default="time")
+    parser.add_argument("--runs", type=int, default=3, help="Timed runs per worker count (default: 3)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--archive", type=Path, help="Existing archive to aggregate instead of generating one")
+    parser.add_argument("--json", metavar="PATH", help="Also write results to PATH")
+    args = parser.parse_args()
+
+    worker_counts = sorted(set(args.workers or default_worker_counts()))
+    with tempfile.TemporaryDirectory(prefix="agg-bench-") as tmp:
+        path = args.archive
+        if path is None:
+            path = Path(tmp) / "bench.logz"
+            started = time.perf_counter()
+            build_archive(path, args.rows, args.seed)
+            print(f"Built {args.rows:,}-row archive ({path.stat().st_size / 1e6:.1f} MB) "
+                  f"in {time.perf_counter() - started:.1f}s")
+
+        archive = LogArchive(path)
+        print(f"Archive: {archive.rows:,} rows in {len(archive.index.blocks)} blocks; "
+              f"{os.cpu_count()} CPUs; partition_by={args.partition_by}\n")
+        report = run(path, worker_counts, args.partition_by, args.runs)
+
+    print(f"{'workers':>8} {'partitions':>11} {'min s':>9} {'speedup':>8} {'efficiency':>11} {'rows/s':>12}")
+    for entry in report["results"]:
+        print(f"{entry['workers']:>8} {entry['partitions']:>11} {entry['min_seconds']:>9.3f} "
+              f"{entry['speedup']:>7.2f}x {entry['efficiency']:>11.2f} {entry['rows_per_second']:>12,}")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2))
+
+    if not report["consistent"]:
+        print("\nFAIL: aggregates differ between worker counts")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Startup-Time Benchmark
+
+Measures cold import time of the web UI (`web_ui`) and the CLI agent
+(`claude-agent/agent.py`) with `python -X importtime`, each in a fresh
+interpreter, and compares the median against the budgets in
+benchmarks/startup_budget.json. The budget file also lists modules that must
+not be imported at startup (they are loaded lazily on first use).
+
+Usage:
+    python benchmarks/startup_time.py              # report
+    python benchmarks/startup_time.py --check      # exit 1 if over budget (CI)
+    python benchmarks/startup_time.py --runs 10 --top 15
+"""
+
+import argparse
+import json
+import re
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+ROOT = Path(__file__).resolve().parent.parent
+BUDGET_FILE = Path(__file__).resolve().parent / "startup_budget.json"
+
+# Target name -> (working directory, module imported on startup)
+TARGETS = {
+    "web_ui": (ROOT, "web_ui"),
+    "cli": (ROOT / "claude-agent", "agent"),
+}
+
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)\s*$")
+
+
+def measure_once(cwd: Path, module: str) -> Tuple[float, List[Tuple[str, int, int]]]:
+    """
+    Import `module` in a fresh interpreter with -X importtime.
+
+    Returns:
+        (cumulative import time of `module` in ms, [(name, self_us, cumulative_us), ...])
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=cwd, capture_output=True, text=True
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr[-2000:]}")
+
+    imports = []
+    total_us = None
+    for line in proc.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, name = match.groups()
+        imports.append((name, int(self_us), int(cumulative_us)))
+        # Top-level entry (indent of one space) for the target module
+        if name == module and len(indent) == 1:
+            total_us = int(cumulative_us)
+
+    if total_us is None:
+        raise RuntimeError(f"No importtime entry for {module}")
+    return total_us / 1000, imports
+
+
+def measure(name: str, runs: int) -> Dict:
+    """Median import time over `runs` cold starts, plus the imported module set"""
+    cwd, module = TARGETS[name]
+    timings = []
+    imports: List[Tuple[str, int, int]] = []
+    for _ in range(runs):
+        elapsed_ms, imports = measure_once(cwd, module)
+        timings.append(elapsed_ms)
+
+    return {
+        "target": name,
+        "module": module,
+        "runs": runs,
+        "median_ms": round(statistics.median(timings), 1),
+        "min_ms": round(min(timings), 1),
+        "max_ms": round(max(timings), 1),
+        "modules": {entry[0] for entry in imports},
+        "heaviest": sorted(imports, key=lambda entry: entry[1], reverse=True),
+    }
+
+
+def check_budget(result: Dict, budget: Dict) -> List[str]:
+    """Budget violations for one target (empty list if within budget)"""
+    failures = []
+    max_ms = budget.get("max_import_ms")
+    if max_ms is not None and result["median_ms"] > max_ms:
+        failures.append(f"median import time {result['median_ms']}ms exceeds budget {max_ms}ms")
+
+    for module in budget.get("forbidden_imports", []):
+        if module in result["modules"]:
+            failures.append(f"'{module}' is imported at startup (must be lazy)")
+    return failures
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Measure cold-start import time against budgets")
+    parser.add_argument("targets", nargs="*", help=f"Targets: {', '.join(TARGETS)} (default: all)")
+    parser.add_argument("--runs", type=int, default=5, help="Cold starts per target (default: 5)")
+    parser.add_argument("--top", type=int, default=10, help="Heaviest imports to list (default: 10)")
+    parser.add_argument("--check", action="store_true", help="Exit 1 if any budget is exceeded")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+    unknown = set(args.targets) - set(TARGETS)
+    if unknown:
+        parser.error(f"unknown target(s): {', '.join(sorted(unknown))}")
+
+    budgets = json.loads(BUDGET_FILE.read_text())
+    failed = False
+    report = []
+
+    for name in args.targets or TARGETS:
+        result = measure(name, args.runs)
+        failures = check_budget(result, budgets.get(name, {}))
+        failed = failed or bool(failures)
+        report.append({
+            "target": name,
+            "median_ms": result["median_ms"],
+            "min_ms": result["min_ms"],
+            "max_ms": result["max_ms"],
+            "budget_ms": budgets.get(name, {}).get("max_import_ms"),
+            "failures": failures,
+            "heaviest": [
+                {"module": module, "self_ms": round(self_us / 1000, 1), "cumulative_ms": round(cum_us / 1000, 1)}
+                for module, self_us, cum_us in result["heaviest"][:args.top]
+            ],
+        })
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        for entry in report:
+            status = "FAIL" if entry["failures"] else "ok"
+            print(f"{entry['target']}: median {entry['median_ms']}ms "
+                  f"(min {entry['min_ms']}, max {entry['max_ms']}, budget {entry['budget_ms']}ms) [{status}]")
+            for failure in entry["failures"]:
+                print(f"  ✗ {failure}")
+            print("  heaviest imports (self time):")
+            for item in entry["heaviest"]:
+                print(f"    {item['self_ms']:>8.1f}ms  {item['module']}")
+
+    return 1 if args.check and failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,359 @@
+#!/usr/bin/env python3
+"""
+MCP Tool Microbenchmarks
+
+Per-call cost of each tool handler, measured three ways:
+- direct:  the decorated tool function called in-process
+- encode:  json.dumps(indent=2) of a representative response
+- http:    a full tools/call round trip over the streamable-HTTP transport
+           (uvicorn on an ephemeral port + the MCP client)
+
+Each case reports min/median/mean/stddev latency over several rounds and the
+tracemalloc peak of one extra call. Results can be saved as a baseline
+(benchmarks/baselines/tool_microbench.json, committed) and compared against
+it: the run fails when a case's minimum latency (the least noisy statistic)
+or allocation peak regresses beyond the threshold.
+
+Usage:
+    python benchmarks/tool_microbench.py                   # run + compare with baseline
+    python benchmarks/tool_microbench.py --quick           # skip 1M-entry and HTTP cases
+    python benchmarks/tool_microbench.py -k get_raw_logs   # only matching cases
+    python benchmarks/tool_microbench.py --save            # record a new baseline
+"""
+
+import argparse
+import asyncio
+import importlib.util
+import json
+import logging
+import os
+import platform
+import socket
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import AsyncExitStack
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+ROOT = Path(__file__).resolve().parent.parent
+BASELINE_FILE = Path(__file__).resolve().parent / "baselines" / "tool_microbench.json"
+
+# Regressions smaller than this are treated as noise regardless of ratio
+MIN_LATENCY_DELTA_MS = 1.0
+MIN_ALLOC_DELTA_KB = 64
+
+LOG_SIZES = {"1k": 1_000, "100k": 100_000, "1M": 1_000_000}
+
+
+def alert_storm(count: int = 500) -> List[Dict[str, Any]]:
+    """Near-identical alerts from two failing services, 2s apart"""
+    start = 1_700_000_000
+    return [
+        {
+            "service": "api-gateway" if i % 4 else "auth-service",
+            "error_code": "DB_POOL_EXHAUSTED" if i % 4 else "TIMEOUT",
+            "message": f"Connection pool exhausted: {90 + i % 10}/100 active on 10.0.3.{i % 250}:5432 after {1000 + i}ms",
+            "timestamp": start + 2 * i,
+            "severity": "SEV2",
+            "id": f"alert-{i}"
+        }
+        for i in range(count)
+    ]
+
+
+@dataclass
+class BenchCase:
+    """
+    One benchmark case.
+
+    Attributes:
+        name: Case name ('<kind>.<server>.<tool>[param]')
+        call: Zero-argument coroutine function performing one call
+        rounds: Timed calls
+        warmup: Untimed calls before timing
+        setup: Optional coroutine function returning the call to benchmark,
+               run just before the case so large fixtures are not held
+               while other cases run
+    """
+    name: str
+    call: Optional[Callable[[], Awaitable[Any]]] = None
+    rounds: int = 20
+    warmup: int = 1
+    setup: Optional[Callable[[], Awaitable[Callable[[], Awaitable[Any]]]]] = None
+
+
+def load_host_module():
+    """Import mcp-servers/server-host.py (hyphenated, so not importable by name)"""
+    spec = importlib.util.spec_from_file_location("mcp_server_host", ROOT / "mcp-servers" / "server-host.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def direct_calls(modules: Dict[str, Any], script_path: str, quick: bool) -> Dict[str, Callable[[], Awaitable[str]]]:
+    """Tool invocations keyed by '<server>.<tool>[param]'"""
+    monitoring = modules["monitoring-analysis"]
+    workflow = modules["workflow-orchestration"]
+    logs = modules["log-analytics"]
+
+    calls = {
+        "monitoring-analysis.get_system_metrics[2h]":
+            lambda: monitoring.get_system_metrics("connection_leak", "2h", "1m"),
+        "monitoring-analysis.analyze_logs":
+            lambda: monitoring.analyze_logs("1h", "ERROR", "connection_leak"),
+        "monitoring-analysis.root_cause_analysis":
+            lambda: monitoring.root_cause_analysis("connection_leak"),
+        "monitoring-analysis.verify_health[force]":
+            lambda: monitoring.verify_health(True, "connection_leak", force=True),
+        "monitoring-analysis.get_incident_snapshot":
+            lambda: monitoring.get_incident_snapshot("connection_leak"),
+        "workflow-orchestration.create_incident":
+            lambda: workflow.create_incident("sev2", "Bench incident", "Synthetic incident", "n/a"),
+        # Repeated rounds attach to the incident opened by the first one
+        "workflow-orchestration.ingest_alerts[500]":
+            lambda alerts=alert_storm(): workflow.ingest_alerts(alerts),
+        "workflow-orchestration.notify_team":
+            lambda: workflow.notify_team("INC-BENCH", "#incidents", "Synthetic notification"),
+        "log-analytics.execute_analysis_script[noop]":
+            lambda: logs.execute_analysis_script(script_path, use_cache=False),
+        # Repeat of the same script and data, served from the execution cache
+        "log-analytics.execute_analysis_script[noop,cached]":
+            lambda: logs.execute_analysis_script(script_path),
+    }
+    for label, count in LOG_SIZES.items():
+        if quick and count > 100_000:
+            continue
+        calls[f"log-analytics.get_raw_logs[{label}]"] = (
+            lambda count=count: logs.get_raw_logs("INC-BENCH", "1h", "all", entry_count=count, as_dataset=False)
+        )
+    # Same fetch returned by reference (stored server-side, handle + summary inline)
+    calls["log-analytics.get_raw_logs[100k,dataset]"] = (
+        lambda: logs.get_raw_logs("INC-BENCH", "1h", "all", entry_count=LOG_SIZES["100k"], as_dataset=True)
+    )
+    return calls
+
+
+def rounds_for(name: str) -> int:
+    if "[1M]" in name:
+        return 1
+    if "[100k" in name:
+        return 3
+    if "execute_analysis_script" in name or "verify_health" in name:
+        return 5
+    return 20
+
+
+async def build_cases(
+    modules: Dict[str, Any],
+    stack: AsyncExitStack,
+    quick: bool,
+    selected: Callable[[str], bool]
+) -> List[BenchCase]:
+    """Create direct, encode and (unless quick) HTTP cases that match the filter"""
+    workdir = Path(stack.enter_context(tempfile.TemporaryDirectory(prefix="microbench-")))
+    script = workdir / "noop_analysis.py"
+    script.write_text('import json\nprint(json.dumps({"status": "ok"}))\n')
+
+    cases = []
+    for name, call in direct_calls(modules, str(script), quick).items():
+        rounds = rounds_for(name)
+        warmup = 0 if rounds == 1 else 1
+        if selected(f"direct.{name}"):
+            cases.append(BenchCase(f"direct.{name}", call, rounds, warmup))
+
+        if selected(f"encode.{name}"):
+            # Encode cost of the response alone, from one real response
+            cases.append(BenchCase(f"encode.{name}", rounds=rounds, warmup=warmup, setup=lambda call=call: encode_call(call)))
+
+    if not quick:
+        cases.extend(await http_cases(modules, stack, selected))
+    return cases
+
+
+async def encode_call(tool_call: Callable[[], Awaitable[str]]) -> Callable[[], Awaitable[str]]:
+    """Build a json.dumps(indent=2) call over one decoded tool response"""
+    payload = json.loads(await tool_call())
+
+    async def encode() -> str:
+        return json.dumps(payload, indent=2)
+
+    return encode
+
+
+async def http_cases(modules: Dict[str, Any], stack: AsyncExitStack, selected: Callable[[str], bool]) -> List[BenchCase]:
+    """Round trips through uvicorn + streamable HTTP + the MCP client session"""
+    import uvicorn
+    from mcp import ClientSession
+    from mcp.client.streamable_http import streamablehttp_client
+
+    http_calls = {
+        "monitoring-analysis.get_system_metrics[2h]":
+            ("get_system_metrics", {"incident_type": "connection_leak", "window": "2h", "resolution": "1m"}),
+        "workflow-orchestration.notify_team":
+            ("notify_team", {"incident_id": "INC-BENCH", "channel": "#incidents", "message": "Synthetic notification"}),
+        "log-analytics.get_raw_logs[1k]":
+            ("get_raw_logs", {"incident_id": "INC-BENCH", "entry_count": LOG_SIZES["1k"], "as_dataset": False}),
+        "log-analytics.get_raw_logs[100k]":
+            ("get_raw_logs", {"incident_id": "INC-BENCH", "entry_count": LOG_SIZES["100k"], "as_dataset": False}),
+        "log-analytics.get_raw_logs[100k,dataset]":
+            ("get_raw_logs", {"incident_id": "INC-BENCH", "entry_count": LOG_SIZES["100k"], "as_dataset": True}),
+    }
+
+    sessions: Dict[str, ClientSession] = {}
+    cases = []
+    for name, (tool, arguments) in http_calls.items():
+        case_name = f"http.{name}"
+        if not selected(case_name):
+            continue
+        server_name = name.split(".", 1)[0]
+        if server_name not in sessions:
+            server = modules[server_name].mcp_server
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            sock.bind(("127.0.0.1", 0))
+            port = sock.getsockname()[1]
+            uv_server = uvicorn.Server(uvicorn.Config(server.streamable_http_app(), log_level="warning"))
+            serve_task = asyncio.create_task(uv_server.serve(sockets=[sock]))
+            while not uv_server.started:
+                await asyncio.sleep(0.01)
+            stack.push_async_callback(_stop_server, uv_server, serve_task)
+
+            read, write, _ = await stack.enter_async_context(streamablehttp_client(f"http://127.0.0.1:{port}/mcp"))
+            session = await stack.enter_async_context(ClientSession(read, write))
+            await session.initialize()
+            sessions[server_name] = session
+
+        session = sessions[server_name]
+        cases.append(BenchCase(
+            case_name,
+            lambda session=session, tool=tool, arguments=arguments: session.call_tool(tool, arguments),
+            rounds_for(name)
+        ))
+    return cases
+
+
+async def _stop_server(uv_server, serve_task: asyncio.Task) -> None:
+    uv_server.should_exit = True
+    await serve_task
+
+
+async def run_case(case: BenchCase) -> Dict[str, Any]:
+    """Time `case.rounds` calls, then measure one call's allocation peak"""
+    call = await case.setup() if case.setup else case.call
+    for _ in range(case.warmup):
+        await call()
+
+    timings = []
+    for _ in range(case.rounds):
+        started = time.perf_counter()
+        await call()
+        timings.append((time.perf_counter() - started) * 1000)
+
+    tracemalloc.start()
+    try:
+        await call()
+        alloc_peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "rounds": case.rounds,
+        "min_ms": round(min(timings), 3),
+        "median_ms": round(statistics.median(timings), 3),
+        "mean_ms": round(statistics.fmean(timings), 3),
+        "stddev_ms": round(statistics.stdev(timings), 3) if len(timings) > 1 else 0.0,
+        "alloc_peak_kb": round(alloc_peak / 1024, 1),
+    }
+
+
+def compare(results: Dict[str, Dict], baseline: Dict[str, Dict], threshold: float, alloc_threshold: float) -> List[str]:
+    """Regression messages for cases present in both runs"""
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        latency_delta = result["min_ms"] - base["min_ms"]
+        if latency_delta > MIN_LATENCY_DELTA_MS and result["min_ms"] > base["min_ms"] * (1 + threshold):
+            regressions.append(
+                f"{name}: min {result['min_ms']}ms vs baseline {base['min_ms']}ms "
+                f"(+{latency_delta / base['min_ms'] * 100:.0f}%)"
+            )
+        alloc_delta = result["alloc_peak_kb"] - base["alloc_peak_kb"]
+        if alloc_delta > MIN_ALLOC_DELTA_KB and result["alloc_peak_kb"] > base["alloc_peak_kb"] * (1 + alloc_threshold):
+            regressions.append(
+                f"{name}: alloc peak {result['alloc_peak_kb']}KB vs baseline {base['alloc_peak_kb']}KB "
+                f"(+{alloc_delta / max(base['alloc_peak_kb'], 1) * 100:.0f}%)"
+            )
+    return regressions
+
+
+async def run_all(args) -> Dict[str, Dict]:
+    host = load_host_module()
+    modules = {name: host.load_server_module(name) for name in host.SERVER_FILES}
+
+    def selected(name: str) -> bool:
+        return not args.keyword or any(keyword in name for keyword in args.keyword)
+
+    results = {}
+    async with AsyncExitStack() as stack:
+        cases = await build_cases(modules, stack, args.quick, selected)
+        for case in cases:
+            results[case.name] = await run_case(case)
+            result = results[case.name]
+            print(f"{case.name:<62} median {result['median_ms']:>10.3f}ms  "
+                  f"min {result['min_ms']:>10.3f}ms  alloc {result['alloc_peak_kb']:>10.1f}KB  "
+                  f"(n={result['rounds']})", flush=True)
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Microbenchmark MCP tool handlers")
+    parser.add_argument("-k", "--keyword", action="append", help="Only cases whose name contains this (repeatable)")
+    parser.add_argument("--quick", action="store_true", help="Skip 1M-entry and HTTP cases")
+    parser.add_argument("--save", action="store_true", help=f"Write results as the baseline ({BASELINE_FILE.name})")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed min latency regression (default: 0.25)")
+    parser.add_argument("--alloc-threshold", type=float, default=0.25, help="Allowed allocation regression (default: 0.25)")
+    parser.add_argument("--json", metavar="PATH", help="Also write results to PATH")
+    args = parser.parse_args()
+
+    # Per-call tool logging would dominate the output
+    logging.disable(logging.INFO)
+
+    # Keep by-reference datasets out of the shared analytics/ store
+    with tempfile.TemporaryDirectory(prefix="microbench-datasets-") as dataset_dir:
+        os.environ["MCP_DATASET_DIR"] = dataset_dir
+        results = asyncio.run(run_all(args))
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2))
+
+    if args.save:
+        baseline = json.loads(BASELINE_FILE.read_text()) if BASELINE_FILE.exists() else {"results": {}}
+        baseline["results"].update(results)
+        baseline["machine"] = {"python": platform.python_version(), "platform": platform.platform()}
+        BASELINE_FILE.parent.mkdir(parents=True, exist_ok=True)
+        BASELINE_FILE.write_text(json.dumps(baseline, indent=2, sort_keys=True) + "\n")
+        print(f"\nBaseline saved to {BASELINE_FILE.relative_to(ROOT)}")
+        return 0
+
+    if not BASELINE_FILE.exists():
+        print("\nNo baseline recorded; run with --save to create one")
+        return 0
+
+    baseline = json.loads(BASELINE_FILE.read_text())
+    regressions = compare(results, baseline["results"], args.threshold, args.alloc_threshold)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) vs baseline ({baseline['machine']['platform']}):")
+        for regression in regressions:
+            print(f"  ✗ {regression}")
+        return 1
+    print("\nNo regressions vs baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
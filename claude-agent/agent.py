@@ -14,24 +14,63 @@ import asyncio
 import json
 from pathlib import Path
 from datetime import datetime
-from dotenv import load_dotenv
-from rich.console import Console
 
-from claude_agent_sdk import query, ClaudeAgentOptions, AssistantMessage, UserMessage, ToolUseBlock, ToolResultBlock
-
-# Import TodoTracker from utils
 sys.path.insert(0, str(Path(__file__).parent))
-from utils.todo_tracker import TodoTracker
 
-load_dotenv()
-os.environ["CLAUDE_CODE_USE_BEDROCK"] = "1"
-console = Console()
+# Heavy modules (claude_agent_sdk, rich, dotenv) are imported on first use so
+# that importing this module - e.g. from web_ui.py - stays cheap.
+_console = None
+_environment_configured = False
+
+
+def get_console():
+    """Shared Rich console, created on first use"""
+    global _console
+    if _console is None:
+        from rich.console import Console
+        _console = Console()
+    return _console
+
+
+def configure_environment():
+    """Load .env and select the Bedrock backend (once per process)"""
+    global _environment_configured
+    if _environment_configured:
+        return
+    from dotenv import load_dotenv
+    load_dotenv()
+    os.environ["CLAUDE_CODE_USE_BEDROCK"] = "1"
+    _environment_configured = True
 
 
 class ClaudeAgent:
     """Claude Agent with Skills + MCP for autonomous task execution"""
     
-    def __init__(self):
+    def __init__(self, query_fn=None, prefetch=True, call_tool_fn=None, preload_skills=True, budgets=None,
+                 stream_partial=True):
+        """
+        Args:
+            query_fn: Replacement for claude_agent_sdk.query with the same
+                      (prompt, options) -> async iterator signature, e.g. a
+                      scripted model for benchmarks (default: the SDK)
+            prefetch: Warm the likely first tools in the background while
+                      the model plans (see utils/prefetch.py)
+            call_tool_fn: Replacement for the MCP HTTP client used by prefetch,
+                          with the (server, tool, arguments) -> awaitable bool
+                          signature (default: the servers' HTTP endpoints)
+            preload_skills: Put the matching skill's SKILL.md and phase files
+                            in the system prompt (see utils/skill_loader.py)
+            budgets: Per-skill session budgets (wall time, turns, tool calls,
+                     tool result bytes); default utils.session_budget.SKILL_BUDGETS
+            stream_partial: When a callback is given, also pass it the SDK's
+                            StreamEvents (token-level text deltas) ahead of
+                            each complete AssistantMessage
+        """
+        configure_environment()
+        self.query_fn = query_fn
+        self.budgets = budgets
+        self.stream_partial = stream_partial
+
         # Create logs directory
         self.logs_dir = Path(__file__).parent.parent / "logs"
         self.logs_dir.mkdir(exist_ok=True)
@@ -74,6 +113,17 @@ Available capabilities:
                 'url': 'http://127.0.0.1:9003/mcp'
             }
         }
+        
+        self.prefetcher = None
+        if prefetch:
+            from utils.prefetch import Prefetcher, http_tool_caller
+            self.prefetcher = Prefetcher(call_tool_fn or http_tool_caller(self.mcp_servers))
+        
+        # Skill bundles parsed once per process (mtime-invalidated)
+        self.skill_loader = None
+        if preload_skills:
+            from utils.skill_loader import get_skill_loader
+            self.skill_loader = get_skill_loader(Path(__file__).parent.parent)
     
     def _log_message(self, message_type: str, data: dict):
         """Log message to file (JSON lines format)"""
@@ -87,7 +137,16 @@ Available capabilities:
             with open(self.log_file, 'a') as f:
                 f.write(json.dumps(log_entry, default=str) + '\n')
         except Exception as e:
-            console.print(f"[yellow]Warning: Failed to log message: {e}[/yellow]")
+            get_console().print(f"[yellow]Warning: Failed to log message: {e}[/yellow]")
+    
+    def _log_prefetch(self, task: asyncio.Task):
+        """Record the outcome of a background prefetch"""
+        if task.cancelled():
+            self._log_message('prefetch', {'status': 'cancelled'})
+        elif task.exception() is not None:
+            self._log_message('prefetch', {'status': 'error', 'error': str(task.exception())})
+        else:
+            self._log_message('prefetch', task.result())
     
     async def handle_query(self, user_query: str, callback=None):
         """
@@ -95,40 +154,68 @@ Available capabilities:
         
         Args:
             user_query: The user's query/request
-            callback: Optional async function called for each message (for web UI streaming)
+            callback: Optional async function called for each message (for web UI streaming),
+                     including StreamEvents when stream_partial is enabled.
                      If None, prints to console (CLI mode)
         
-        Yields:
-            Messages from the agent (when used as async generator)
+        Returns:
+            Session budget report (usage, and why the session was stopped
+            if it hit a limit)
         """
-        
+        from claude_agent_sdk import query, ClaudeAgentOptions, AssistantMessage, UserMessage, ToolUseBlock, ToolResultBlock
+        from claude_agent_sdk.types import StreamEvent
+        from utils.session_budget import SessionWatchdog
+        from utils.todo_tracker import TodoTracker
+
         # Log session start
         self._log_message('session_start', {
             'query': user_query,
             'log_file': str(self.log_file)
         })
         
+        # Speculatively warm the tools the model will likely call first
+        prefetch_task = self.prefetcher.start(user_query) if self.prefetcher else None
+        if prefetch_task is not None:
+            prefetch_task.add_done_callback(self._log_prefetch)
+        
         # Initialize todo tracker
         todo_tracker = TodoTracker()
         
         # Get project root for Skills
         project_root = Path(__file__).parent.parent
         
+        # Serve the matching skill's files from memory instead of Read turns
+        system_prompt = self.system_prompt
+        skill = self.skill_loader.match(user_query) if self.skill_loader else None
+        if skill is not None:
+            section, preloaded = self.skill_loader.prompt_section(skill)
+            system_prompt += "\n\n" + section
+            self._log_message('skill_preload', {
+                'skill': skill.name,
+                'files': preloaded,
+                'chars': len(section)
+            })
+        
+        # Wall time, turns, tool calls and tool result bytes are bounded per skill
+        watchdog = SessionWatchdog(skill.name if skill else None, self.budgets)
+        
         # Configure Claude Agent SDK
         options = ClaudeAgentOptions(
             cwd=str(project_root),              # .claude/skills/ location
             setting_sources=["user", "project"], # Load Skills from user + project
-            system_prompt=self.system_prompt,
+            system_prompt=system_prompt,
             model="us.anthropic.claude-sonnet-4-5-20250929-v1:0",
             permission_mode='bypassPermissions',
             mcp_servers=self.mcp_servers,       # MCP servers auto-expose their tools
             allowed_tools=["Skill", "Read", "TodoWrite", "Bash"],  # Enable Skills + TodoWrite
             # allowed_tools=[ "Write",]  # Enable Skill tool
 
-            max_turns=100
+            max_turns=watchdog.sdk_max_turns,  # Per-skill turn limits enforced by the watchdog
+            include_partial_messages=callback is not None and self.stream_partial  # Text deltas for the web UI
         )
         
         # CLI mode - print to console
+        console = get_console() if callback is None else None
         if callback is None:
             console.print("\n" + "═" * 60, style="bold cyan")
             console.print("🤖 Claude Agent Starting...", style="bold green")
@@ -138,11 +225,20 @@ Available capabilities:
         # Run agent - SDK handles everything
         current_tool_call = {}
         tool_calls_summary = []
+        stream_events = 0
         
-        async for message in query(
+        run_query = self.query_fn or query
+        async for message in watchdog.guard(run_query(
             prompt=user_query,
             options=options
-        ):
+        )):
+            # Partial text is only for live display; the complete message follows
+            if isinstance(message, StreamEvent):
+                stream_events += 1
+                if callback:
+                    await callback(message, todo_tracker)
+                continue
+            
             # Log all messages
             self._log_message('agent_message', {
                 'message_type': type(message).__name__,
@@ -197,11 +293,21 @@ Available capabilities:
             else:
                 console.print(message)
         
+        # Warm-up that outlived the query is no longer useful
+        if prefetch_task is not None and not prefetch_task.done():
+            prefetch_task.cancel()
+        
+        budget_report = watchdog.report()
+        if watchdog.stopped_reason:
+            self._log_message('session_budget', budget_report)
+        
         # Log session end with tool calls summary
         summary = todo_tracker.get_summary()
         self._log_message('session_end', {
             'todo_summary': summary,
+            'budget': budget_report,
             'total_tool_calls': len(tool_calls_summary),
+            'stream_events': stream_events,
             'tool_calls_summary': tool_calls_summary,
             'log_file': str(self.log_file)
         })
@@ -221,7 +327,12 @@ Available capabilities:
                     status = "❌ ERROR" if call.get('is_error') else "✅"
                     console.print(f"  {i}. {status} {call['tool_name']}")
             
+            if watchdog.stopped_reason:
+                console.print(f"\n⏹ Session stopped by budget: {watchdog.stopped_detail}", style="bold yellow")
+            
             console.print("=" * 60)
+        
+        return budget_report
 
 
 async def main():
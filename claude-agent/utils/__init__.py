@@ -1,6 +1,24 @@
 """Utility modules for Claude Agent SDK demo"""
 
-from .todo_tracker import TodoTracker
+# Submodules load on first attribute access: todo_tracker pulls in
+# claude_agent_sdk, which callers such as web_ui.py only need per query.
+_EXPORTS = {
+    'TodoTracker': 'todo_tracker',
+    'ResultStore': 'result_store',
+    'build_preview': 'result_store',
+    'Prefetcher': 'prefetch',
+    'SkillLoader': 'skill_loader',
+    'TextStreamCoalescer': 'text_stream',
+    'IncidentScheduler': 'incident_scheduler',
+}
 
-__all__ = ['TodoTracker']
+__all__ = list(_EXPORTS)
 
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    from importlib import import_module
+    value = getattr(import_module(f".{_EXPORTS[name]}", __name__), name)
+    globals()[name] = value
+    return value
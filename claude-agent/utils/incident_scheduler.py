@@ -0,0 +1,349 @@
+"""
+Incident Scheduler
+
+Admission control in front of the web UI's investigations. Every incident
+used to start an agent session immediately, so an alert storm meant dozens
+of concurrent sessions competing for model quota and the MCP servers.
+
+- A bounded worker pool runs investigations; `reserved_sev1` of the
+  workers only ever run SEV1 incidents, so a SEV1 never waits behind lower
+  severities. Beyond the reserved workers a SEV1 only takes a general
+  worker when no other submitter has an incident waiting
+- Queued incidents are served highest severity first, and round-robin
+  between submitters within a severity, so one client flooding the queue
+  does not starve the others
+- Admission is bounded: a submitter can hold a limited number of queued
+  incidents, and when the queue is full a new incident sheds the newest
+  incident of a lower severity (from the submitter with the most queued)
+  or is rejected. SEV1 incidents are never shed; they have their own,
+  smaller bounds (per submitter and in total), since the description
+  that makes an incident SEV1 comes from the client
+- Every status or queue-position change is reported through `notify`, so
+  clients can show where their incident stands
+"""
+
+import asyncio
+import itertools
+import re
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+
+SEVERITIES = ("SEV1", "SEV2", "SEV3", "SEV4")
+DEFAULT_SEVERITY = "SEV3"
+
+DEFAULT_WORKERS = 3
+DEFAULT_RESERVED_SEV1 = 1
+DEFAULT_MAX_QUEUED = 20
+DEFAULT_MAX_QUEUED_PER_SUBMITTER = 5
+DEFAULT_MAX_QUEUED_SEV1 = 10
+DEFAULT_MAX_QUEUED_SEV1_PER_SUBMITTER = 2
+
+# First matching severity wins (whole-word, case-insensitive); no match is DEFAULT_SEVERITY.
+# Batch log-analysis work is checked before the SEV2 symptoms it often mentions.
+SEVERITY_RULES = (
+    ("SEV1", ("sev1", "outage", "is down", "site down", "all users", "data loss", "cannot log in",
+              "can't log in", "unable to log in", "critical")),
+    ("SEV4", ("sev4", "python", "script", "percentile", "log dataset", "1000+", "batch", "report on")),
+    ("SEV2", ("sev2", "degraded", "error rate", "500", "500 errors", "spiking", "latency", "slow", "timeout",
+              "users reporting", "users are complaining", "database", "connection pool")),
+    ("SEV3", ("sev3",)),
+)
+
+
+def classify_severity(description: str, requested: Optional[str] = None) -> str:
+    """
+    Severity from the SEVERITY_RULES table. A requested severity (e.g. from
+    the client) can only lower it, never raise it, so a client cannot claim
+    the SEV1 worker for itself.
+    """
+    text = description.lower()
+    classified = DEFAULT_SEVERITY
+    for severity, keywords in SEVERITY_RULES:
+        if any(re.search(rf"(?<!\w){re.escape(keyword)}(?!\w)", text) for keyword in keywords):
+            classified = severity
+            break
+    if requested and requested.upper() in SEVERITIES:
+        return max(classified, requested.upper(), key=SEVERITIES.index)
+    return classified
+
+
+@dataclass
+class ScheduledIncident:
+    """
+    One submitted investigation.
+
+    Attributes:
+        status: 'queued', 'running', 'completed', 'failed', 'shed' or 'rejected'
+        position: 1-based place in the dispatch order while queued
+        context: Caller data (e.g. the submitting WebSocket); not reported
+    """
+    id: str
+    description: str
+    severity: str
+    submitter: str
+    submitted_at: float
+    context: Any = field(default=None, repr=False)
+    status: str = "queued"
+    position: Optional[int] = None
+    detail: Optional[str] = None
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        waited = None
+        if self.started_at is not None:
+            waited = round(self.started_at - self.submitted_at, 3)
+        return {
+            "job_id": self.id,
+            "severity": self.severity,
+            "submitter": self.submitter,
+            "status": self.status,
+            "position": self.position,
+            "detail": self.detail,
+            "waited_seconds": waited
+        }
+
+
+RunIncident = Callable[[ScheduledIncident], Awaitable[None]]
+NotifyIncident = Callable[[ScheduledIncident], Awaitable[None]]
+
+
+class IncidentScheduler:
+    """
+    Severity-priority, submitter-fair scheduler with a bounded worker pool.
+
+    Args:
+        run: Coroutine function running one investigation
+        notify: Coroutine function called after an incident's status or
+                queue position changes
+        workers: Investigations running at once
+        reserved_sev1: Workers only SEV1 incidents may use
+        max_queued: Incidents waiting at once (SEV1 may exceed it)
+        max_queued_per_submitter: Incidents one submitter may have waiting
+        max_queued_sev1: SEV1 incidents waiting at once
+        max_queued_sev1_per_submitter: SEV1 incidents one submitter may have waiting
+        clock: Monotonic clock (injectable for tests)
+    """
+
+    def __init__(self, run: RunIncident, notify: Optional[NotifyIncident] = None,
+                 workers: int = DEFAULT_WORKERS, reserved_sev1: int = DEFAULT_RESERVED_SEV1,
+                 max_queued: int = DEFAULT_MAX_QUEUED,
+                 max_queued_per_submitter: int = DEFAULT_MAX_QUEUED_PER_SUBMITTER,
+                 max_queued_sev1: int = DEFAULT_MAX_QUEUED_SEV1,
+                 max_queued_sev1_per_submitter: int = DEFAULT_MAX_QUEUED_SEV1_PER_SUBMITTER,
+                 clock: Callable[[], float] = time.monotonic):
+        if not 0 <= reserved_sev1 < workers:
+            raise ValueError("reserved_sev1 must leave at least one worker for other severities")
+        self.run = run
+        self.notify = notify
+        self.workers = workers
+        self.reserved_sev1 = reserved_sev1
+        self.max_queued = max_queued
+        self.max_queued_per_submitter = max_queued_per_submitter
+        self.max_queued_sev1 = max_queued_sev1
+        self.max_queued_sev1_per_submitter = max_queued_sev1_per_submitter
+        self._clock = clock
+        self._ids = itertools.count(1)
+        # severity -> submitter -> FIFO; submitter order is the round-robin order
+        self._queues: Dict[str, "OrderedDict[str, Deque[ScheduledIncident]]"] = {
+            severity: OrderedDict() for severity in SEVERITIES
+        }
+        self.running: Dict[str, ScheduledIncident] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self.counts = {"completed": 0, "failed": 0, "shed": 0, "rejected": 0}
+
+    # Admission
+
+    async def submit(self, description: str, submitter: str, severity: Optional[str] = None,
+                     context: Any = None) -> ScheduledIncident:
+        """
+        Admit (queue and possibly start), shed for, or reject an incident.
+
+        Returns:
+            The incident; its status tells which ('rejected' ones never run)
+        """
+        incident = ScheduledIncident(
+            id=f"q{next(self._ids)}",
+            description=description,
+            severity=classify_severity(description, severity),
+            submitter=submitter,
+            submitted_at=self._clock(),
+            context=context
+        )
+        changed = [incident]
+
+        reason = self._admission_check(incident)
+        if reason == "shed":
+            victim = self._shed_for(incident)
+            if victim is None:
+                reason = f"queue full ({self.max_queued} waiting)"
+            else:
+                changed.append(victim)
+                reason = None
+        if reason is not None:
+            incident.status = "rejected"
+            incident.detail = reason
+            self.counts["rejected"] += 1
+            await self._notify(changed)
+            return incident
+
+        self._queues[incident.severity].setdefault(submitter, deque()).append(incident)
+        await self._notify(changed + self._dispatch() + self._update_positions())
+        return incident
+
+    def _admission_check(self, incident: ScheduledIncident) -> Optional[str]:
+        """None to admit, 'shed' when room must be made, otherwise the rejection reason"""
+        if incident.severity == "SEV1":
+            sev1_queues = self._queues["SEV1"]
+            sev1_by_submitter = len(sev1_queues.get(incident.submitter, ()))
+            if sev1_by_submitter >= self.max_queued_sev1_per_submitter:
+                return f"submitter already has {sev1_by_submitter} SEV1 investigations waiting"
+            sev1_queued = sum(len(fifo) for fifo in sev1_queues.values())
+            if sev1_queued >= self.max_queued_sev1:
+                return f"SEV1 queue full ({sev1_queued} waiting)"
+            return None
+        queued_by_submitter = sum(
+            len(queues.get(incident.submitter, ())) for queues in self._queues.values()
+        )
+        if queued_by_submitter >= self.max_queued_per_submitter:
+            return f"submitter already has {queued_by_submitter} investigations waiting"
+        if self.queued >= self.max_queued:
+            return "shed"
+        return None
+
+    def _shed_for(self, incident: ScheduledIncident) -> Optional[ScheduledIncident]:
+        """Drop the newest queued incident of the lowest severity below the new one"""
+        rank = SEVERITIES.index(incident.severity)
+        for severity in reversed(SEVERITIES[rank + 1:]):
+            queues = self._queues[severity]
+            if not queues:
+                continue
+            submitter = max(queues, key=lambda name: len(queues[name]))
+            victim = queues[submitter].pop()
+            if not queues[submitter]:
+                del queues[submitter]
+            victim.status = "shed"
+            victim.position = None
+            victim.detail = f"shed for a {incident.severity} incident (queue full)"
+            victim.finished_at = self._clock()
+            self.counts["shed"] += 1
+            return victim
+        return None
+
+    # Dispatch
+
+    @property
+    def queued(self) -> int:
+        return sum(len(fifo) for queues in self._queues.values() for fifo in queues.values())
+
+    def _others_waiting(self, submitter: str) -> bool:
+        """Whether another submitter has a non-SEV1 incident waiting (SEV1s take turns anyway)"""
+        return any(
+            name != submitter for severity in SEVERITIES[1:] for name in self._queues[severity]
+        )
+
+    def _can_start(self, incident: ScheduledIncident) -> bool:
+        if len(self.running) >= self.workers:
+            return False
+        if incident.severity == "SEV1":
+            sev1 = sum(1 for running in self.running.values() if running.severity == "SEV1")
+            # Past the reserved workers a SEV1 would take a general worker from the others
+            return sev1 < self.reserved_sev1 or not self._others_waiting(incident.submitter)
+        general = sum(1 for running in self.running.values() if running.severity != "SEV1")
+        return general < self.workers - self.reserved_sev1
+
+    def _peek_next(self, severity: str) -> ScheduledIncident:
+        return next(iter(self._queues[severity].values()))[0]
+
+    def _pop_next(self, severity: str) -> ScheduledIncident:
+        queues = self._queues[severity]
+        submitter, fifo = next(iter(queues.items()))
+        incident = fifo.popleft()
+        if fifo:
+            queues.move_to_end(submitter)
+        else:
+            del queues[submitter]
+        return incident
+
+    def _dispatch(self) -> List[ScheduledIncident]:
+        """Start queued incidents while workers are free; returns those started"""
+        started = []
+        for severity in SEVERITIES:
+            while self._queues[severity] and self._can_start(self._peek_next(severity)):
+                incident = self._pop_next(severity)
+                incident.status = "running"
+                incident.position = None
+                incident.started_at = self._clock()
+                self.running[incident.id] = incident
+                self._tasks[incident.id] = asyncio.ensure_future(self._execute(incident))
+                started.append(incident)
+        return started
+
+    def dispatch_order(self) -> List[ScheduledIncident]:
+        """Queued incidents in the order they would start if nothing else arrived"""
+        order = []
+        for severity in SEVERITIES:
+            fifos = [list(fifo) for fifo in self._queues[severity].values()]
+            for round_ in itertools.zip_longest(*fifos):
+                order.extend(incident for incident in round_ if incident is not None)
+        return order
+
+    def _update_positions(self) -> List[ScheduledIncident]:
+        changed = []
+        for position, incident in enumerate(self.dispatch_order(), 1):
+            if incident.position != position:
+                incident.position = position
+                changed.append(incident)
+        return changed
+
+    async def _execute(self, incident: ScheduledIncident) -> None:
+        try:
+            await self.run(incident)
+            incident.status = "completed"
+        except Exception as e:
+            incident.status = "failed"
+            incident.detail = f"{type(e).__name__}: {e}"
+        except BaseException:
+            # Cancelled (e.g. server shutdown)
+            incident.status = "failed"
+            incident.detail = "cancelled"
+            raise
+        finally:
+            incident.finished_at = self._clock()
+            self.counts[incident.status] += 1
+            self.running.pop(incident.id, None)
+            self._tasks.pop(incident.id, None)
+            await self._notify([incident] + self._dispatch() + self._update_positions())
+
+    async def _notify(self, incidents: List[ScheduledIncident]) -> None:
+        if self.notify is None:
+            return
+        seen = set()
+        for incident in incidents:
+            if incident.id in seen:
+                continue
+            seen.add(incident.id)
+            try:
+                await self.notify(incident)
+            except Exception:
+                # Feedback is best-effort (e.g. the submitter disconnected)
+                pass
+
+    async def join(self) -> None:
+        """Wait until nothing is queued or running"""
+        while self._tasks:
+            await asyncio.gather(*list(self._tasks.values()), return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "reserved_sev1": self.reserved_sev1,
+            "running": [incident.to_dict() for incident in self.running.values()],
+            "queued": {
+                severity: sum(len(fifo) for fifo in self._queues[severity].values())
+                for severity in SEVERITIES
+            },
+            "counts": dict(self.counts)
+        }
@@ -0,0 +1,145 @@
+"""
+Speculative Prefetch
+
+While the model is still reading skills and writing its plan, no data is
+being fetched. The prefetcher classifies the incoming query with a small
+keyword rules table and calls the tools the model is likely to need first
+in the background, so the server-side state they build (scenario feeds,
+anomaly detector catch-up, health-probe results) is warm by the time the
+model's first real tool call arrives.
+
+Prefetch is best-effort: every call has a timeout, failures are reported in
+the result but never raised, and the task is cancelled when the query
+finishes.
+"""
+
+import asyncio
+import re
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+PREFETCH_TIMEOUT_SECONDS = 15.0
+
+# (server, tool, arguments) -> True on success
+CallTool = Callable[[str, str, Dict[str, Any]], Awaitable[bool]]
+ToolCall = Tuple[str, str, Dict[str, Any]]
+
+
+@dataclass(frozen=True)
+class PrefetchRule:
+    """
+    Tools to warm when a query mentions any of the keywords.
+
+    Attributes:
+        name: Rule name reported in results
+        keywords: Lowercase words or phrases matched whole-word against the query
+        calls: (server, tool, arguments) to run in the background; empty
+               for a rule that only stops later rules from matching
+    """
+    name: str
+    keywords: Tuple[str, ...]
+    calls: Tuple[ToolCall, ...]
+
+
+# Most specific first; only the first matching rule is used, since warming
+# a scenario the model will not ask about is pure overhead. Log-analytics
+# work often names an incident ("Analyze logs for incident INC-...") but never
+# reads the monitoring snapshot, so it is matched before the generic rule.
+RULES = (
+    PrefetchRule(
+        "log-analytics",
+        ("analyze logs", "analyse logs", "log analysis", "log analytics", "log dataset", "log archive",
+         "log templates", "raw logs", "python", "script", "percentile"),
+        ()
+    ),
+    PrefetchRule(
+        "database",
+        ("database", "db connection", "connection pool", "connections at", "connection leak", "pool exhausted"),
+        (("monitoring-analysis", "get_incident_snapshot", {"incident_type": "connection_leak"}),)
+    ),
+    PrefetchRule(
+        "incident",
+        ("incident", "degraded", "outage", "slow", "latency", "error rate", "500", "down", "log in", "login",
+         "investigate", "spiking", "timeout", "users reporting", "users are complaining"),
+        (("monitoring-analysis", "get_incident_snapshot", {}),)
+    ),
+)
+
+
+def classify(query: str, rules: Tuple[PrefetchRule, ...] = RULES) -> Optional[PrefetchRule]:
+    """First rule with a keyword in the query (whole-word), or None"""
+    text = re.sub(r"\s+", " ", query.lower())
+    for rule in rules:
+        if any(re.search(rf"(?<!\w){re.escape(keyword)}(?!\w)", text) for keyword in rule.keywords):
+            return rule
+    return None
+
+
+def http_tool_caller(mcp_servers: Dict[str, Dict[str, Any]]) -> CallTool:
+    """CallTool over the servers' streamable-HTTP endpoints (one short session per call)"""
+
+    async def call(server: str, tool: str, arguments: Dict[str, Any]) -> bool:
+        from mcp import ClientSession
+        from mcp.client.streamable_http import streamablehttp_client
+
+        async with streamablehttp_client(mcp_servers[server]["url"]) as (read, write, _):
+            async with ClientSession(read, write) as session:
+                await session.initialize()
+                result = await session.call_tool(tool, arguments)
+                return not result.isError
+
+    return call
+
+
+class Prefetcher:
+    """
+    Starts background warm-up calls for a query.
+
+    Args:
+        call_tool: Coroutine function executing one MCP tool call
+        rules: Keyword rules table
+        timeout: Seconds before an unfinished call is abandoned
+    """
+
+    def __init__(self, call_tool: CallTool, rules: Tuple[PrefetchRule, ...] = RULES,
+                 timeout: float = PREFETCH_TIMEOUT_SECONDS):
+        self.call_tool = call_tool
+        self.rules = rules
+        self.timeout = timeout
+
+    def start(self, query: str) -> Optional["asyncio.Task[Dict[str, Any]]"]:
+        """Schedule warm-up for the query; None when no rule (or a call-less rule) matches"""
+        rule = classify(query, self.rules)
+        if rule is None or not rule.calls:
+            return None
+        return asyncio.ensure_future(self._run(rule))
+
+    async def _run(self, rule: PrefetchRule) -> Dict[str, Any]:
+        started = time.perf_counter()
+        results = await asyncio.gather(*(self._call(*call) for call in rule.calls))
+        return {
+            "rule": rule.name,
+            "calls": results,
+            "duration_ms": round((time.perf_counter() - started) * 1000, 1)
+        }
+
+    async def _call(self, server: str, tool: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        started = time.perf_counter()
+        try:
+            ok = await asyncio.wait_for(self.call_tool(server, tool, arguments), timeout=self.timeout)
+            status = "ok" if ok else "error"
+        except asyncio.TimeoutError:
+            status = "timeout"
+        except Exception as e:
+            # The MCP client raises task-group errors; report the underlying cause
+            while isinstance(e, ExceptionGroup) and e.exceptions:
+                e = e.exceptions[0]
+            status = f"error: {type(e).__name__}: {e}"
+        return {
+            "server": server,
+            "tool": tool,
+            "arguments": arguments,
+            "status": status,
+            "duration_ms": round((time.perf_counter() - started) * 1000, 1)
+        }
@@ -0,0 +1,208 @@
+"""
+Tool Result Store
+
+Keeps full tool results out of the WebSocket stream. Each result is stored once
+in a content-addressed blob store and the UI only receives a bounded preview
+plus the blob ID, fetching the full payload on demand.
+"""
+
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+
+DEFAULT_PREVIEW_CHARS = 500
+
+
+def iter_content_chunks(content: Any) -> Iterator[str]:
+    """
+    Yield the textual pieces of a tool result without joining them.
+
+    ToolResultBlock.content is either a string, a list of content blocks
+    (dicts with 'type'/'text'), or None.
+
+    Args:
+        content: Raw ToolResultBlock content
+
+    Yields:
+        Text chunks in order
+    """
+    if content is None:
+        return
+    if isinstance(content, str):
+        yield content
+        return
+    if isinstance(content, (list, tuple)):
+        for block in content:
+            if isinstance(block, dict):
+                if block.get("type") == "text" and isinstance(block.get("text"), str):
+                    yield block["text"]
+                else:
+                    # Non-text blocks (images, resources) are summarized, not inlined
+                    yield json.dumps({k: v for k, v in block.items() if k != "data"}, default=str)
+            else:
+                yield str(block)
+        return
+    yield str(content)
+
+
+def build_preview(content: Any, limit: int = DEFAULT_PREVIEW_CHARS) -> Tuple[str, bool]:
+    """
+    Build a bounded preview by streaming over the content chunks.
+
+    Stops reading as soon as `limit` characters are collected, so the cost
+    is proportional to the preview size rather than the full result.
+
+    Args:
+        content: Raw ToolResultBlock content
+        limit: Maximum number of characters in the preview
+
+    Returns:
+        Tuple of (preview text, truncated flag)
+    """
+    parts = []
+    remaining = limit
+
+    for chunk in iter_content_chunks(content):
+        if remaining <= 0:
+            if chunk:
+                return "".join(parts), True
+            continue
+        if len(chunk) > remaining:
+            parts.append(chunk[:remaining])
+            return "".join(parts), True
+        parts.append(chunk)
+        remaining -= len(chunk)
+
+    return "".join(parts), False
+
+
+@dataclass
+class StoredResult:
+    """Metadata for a stored tool result"""
+    result_id: str
+    size: int
+    content_type: str
+
+
+class ResultStore:
+    """
+    Content-addressed, size-bounded blob store for tool results.
+
+    Blobs are keyed by the SHA-256 of their UTF-8 bytes, so identical results
+    (e.g. a retried get_raw_logs call) are stored once. The least recently
+    used blobs are evicted once `max_bytes` is exceeded.
+    """
+
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._blobs: "OrderedDict[str, bytes]" = OrderedDict()
+        self._content_types: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def put(self, content: Any) -> StoredResult:
+        """
+        Store tool result content, encoding and hashing it chunk by chunk.
+
+        Safe to call from a worker thread (e.g. via asyncio.to_thread).
+
+        Args:
+            content: Raw ToolResultBlock content
+
+        Returns:
+            StoredResult describing the blob
+        """
+        hasher = hashlib.sha256()
+        encoded = []
+        for chunk in iter_content_chunks(content):
+            data = chunk.encode("utf-8")
+            hasher.update(data)
+            encoded.append(data)
+
+        result_id = hasher.hexdigest()
+        content_type = self._guess_content_type(encoded)
+
+        with self._lock:
+            existing = self._blobs.get(result_id)
+            if existing is not None:
+                self._blobs.move_to_end(result_id)
+                return StoredResult(result_id, len(existing), self._content_types[result_id])
+
+        blob = b"".join(encoded)
+        with self._lock:
+            if result_id not in self._blobs:
+                self._blobs[result_id] = blob
+                self._content_types[result_id] = content_type
+                self.total_bytes += len(blob)
+                self._evict()
+
+        return StoredResult(result_id, len(blob), content_type)
+
+    def get(self, result_id: str) -> Optional[bytes]:
+        """Return the blob for `result_id`, or None if unknown/evicted"""
+        with self._lock:
+            blob = self._blobs.get(result_id)
+            if blob is not None:
+                self._blobs.move_to_end(result_id)
+        return blob
+
+    def content_type(self, result_id: str) -> str:
+        """Return the stored content type for `result_id`"""
+        return self._content_types.get(result_id, "text/plain; charset=utf-8")
+
+    def _evict(self) -> None:
+        # Always keep the most recent blob, even if it alone exceeds the budget
+        while self.total_bytes > self.max_bytes and len(self._blobs) > 1:
+            result_id, blob = self._blobs.popitem(last=False)
+            self._content_types.pop(result_id, None)
+            self.total_bytes -= len(blob)
+
+    @staticmethod
+    def _guess_content_type(encoded: list) -> str:
+        if len(encoded) == 1 and encoded[0][:1] in (b"{", b"["):
+            return "application/json"
+        return "text/plain; charset=utf-8"
+
+
+def parse_range_header(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single-range HTTP Range header ("bytes=start-end").
+
+    Args:
+        header: Range header value (or None)
+        size: Total size of the resource in bytes
+
+    Returns:
+        Inclusive (start, end) byte offsets, or None if no/unsupported range
+
+    Raises:
+        ValueError: If the range is syntactically valid but not satisfiable
+    """
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+
+    start_str, _, end_str = header[len("bytes="):].strip().partition("-")
+
+    try:
+        first = int(start_str) if start_str else None
+        last = int(end_str) if end_str else None
+    except ValueError:
+        return None
+
+    if first is None:
+        # Suffix range: last N bytes
+        if not last:
+            raise ValueError("Unsatisfiable range")
+        start, end = max(size - last, 0), size - 1
+    else:
+        start = first
+        end = min(last if last is not None else size - 1, size - 1)
+
+    if start >= size or start > end:
+        raise ValueError("Unsatisfiable range")
+
+    return start, end
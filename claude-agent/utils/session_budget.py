@@ -0,0 +1,185 @@
+"""
+Session Budget Watchdog
+
+Per-session limits on wall time, model turns, tool calls and bytes returned
+by tools, so a stuck investigation cannot hold a worker indefinitely and
+the web UI's concurrent capacity stays predictable.
+
+- Budgets are configured per skill (SKILL_BUDGETS, with a 'default' entry
+  for sessions without a skill); the session starts with
+  the budget of the skill matched for the query and switches when the model
+  invokes a different skill through the Skill tool
+- guard() wraps the agent's message stream: the wall-time deadline applies
+  while waiting for the next message, and the other limits are checked
+  after each message has been handled
+- When a limit is hit the stream is closed (the SDK stops the CLI process)
+  and the reason is recorded in report()
+"""
+
+import asyncio
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, AsyncIterator, Callable, Dict, Optional
+
+from claude_agent_sdk import AssistantMessage, ToolResultBlock, ToolUseBlock, UserMessage
+
+from utils.result_store import iter_content_chunks
+
+
+@dataclass(frozen=True)
+class SessionBudget:
+    """
+    Limits for one agent session.
+
+    Attributes:
+        max_seconds: Wall-clock time
+        max_turns: Model turns (the first response plus one per batch of tool results)
+        max_tool_calls: Tool uses requested by the model
+        max_tool_result_bytes: UTF-8 size of all tool results
+    """
+    max_seconds: float = 300.0
+    max_turns: int = 30
+    max_tool_calls: int = 40
+    max_tool_result_bytes: int = 16 * 1024 * 1024
+
+
+DEFAULT_BUDGET = SessionBudget()
+
+SKILL_BUDGETS = {
+    "default": DEFAULT_BUDGET,
+    "incident-analysis": SessionBudget(
+        max_seconds=900.0, max_turns=100, max_tool_calls=120, max_tool_result_bytes=32 * 1024 * 1024
+    ),
+    # Fetches large log datasets; fewer, bigger tool results
+    "log-analytics": SessionBudget(
+        max_seconds=600.0, max_turns=60, max_tool_calls=60, max_tool_result_bytes=64 * 1024 * 1024
+    ),
+}
+
+
+def budget_for(skill: Optional[str], budgets: Optional[Dict[str, SessionBudget]] = None) -> SessionBudget:
+    """Budget of a skill; the 'default' entry (or DEFAULT_BUDGET) for no or unknown skill"""
+    budgets = SKILL_BUDGETS if budgets is None else budgets
+    if skill and skill in budgets:
+        return budgets[skill]
+    return budgets.get("default", DEFAULT_BUDGET)
+
+
+class SessionWatchdog:
+    """
+    Tracks one session's usage against its budget.
+
+    Args:
+        skill: Skill matched for the query (selects the initial budget)
+        budgets: Per-skill budgets (default: SKILL_BUDGETS)
+        clock: Monotonic clock (injectable for tests)
+    """
+
+    def __init__(self, skill: Optional[str] = None, budgets: Optional[Dict[str, SessionBudget]] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        self.budgets = SKILL_BUDGETS if budgets is None else budgets
+        self.skill = skill
+        self.budget = budget_for(skill, self.budgets)
+        self._clock = clock
+        self.started = clock()
+        self.turns = 1
+        self.tool_calls = 0
+        self.tool_result_bytes = 0
+        self.stopped_reason: Optional[str] = None
+        self.stopped_detail: Optional[str] = None
+
+    @property
+    def sdk_max_turns(self) -> int:
+        """Turn cap to give the SDK: the largest budget, since the skill can change mid-session"""
+        return max([self.budget.max_turns, *(budget.max_turns for budget in self.budgets.values())])
+
+    @property
+    def elapsed(self) -> float:
+        return self._clock() - self.started
+
+    def observe(self, message: Any) -> Optional[str]:
+        """
+        Account for one SDK message.
+
+        Returns:
+            The exhausted limit ('turns', 'tool_calls', 'tool_result_bytes'), or None
+        """
+        if isinstance(message, AssistantMessage):
+            for block in message.content:
+                if isinstance(block, ToolUseBlock):
+                    self.tool_calls += 1
+                    if block.name == "Skill":
+                        self._switch_skill(block.input)
+        elif isinstance(message, UserMessage) and isinstance(message.content, list):
+            results = [block for block in message.content if isinstance(block, ToolResultBlock)]
+            for block in results:
+                self.tool_result_bytes += sum(len(chunk.encode("utf-8")) for chunk in iter_content_chunks(block.content))
+            if results:
+                # Tool results go back to the model for another turn
+                self.turns += 1
+
+        budget = self.budget
+        if self.tool_calls > budget.max_tool_calls:
+            return self._stop("tool_calls", f"{self.tool_calls} tool calls > limit {budget.max_tool_calls}")
+        if self.tool_result_bytes > budget.max_tool_result_bytes:
+            return self._stop("tool_result_bytes",
+                              f"{self.tool_result_bytes} bytes of tool results > limit {budget.max_tool_result_bytes}")
+        if self.turns > budget.max_turns:
+            return self._stop("turns", f"{self.turns} turns > limit {budget.max_turns}")
+        return None
+
+    def _switch_skill(self, tool_input: Dict[str, Any]) -> None:
+        skill = tool_input.get("skill") or tool_input.get("command")
+        if skill and skill != self.skill and skill != "default" and skill in self.budgets:
+            self.skill = skill
+            self.budget = self.budgets[skill]
+
+    def _stop(self, reason: str, detail: str) -> str:
+        if self.stopped_reason is None:
+            self.stopped_reason = reason
+            self.stopped_detail = detail
+        return self.stopped_reason
+
+    async def guard(self, messages: AsyncIterator[Any]) -> AsyncIterator[Any]:
+        """
+        Yield messages until the stream ends or a limit is hit, then close
+        the underlying stream.
+        """
+        try:
+            while True:
+                remaining = self.budget.max_seconds - self.elapsed
+                if remaining <= 0:
+                    self._stop("wall_time", f"{self.elapsed:.0f}s > limit {self.budget.max_seconds:g}s")
+                    return
+                try:
+                    async with asyncio.timeout(remaining) as deadline:
+                        message = await anext(messages)
+                except StopAsyncIteration:
+                    return
+                except TimeoutError:
+                    if not deadline.expired():
+                        raise
+                    self._stop("wall_time", f"no result within {self.budget.max_seconds:g}s limit")
+                    return
+
+                yield message
+                if self.observe(message) is not None:
+                    return
+        finally:
+            aclose = getattr(messages, "aclose", None)
+            if aclose is not None:
+                await aclose()
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "skill": self.skill,
+            "budget": asdict(self.budget),
+            "usage": {
+                "seconds": round(self.elapsed, 1),
+                "turns": self.turns,
+                "tool_calls": self.tool_calls,
+                "tool_result_bytes": self.tool_result_bytes
+            },
+            "stopped_reason": self.stopped_reason,
+            "stopped_detail": self.stopped_detail
+        }
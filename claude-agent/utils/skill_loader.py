@@ -0,0 +1,237 @@
+"""
+Skill Loader
+
+Parses skill bundles (.claude/skills/<name>/SKILL.md plus its phase files)
+once and keeps them in memory, so the content can be placed in the system
+prompt instead of being fetched with one Read turn per file during every
+investigation.
+
+- A bundle's signature is the (path, mtime, size) of all its Markdown
+  files; load() only stats files and re-parses bundles whose signature
+  changed (edit, add or delete a file and the next query sees it)
+- match() picks the skill for a query from a small trigger table, falling
+  back to word overlap with the skill description
+- prompt_section() renders SKILL.md and the phase files (in the order
+  SKILL.md mentions them) within a character budget
+"""
+
+import re
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+MAX_PRELOAD_CHARS = 60_000
+MIN_MATCH_SCORE = 2
+
+# Phrases that select a skill (each hit scores 2; description overlap scores 1 per word)
+SKILL_TRIGGERS = {
+    "log-analytics": (
+        "python", "script", "code", "log entries", "parse", "1000+", "percentile", "log dataset"
+    ),
+    "incident-analysis": (
+        "incident", "degraded", "outage", "production", "users reporting", "users are complaining",
+        "error rate", "investigate", "resolve", "spiking", "500 errors", "log in", "slow"
+    ),
+}
+
+STOPWORDS = frozenset(
+    "a an and are as at be by can for from in into is it of on or that the this to use used using when "
+    "with your you".split()
+)
+
+
+@dataclass
+class SkillBundle:
+    """One parsed skill: frontmatter, SKILL.md body and its other Markdown files"""
+    name: str
+    description: str
+    directory: Path
+    instructions: str
+    files: Dict[str, str] = field(default_factory=dict)
+    signature: Tuple[Tuple[str, int, int], ...] = ()
+
+    @property
+    def chars(self) -> int:
+        return len(self.instructions) + sum(len(content) for content in self.files.values())
+
+
+def parse_frontmatter(text: str) -> Tuple[Dict[str, str], str]:
+    """Split '---' delimited `key: value` frontmatter from the body"""
+    if not text.startswith("---"):
+        return {}, text
+    end = text.find("\n---", 3)
+    if end == -1:
+        return {}, text
+
+    meta: Dict[str, str] = {}
+    key = None
+    for line in text[3:end].splitlines():
+        if not line.strip():
+            continue
+        match = re.match(r"([A-Za-z_][\w-]*)\s*:\s*(.*)$", line)
+        if match and not line[0].isspace():
+            key, value = match.group(1), match.group(2).strip()
+            meta[key] = value.strip("\"'")
+        elif key is not None:
+            # Indented continuation of a folded value
+            meta[key] = f"{meta[key]} {line.strip()}".strip()
+    body = text[end + 4:]
+    return meta, body.lstrip("\n")
+
+
+def _words(text: str) -> set:
+    words = set()
+    for word in re.findall(r"[a-z0-9+]+", text.lower()):
+        if len(word) < 3 or word in STOPWORDS:
+            continue
+        words.add(word[:-1] if word.endswith("s") and len(word) > 4 else word)
+    return words
+
+
+def _signature(directory: Path) -> Tuple[Tuple[str, int, int], ...]:
+    entries = []
+    for path in directory.rglob("*.md"):
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            continue
+        entries.append((str(path.relative_to(directory)), stat.st_mtime_ns, stat.st_size))
+    return tuple(sorted(entries))
+
+
+def parse_bundle(directory: Path, signature: Tuple[Tuple[str, int, int], ...]) -> Optional[SkillBundle]:
+    """Read a skill directory; None if it has no SKILL.md"""
+    skill_file = directory / "SKILL.md"
+    try:
+        meta, instructions = parse_frontmatter(skill_file.read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return None
+
+    others = [relative for relative, _, _ in signature if relative != "SKILL.md"]
+    # Files in the order SKILL.md first mentions them, unmentioned ones last
+    mentioned = {relative: instructions.find(relative) for relative in others}
+    ordered = sorted(others, key=lambda relative: (mentioned[relative] == -1, mentioned[relative], relative))
+
+    files = {}
+    for relative in ordered:
+        try:
+            files[relative] = (directory / relative).read_text(encoding="utf-8")
+        except FileNotFoundError:
+            continue
+    return SkillBundle(
+        name=meta.get("name") or directory.name,
+        description=meta.get("description", ""),
+        directory=directory,
+        instructions=instructions,
+        files=files,
+        signature=signature
+    )
+
+
+class SkillLoader:
+    """
+    In-memory skill bundles with mtime-based invalidation.
+
+    Args:
+        roots: Skill directories, highest priority first (a project skill
+               shadows a user skill of the same name)
+        base: Directory that rendered file paths are relative to (the
+              agent's cwd, so they match the paths the model would Read)
+    """
+
+    def __init__(self, roots: Iterable[Path], base: Optional[Path] = None):
+        self.roots = [Path(root) for root in roots]
+        self.base = base
+        # directory -> (signature, bundle or None when it has no SKILL.md)
+        self._bundles: Dict[Path, Tuple[Tuple[Tuple[str, int, int], ...], Optional[SkillBundle]]] = {}
+        self._lock = threading.Lock()
+        self.parses = 0
+
+    def load(self) -> Dict[str, SkillBundle]:
+        """Current bundles by name; only changed bundles are re-read"""
+        found: Dict[str, SkillBundle] = {}
+        with self._lock:
+            seen = set()
+            for root in self.roots:
+                if not root.is_dir():
+                    continue
+                for directory in sorted(path for path in root.iterdir() if path.is_dir()):
+                    seen.add(directory)
+                    signature = _signature(directory)
+                    cached = self._bundles.get(directory)
+                    if cached is None or cached[0] != signature:
+                        cached = self._bundles[directory] = (signature, parse_bundle(directory, signature))
+                        self.parses += 1
+                    bundle = cached[1]
+                    if bundle is not None:
+                        found.setdefault(bundle.name, bundle)
+            for directory in list(self._bundles):
+                if directory not in seen:
+                    del self._bundles[directory]
+        return found
+
+    def match(self, query: str) -> Optional[SkillBundle]:
+        """Best-scoring skill for the query, or None below MIN_MATCH_SCORE"""
+        text = query.lower()
+        query_words = _words(query)
+        best, best_score = None, 0
+        for name, bundle in self.load().items():
+            score = 2 * sum(1 for phrase in SKILL_TRIGGERS.get(name, ()) if phrase in text)
+            score += len(query_words & _words(f"{name} {bundle.description}"))
+            if score > best_score:
+                best, best_score = bundle, score
+        return best if best_score >= MIN_MATCH_SCORE else None
+
+    def _display_path(self, path: Path) -> str:
+        if self.base is not None:
+            try:
+                return str(path.relative_to(self.base))
+            except ValueError:
+                pass
+        return str(path)
+
+    def prompt_section(self, bundle: SkillBundle, max_chars: int = MAX_PRELOAD_CHARS) -> Tuple[str, List[str]]:
+        """
+        System-prompt text carrying the bundle's files.
+
+        Returns:
+            (section text, display paths of the files included)
+        """
+        directory = self._display_path(bundle.directory)
+        parts = []
+        included = []
+        remaining = max_chars
+        for relative, content in [("SKILL.md", bundle.instructions), *bundle.files.items()]:
+            if len(content) > remaining and included:
+                break
+            path = f"{directory}/{relative}"
+            parts.append(f"=== {path} ===\n{content.strip()}\n")
+            included.append(path)
+            remaining -= len(content)
+
+        skipped = [f"{directory}/{relative}" for relative in bundle.files if f"{directory}/{relative}" not in included]
+        header = (
+            f"PRELOADED SKILL: {bundle.name}\n"
+            f"The files of the {bundle.name} skill below are already loaded - do not Read them again. "
+            f"Invoke the Skill as usual and, when its instructions refer to one of these files "
+            f"(e.g. a phase file), follow the copy below."
+        )
+        if skipped:
+            header += f" Files not preloaded (Read them when needed): {', '.join(skipped)}."
+        return header + "\n\n" + "\n".join(parts), included
+
+
+_default_loader: Optional[SkillLoader] = None
+
+
+def get_skill_loader(project_root: Path) -> SkillLoader:
+    """Process-wide loader (web_ui creates an agent per query; the cache outlives it)"""
+    global _default_loader
+    if _default_loader is None:
+        _default_loader = SkillLoader(
+            [project_root / ".claude" / "skills", Path.home() / ".claude" / "skills"],
+            base=project_root
+        )
+        _default_loader.load()
+    return _default_loader
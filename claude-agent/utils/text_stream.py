@@ -0,0 +1,125 @@
+"""
+Streamed Text Coalescing
+
+With include_partial_messages the SDK yields a StreamEvent per token-sized
+text delta - far more messages than a browser needs to redraw. The
+coalescer buffers deltas and sends them as one frame per interval (~50ms),
+so text appears within a frame of being generated without flooding the
+WebSocket.
+
+- Each text content block of the main conversation is one stream (its
+  stream_id, unique across queries since several investigations share
+  the socket, is sent with every frame); deltas of subagents
+  (parent_tool_use_id set) are ignored, their messages arrive complete
+- A frame is sent immediately when the previous one is older than the
+  interval, otherwise a timer sends the buffered text when it is due
+- A new stream, the end of a block, or the complete AssistantMessage
+  flushes whatever is still buffered
+"""
+
+import asyncio
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+FRAME_INTERVAL_SECONDS = 0.05
+
+# Receives {'stream_id': ..., 'text': ...}
+SendFrame = Callable[[Dict[str, Any]], Awaitable[None]]
+
+
+class TextStreamCoalescer:
+    """
+    Turns SDK stream events into coalesced text frames.
+
+    Args:
+        send: Coroutine function sending one frame
+        interval: Minimum seconds between frames
+        clock: Monotonic clock (injectable for tests)
+        prefix: Stream ID prefix (default: random, unique per coalescer)
+    """
+
+    def __init__(self, send: SendFrame, interval: float = FRAME_INTERVAL_SECONDS,
+                 clock: Callable[[], float] = time.monotonic, prefix: Optional[str] = None):
+        self.send = send
+        self.prefix = prefix or uuid.uuid4().hex[:12]
+        self.interval = interval
+        self._clock = clock
+        self._streams = 0
+        self._stream_id: Optional[str] = None
+        self._parts: List[str] = []
+        self._last_sent = float("-inf")
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._pending_flush: Optional[asyncio.Task] = None
+        # Streams whose text has been sent but not yet replaced by the final message
+        self.open_streams: List[str] = []
+        self.deltas = 0
+        self.frames = 0
+
+    async def handle_event(self, event: Dict[str, Any], parent_tool_use_id: Optional[str] = None) -> None:
+        """Process one raw API stream event (StreamEvent.event)"""
+        if parent_tool_use_id is not None:
+            return
+        kind = event.get("type")
+        if kind == "content_block_start" and event.get("content_block", {}).get("type") == "text":
+            await self.flush()
+            self._streams += 1
+            self._stream_id = f"{self.prefix}-{self._streams}"
+            self.open_streams.append(self._stream_id)
+        elif kind == "content_block_delta" and event.get("delta", {}).get("type") == "text_delta":
+            if self._stream_id is not None:
+                await self.add(event["delta"].get("text", ""))
+        elif kind == "content_block_stop":
+            await self.flush()
+            self._stream_id = None
+
+    async def add(self, text: str) -> None:
+        """Buffer a delta of the current stream; sends a frame when one is due"""
+        if not text:
+            return
+        self.deltas += 1
+        self._parts.append(text)
+        if self._timer is not None:
+            return
+        delay = self._last_sent + self.interval - self._clock()
+        if delay <= 0:
+            await self.flush()
+        else:
+            self._timer = asyncio.get_running_loop().call_later(delay, self._flush_later)
+
+    def _flush_later(self) -> None:
+        self._timer = None
+        self._pending_flush = asyncio.ensure_future(self.flush())
+
+    async def flush(self) -> None:
+        """Send buffered text now"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._parts or self._stream_id is None:
+            self._parts = []
+            return
+        text, self._parts = "".join(self._parts), []
+        self._last_sent = self._clock()
+        self.frames += 1
+        await self.send({"stream_id": self._stream_id, "text": text})
+
+    async def finalize(self) -> List[str]:
+        """
+        Flush and hand over the streams a complete AssistantMessage replaces.
+
+        Returns:
+            Stream IDs sent since the last call (the client swaps them for
+            the final, fully rendered text)
+        """
+        await self.flush()
+        streams, self.open_streams = self.open_streams, []
+        if self._stream_id is not None:
+            # Block still open (message arrived before content_block_stop)
+            self._stream_id = None
+        return streams
+
+    async def close(self) -> None:
+        await self.flush()
+        if self._pending_flush is not None and not self._pending_flush.done():
+            await self._pending_flush
@@ -2,13 +2,32 @@
 """Log Analytics MCP Server - Streamable HTTP transport on port 9003."""
 
 import asyncio
-from mcp.server.fastmcp import FastMCP
-from typing import Optional
+import codecs
+from mcp.server.fastmcp import Context, FastMCP
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
 import json
 import logging
+import os
+import re
 import sys
-import subprocess
-from datetime import datetime, timedelta
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+from server_utils.aggregation import PARTITION_MODES, aggregate_archive, aggregate_rows
+from server_utils.dataset_store import get_dataset_store
+from server_utils.exec_cache import ExecCache, normalized_script_hash
+from server_utils.instrumentation import ToolMetrics, install_metrics_endpoints
+from server_utils.log_archive import LogArchive, LogArchiveWriter, iter_block_rows, to_epoch
+from server_utils.log_generator import (
+    DEFAULT_SERVICES, InjectedIncident, LogGeneratorConfig, generate_logs, stable_seed, write_columnar
+)
+from server_utils.log_templates import TemplateMinerCache
+from server_utils.timeseries import parse_duration
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -17,119 +36,138 @@ logger = logging.getLogger(__name__)
 mcp_server = FastMCP("log-analytics", host="127.0.0.1", port=9003)
 
 
+@mcp_server.custom_route("/health", methods=["GET"])
+async def health(request: Request) -> JSONResponse:
+    """Liveness endpoint used by start-servers.sh and the multi-server host"""
+    return JSONResponse({"status": "ok", "server": mcp_server.name})
+
+
+# Per-tool call counts/latency/sizes, served on /metrics and via get_server_stats
+tool_metrics = ToolMetrics(mcp_server.name)
+install_metrics_endpoints(mcp_server, tool_metrics)
+
+
+DEFAULT_LOG_ENTRIES = 1200
+# Fetches above this are returned as a dataset handle instead of inline logs
+INLINE_LOG_ENTRIES = 5000
+DATASET_SAMPLE_ROWS = 5
+MAX_LOG_ENTRIES = 1_000_000
+# get_raw_logs windows end on a multiple of this, so repeated fetches return the same logs
+LOG_WINDOW_ALIGN_SECONDS = 60
+MAX_DATASET_ROWS = 50_000_000
+
+ANALYTICS_DIR = Path(__file__).parent.parent / "analytics"
+# Generated datasets (columnar .npz) for replay
+DATASET_DIR = ANALYTICS_DIR / "datasets"
+# Chunked, block-indexed log archives (.logz)
+ARCHIVE_DIR = ANALYTICS_DIR / "archives"
+MAX_ARCHIVE_QUERY_ROWS = 10_000
+# Memoized analysis script results and bytecode
+EXEC_CACHE_DIR = ANALYTICS_DIR / "cache" / "exec"
+EXEC_CACHE_BYTES = 256 * 1024 * 1024
+ANALYSIS_TIMEOUT_SECONDS = 30
+# Minimum interval between progress notifications carrying new script output
+PROGRESS_INTERVAL_SECONDS = 0.5
+PROGRESS_MESSAGE_CHARS = 1000
+
+
+# Large results by reference (shared with the other servers via the spill directory)
+dataset_store = get_dataset_store()
+
+# Learned log templates per service, refined across mine_log_templates calls
+template_cache = TemplateMinerCache(max_services=64, max_clusters=1000)
+template_lock = threading.Lock()
+
+# One writer at a time per archive file (concurrent appends would interleave blocks)
+archive_locks: Dict[str, threading.Lock] = {}
+archive_locks_guard = threading.Lock()
+
+
+def _archive_lock(path: Path) -> threading.Lock:
+    with archive_locks_guard:
+        return archive_locks.setdefault(str(path), threading.Lock())
+
+# Results of analysis scripts keyed by (script AST, input data) hashes
+exec_cache = ExecCache(EXEC_CACHE_DIR, max_bytes=EXEC_CACHE_BYTES)
+
+
+def _safe_name(name: str) -> bool:
+    """File names accepted from tool arguments: no separators or leading dot"""
+    return bool(re.fullmatch(r"[A-Za-z0-9_.-]+", name)) and not name.startswith(".")
+
+
+def _incident_log_config(incident_id: str, window_seconds: float, seed: Optional[int] = None,
+                         incident_service: Optional[str] = "auth-service") -> LogGeneratorConfig:
+    """
+    Generator config for an incident: seeded from the incident ID so repeated
+    fetches return the same logs, with an auth-service timeout incident
+    ramping up over the last quarter of the window.
+    """
+    incidents = ()
+    if incident_service:
+        error_codes = {s.name: s.error_codes[0] for s in DEFAULT_SERVICES}
+        incidents = (InjectedIncident(
+            service=incident_service,
+            error_code=error_codes.get(incident_service, "INTERNAL_ERROR"),
+            start_offset=-window_seconds / 4,
+            duration=window_seconds / 4,
+            error_rate=0.35,
+            latency_multiplier=8.0,
+            ramp_seconds=min(300.0, window_seconds / 20)
+        ),)
+    return LogGeneratorConfig(seed=stable_seed(incident_id) if seed is None else seed, incidents=incidents)
+
+
 @mcp_server.tool()
+@tool_metrics.instrument
 async def get_raw_logs(
     incident_id: str,
     timeframe: str = "1h",
-    service_filter: str = "all"
+    service_filter: str = "all",
+    entry_count: int = DEFAULT_LOG_ENTRIES,
+    as_dataset: Optional[bool] = None
 ) -> str:
     """
     Fetch raw log data for analysis. Returns 1000+ log entries as JSON.
-    Use this to get large datasets for pattern analysis.
+    Use this to get large datasets for pattern analysis. Logs are
+    deterministic per incident ID and spread over the timeframe with
+    daily traffic patterns; the incident shows up in the last quarter.
+    
+    Large fetches (more than 5000 entries, or as_dataset=true) are stored
+    server-side and returned as a dataset_id with schema, summary and a
+    small sample. Pass the dataset_id to execute_analysis_script,
+    aggregate_logs, mine_log_templates or archive_logs instead of copying
+    the logs into a file.
     
     Args:
         incident_id: Incident ID to fetch logs for
         timeframe: Time range (e.g., '1h', '24h', '7d')
-        service_filter: Optional service name filter
+        service_filter: Service name filter ('all' for every service)
+        entry_count: Number of entries to return (default 1200, max 1,000,000)
+        as_dataset: Return a dataset handle instead of inline logs (default: only for large fetches)
     """
     logger.info(f"Tool called: get_raw_logs(incident_id={incident_id}, timeframe={timeframe}, service_filter={service_filter})")
     
-    log_entries = []
-    
-    # Generate 1200 log entries with realistic patterns
-    for i in range(1200):
-        timestamp = datetime.now() - timedelta(minutes=i)
-        
-        # Create realistic log patterns
-        if i % 40 == 0:  # Authentication timeout errors (~3%)
-            entry = {
-                "timestamp": timestamp.isoformat(),
-                "level": "ERROR",
-                "service": "auth-service",
-                "message": "Authentication failed: token validation timeout",
-                "user_id": f"user_{1000 + (i % 500)}",
-                "endpoint": "/api/v1/login",
-                "response_time_ms": 5000 + (i % 1000),
-                "error_code": "AUTH_TIMEOUT",
-                "stack_trace": "TimeoutError: Token validation exceeded 5s limit"
-            }
-        
-        elif i % 80 == 0:  # Session store Redis errors (~1.25%)
-            entry = {
-                "timestamp": timestamp.isoformat(),
-                "level": "ERROR",
-                "service": "session-store",
-                "message": "Redis connection failed: ETIMEDOUT",
-                "endpoint": "/api/v1/session/validate",
-                "response_time_ms": 3000 + (i % 500),
-                "error_code": "REDIS_TIMEOUT",
-                "redis_host": "redis-cluster-01.internal",
-                "stack_trace": "ConnectionError: Redis connection pool exhausted"
-            }
-        
-        elif i % 150 == 0:  # Database connection pool errors (~0.67%)
-            entry = {
-                "timestamp": timestamp.isoformat(),
-                "level": "ERROR",
-                "service": "api-gateway",
-                "message": "Database query timeout: connection pool exhausted",
-                "endpoint": "/api/v1/users/profile",
-                "response_time_ms": 10000,
-                "error_code": "DB_POOL_EXHAUSTED",
-                "db_pool_size": 100,
-                "db_active_connections": 100
-            }
-        
-        elif i % 200 == 0:  # Payment gateway errors (~0.5%)
-            entry = {
-                "timestamp": timestamp.isoformat(),
-                "level": "ERROR",
-                "service": "payment-service",
-                "message": "Payment processing failed: gateway timeout",
-                "endpoint": "/api/v1/payments/process",
-                "response_time_ms": 15000,
-                "error_code": "PAYMENT_GATEWAY_TIMEOUT",
-                "amount_usd": 99.99,
-                "payment_provider": "stripe"
-            }
-        
-        elif i % 10 == 0:  # Slow requests (10%)
-            entry = {
-                "timestamp": timestamp.isoformat(),
-                "level": "WARN",
-                "service": "api-gateway",
-                "message": "Request processing slow",
-                "endpoint": "/api/v1/users",
-                "response_time_ms": 800 + (i % 200),
-                "user_id": f"user_{i % 1000}"
-            }
-        
-        else:  # Normal traffic (majority)
-            endpoints = [
-                "/api/v1/users",
-                "/api/v1/products",
-                "/api/v1/orders",
-                "/api/v1/search",
-                "/api/v1/recommendations"
-            ]
-            services = ["api-gateway", "product-service", "user-service", "search-service"]
-            
-            entry = {
-                "timestamp": timestamp.isoformat(),
-                "level": "INFO",
-                "service": services[i % len(services)],
-                "message": "Request processed successfully",
-                "endpoint": endpoints[i % len(endpoints)],
-                "response_time_ms": 50 + (i % 100),
-                "user_id": f"user_{i % 1000}",
-                "status_code": 200
-            }
-        
-        log_entries.append(entry)
-    
+    try:
+        window = parse_duration(timeframe)
+    except ValueError as e:
+        return f"Error: {e}"
+
+    entry_count = max(1, min(entry_count, MAX_LOG_ENTRIES))
+    end = time.time() // LOG_WINDOW_ALIGN_SECONDS * LOG_WINDOW_ALIGN_SECONDS
+    config = _incident_log_config(incident_id, window)
+
+    def build():
+        batch = generate_logs(entry_count, end - window, end, config)
+        if service_filter != "all":
+            batch = batch.select(batch.service_mask(service_filter))
+        return batch.to_records(newest_first=True), batch.level_counts()
+
+    log_entries, levels = await asyncio.to_thread(build)
+
     # Calculate summary stats
-    error_count = len([e for e in log_entries if e["level"] == "ERROR"])
-    warn_count = len([e for e in log_entries if e["level"] == "WARN"])
+    error_count = levels["ERROR"]
+    warn_count = levels["WARN"]
     
     result = {
         "incident_id": incident_id,
@@ -140,7 +178,7 @@ async def get_raw_logs(
             "errors": error_count,
             "warnings": warn_count,
             "info": len(log_entries) - error_count - warn_count,
-            "error_rate_percent": round((error_count / len(log_entries)) * 100, 2)
+            "error_rate_percent": round((error_count / len(log_entries)) * 100, 2) if log_entries else 0.0
         },
         "logs": log_entries,
         "metadata": {
@@ -148,59 +186,712 @@ async def get_raw_logs(
             "note": "This is RAW log data. Generate Python code to analyze patterns, count errors, detect anomalies, and extract insights."
         }
     }
+
+    if as_dataset or (as_dataset is None and len(log_entries) > INLINE_LOG_ENTRIES):
+        # Datasets are content-addressed: keep fetched_at out of the stored data
+        stored = {**result, "metadata": {"note": result["metadata"]["note"]}}
+        info = await asyncio.to_thread(
+            dataset_store.put, stored, "logs", result["summary"], f"get_raw_logs:{incident_id}"
+        )
+        return json.dumps({
+            "incident_id": incident_id,
+            "timeframe": timeframe,
+            "service_filter": service_filter,
+            "total_entries": len(log_entries),
+            "summary": result["summary"],
+            "dataset": dataset_store.handle(info),
+            "sample": log_entries[:DATASET_SAMPLE_ROWS],
+            "metadata": {
+                "fetched_at": result["metadata"]["fetched_at"],
+                "note": "Logs are stored server-side. Pass dataset_id to execute_analysis_script (the script receives "
+                        "the data file path as sys.argv[1] / $LOG_DATA_PATH), aggregate_logs, mine_log_templates or "
+                        "archive_logs instead of writing the logs to a file."
+            }
+        }, indent=2)
+    
+    return json.dumps(result, indent=2)
+
+
+@mcp_server.tool()
+@tool_metrics.instrument
+async def generate_log_dataset(
+    dataset_name: str,
+    rows: int = 1_000_000,
+    timeframe: str = "24h",
+    seed: Optional[int] = None,
+    incident_service: str = "auth-service"
+) -> str:
+    """
+    Generate a large synthetic log dataset and save it as a compressed
+    columnar file (analytics/datasets/<name>.npz) for replay and load
+    testing. Millions of rows take seconds; use get_raw_logs for JSON.
+    
+    Args:
+        dataset_name: File name (letters, digits, '.', '_' and '-')
+        rows: Number of log rows (max 50,000,000)
+        timeframe: Time range covered (e.g., '1h', '24h', '7d')
+        seed: RNG seed for reproducible data (default: derived from the name)
+        incident_service: Service with an injected incident ('none' for no incident)
+    """
+    logger.info(f"Tool called: generate_log_dataset(dataset_name={dataset_name}, rows={rows}, timeframe={timeframe})")
+
+    if not _safe_name(dataset_name):
+        return f"Error: Invalid dataset name: {dataset_name}"
+    if not 1 <= rows <= MAX_DATASET_ROWS:
+        return f"Error: rows must be between 1 and {MAX_DATASET_ROWS:,}"
+    try:
+        window = parse_duration(timeframe)
+    except ValueError as e:
+        return f"Error: {e}"
+
+    config = _incident_log_config(
+        dataset_name, window, seed=seed,
+        incident_service=None if incident_service == "none" else incident_service
+    )
+
+    def build():
+        started = time.perf_counter()
+        end = time.time()
+        batch = generate_logs(rows, end - window, end, config)
+        generated = time.perf_counter() - started
+        path = write_columnar(batch, DATASET_DIR / dataset_name)
+        return batch, path, generated, time.perf_counter() - started - generated
+
+    try:
+        batch, path, generate_seconds, write_seconds = await asyncio.to_thread(build)
+    except ValueError as e:
+        return f"Error: {e}"
+
+    result = {
+        "dataset": dataset_name,
+        "path": str(path),
+        "rows": len(batch),
+        "timeframe": timeframe,
+        "seed": config.seed,
+        "levels": batch.level_counts(),
+        "file_size_bytes": path.stat().st_size,
+        "generate_seconds": round(generate_seconds, 3),
+        "write_seconds": round(write_seconds, 3),
+        "rows_per_second": int(len(batch) / generate_seconds) if generate_seconds else None
+    }
+
+    return json.dumps(result, indent=2)
+
+
+def _analytics_path(path: str) -> Optional[Path]:
+    """Existing file under analytics/ (relative to the project root), or None"""
+    resolved = Path(path)
+    if not resolved.is_absolute():
+        resolved = ANALYTICS_DIR.parent / resolved
+    resolved = resolved.resolve()
+    if not resolved.is_relative_to(ANALYTICS_DIR.resolve()) or not resolved.is_file():
+        return None
+    return resolved
+
+
+def _oldest_first(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return sorted(rows, key=lambda row: to_epoch(row["timestamp"]))
+
+
+def _load_log_file(path: Path) -> List[Dict[str, Any]]:
+    """Log rows from a JSON file (get_raw_logs output or a plain list), oldest first"""
+    data = json.loads(path.read_text())
+    rows = data["logs"] if isinstance(data, dict) else data
+    return _oldest_first(rows)
+
+
+@mcp_server.tool()
+@tool_metrics.instrument
+async def archive_logs(
+    archive_name: str,
+    incident_id: str = "",
+    timeframe: str = "1h",
+    entry_count: int = DEFAULT_LOG_ENTRIES,
+    source_path: str = "",
+    dataset_id: str = ""
+) -> str:
+    """
+    Append logs to a compressed, block-indexed archive
+    (analytics/archives/<name>.logz), creating it if needed. Query it with
+    query_log_archive, which only decompresses blocks matching the time
+    window/service.
+    
+    Without source_path/dataset_id, fetches the incident's logs: the
+    timeframe for a new archive, then everything since the archive's newest
+    row on each later call (streaming append during a live incident, at the
+    same rate of entry_count per timeframe).
+    
+    Args:
+        archive_name: Archive name (letters, digits, '.', '_' and '-')
+        incident_id: Incident ID to fetch logs for (when no source_path)
+        timeframe: Time range for a new archive (e.g., '1h', '24h')
+        entry_count: Number of entries per timeframe (max 1,000,000)
+        source_path: JSON log file under analytics/ to import instead
+        dataset_id: Dataset (from get_raw_logs) to import instead
+    """
+    logger.info(f"Tool called: archive_logs(archive_name={archive_name}, incident_id={incident_id}, source_path={source_path}, dataset_id={dataset_id})")
+
+    if not _safe_name(archive_name):
+        return f"Error: Invalid archive name: {archive_name}"
+    path = ARCHIVE_DIR / f"{archive_name}.logz"
+
+    if dataset_id:
+        pass
+    elif source_path:
+        source = _analytics_path(source_path)
+        if source is None:
+            return f"Error: source_path must be an existing file under analytics/: {source_path}"
+    elif not incident_id:
+        return "Error: Provide incident_id, source_path or dataset_id"
+    else:
+        try:
+            window = parse_duration(timeframe)
+        except ValueError as e:
+            return f"Error: {e}"
+
+    def append():
+        with _archive_lock(path), LogArchiveWriter(path) as writer:
+            if dataset_id:
+                rows = _oldest_first(dataset_store.rows(dataset_id))
+            elif source_path:
+                rows = _load_log_file(source)
+            else:
+                end = time.time()
+                start = writer.max_ts if writer.max_ts is not None else end - window
+                if start >= end:
+                    return 0
+                # Same rate and incident placement as the initial fetch: the
+                # incident sits at the end of the timeframe, so appends continue it
+                rate = max(1, min(entry_count, MAX_LOG_ENTRIES)) / window
+                count = min(round(rate * (end - start)), MAX_LOG_ENTRIES)
+                if count < 1:
+                    return 0
+                config = _incident_log_config(incident_id, window, seed=stable_seed(f"{incident_id}@{start:.6f}"))
+                batch = generate_logs(count, start, end, config)
+                rows = batch.select(batch["ts"] > start).to_records(newest_first=False)
+            writer.extend(rows)
+            return len(rows)
+
+    try:
+        appended = await asyncio.to_thread(append)
+        summary = LogArchive(path).summary()
+    except (OSError, ValueError, KeyError, RuntimeError) as e:
+        return f"Error: {e}"
+
+    return json.dumps({
+        "archive": archive_name,
+        "path": str(path),
+        "appended_rows": appended,
+        "summary": summary
+    }, indent=2)
+
+
+@mcp_server.tool()
+@tool_metrics.instrument
+async def query_log_archive(
+    archive_name: str,
+    start: str = "",
+    end: str = "",
+    last: str = "",
+    service_filter: str = "all",
+    level: str = "all",
+    limit: int = 1000
+) -> str:
+    """
+    Query a log archive written by archive_logs. Only blocks whose index
+    (time range, services, levels) can match are decompressed, so narrow
+    time/service queries on large archives are fast.
     
+    Args:
+        archive_name: Archive name
+        start: Earliest timestamp (ISO-8601, e.g. '2025-01-15T14:00:00')
+        end: Latest timestamp (ISO-8601)
+        last: Only the final duration of the archive (e.g. '15m'), instead of start
+        service_filter: Service name filter ('all' for every service)
+        level: Log level filter (INFO, WARN, ERROR or 'all')
+        limit: Maximum rows returned (max 10,000)
+    """
+    logger.info(f"Tool called: query_log_archive(archive_name={archive_name}, start={start}, end={end}, last={last}, service_filter={service_filter}, level={level})")
+
+    if not _safe_name(archive_name):
+        return f"Error: Invalid archive name: {archive_name}"
+    path = ARCHIVE_DIR / f"{archive_name}.logz"
+    if not path.exists():
+        return f"Error: Archive not found: {archive_name}"
+
+    def run_query():
+        archive = LogArchive(path)
+        start_ts = to_epoch(start) if start else None
+        if last:
+            newest = max((block.max_ts for block in archive.index.blocks), default=time.time())
+            start_ts = newest - parse_duration(last)
+        result = archive.query(
+            start=start_ts,
+            end=to_epoch(end) if end else None,
+            services=None if service_filter == "all" else [service_filter],
+            levels=None if level == "all" else [level.upper()],
+            limit=max(1, min(limit, MAX_ARCHIVE_QUERY_ROWS))
+        )
+        return archive, result
+
+    try:
+        archive, result = await asyncio.to_thread(run_query)
+    except (OSError, ValueError, RuntimeError) as e:
+        return f"Error: {e}"
+
+    return json.dumps({
+        "archive": archive_name,
+        "matches": len(result.records),
+        "truncated": result.truncated,
+        "scan": {
+            "blocks_read": result.blocks_read,
+            "blocks_total": result.blocks_total,
+            "rows_scanned": result.rows_scanned,
+            "archive_rows": archive.rows
+        },
+        "logs": result.records
+    }, indent=2)
+
+
+@mcp_server.tool()
+@tool_metrics.instrument
+async def aggregate_logs(
+    archive_name: str = "",
+    dataset_id: str = "",
+    start: str = "",
+    end: str = "",
+    last: str = "",
+    service_filter: str = "all",
+    partition_by: str = "time",
+    workers: int = 0
+) -> str:
+    """
+    Aggregate a log archive in parallel across CPU cores: level/service/
+    endpoint/error-code counts, per-service error rates and latency
+    percentiles, and the peak error minutes. Much faster than a generated
+    script for large archives; use it before writing custom analysis.
+    
+    Reads an archive (split across worker processes) or a dataset from
+    get_raw_logs (aggregated in-process, it is already in memory).
+    
+    Args:
+        archive_name: Archive name (from archive_logs)
+        dataset_id: Dataset ID (from get_raw_logs), instead of an archive
+        start: Earliest timestamp (ISO-8601)
+        end: Latest timestamp (ISO-8601)
+        last: Only the final duration of the archive (e.g. '15m'), instead of start
+        service_filter: Service name filter ('all' for every service)
+        partition_by: Split work by 'time' range or by 'service'
+        workers: Worker processes (0 = one per CPU core)
+    """
+    logger.info(f"Tool called: aggregate_logs(archive_name={archive_name}, dataset_id={dataset_id}, start={start}, end={end}, last={last}, service_filter={service_filter}, partition_by={partition_by}, workers={workers})")
+
+    if bool(archive_name) == bool(dataset_id):
+        return "Error: Provide exactly one of archive_name or dataset_id"
+    if partition_by not in PARTITION_MODES:
+        return f"Error: partition_by must be one of: {', '.join(PARTITION_MODES)}"
+
+    def aggregate_dataset():
+        started = time.perf_counter()
+        rows = dataset_store.rows(dataset_id)
+        start_ts = to_epoch(start) if start else None
+        if last:
+            newest = max((to_epoch(row["timestamp"]) for row in rows), default=time.time())
+            start_ts = newest - parse_duration(last)
+        aggregate = aggregate_rows(
+            rows,
+            start=start_ts,
+            end=to_epoch(end) if end else None,
+            services=None if service_filter == "all" else [service_filter]
+        )
+        return {
+            "aggregate": aggregate.to_dict(),
+            "execution": {"workers": 1, "elapsed_seconds": round(time.perf_counter() - started, 3)}
+        }
+
+    if dataset_id:
+        try:
+            result = await asyncio.to_thread(aggregate_dataset)
+        except (KeyError, ValueError) as e:
+            return f"Error: {e}"
+        result["dataset_id"] = dataset_id
+        return json.dumps(result, indent=2)
+
+    if not _safe_name(archive_name):
+        return f"Error: Invalid archive name: {archive_name}"
+    path = ARCHIVE_DIR / f"{archive_name}.logz"
+    if not path.exists():
+        return f"Error: Archive not found: {archive_name}"
+
+    def run_aggregation():
+        start_ts = to_epoch(start) if start else None
+        if last:
+            blocks = LogArchive(path).index.blocks
+            start_ts = max((block.max_ts for block in blocks), default=time.time()) - parse_duration(last)
+        return aggregate_archive(
+            path,
+            start=start_ts,
+            end=to_epoch(end) if end else None,
+            services=None if service_filter == "all" else [service_filter],
+            partition_by=partition_by,
+            workers=workers or None
+        )
+
+    try:
+        result = await asyncio.to_thread(run_aggregation)
+    except (OSError, ValueError, RuntimeError) as e:
+        return f"Error: {e}"
+
+    result["archive"] = archive_name
     return json.dumps(result, indent=2)
 
 
 @mcp_server.tool()
+@tool_metrics.instrument
+async def mine_log_templates(
+    archive_name: str = "",
+    incident_id: str = "",
+    source_path: str = "",
+    dataset_id: str = "",
+    service_filter: str = "all",
+    level: str = "ERROR",
+    fields: str = "message,stack_trace",
+    top: int = 20,
+    reset: bool = False
+) -> str:
+    """
+    Cluster free-text log messages into templates (e.g. "Redis connection
+    to <*> failed after <*>ms") with counts and example row IDs, in one
+    pass. Use it to find error types when error_code is missing or too
+    coarse. Templates are learned per service and refined across calls.
+    
+    Reads one source: an archive (archive_name), a JSON log file under
+    analytics/ (source_path), a dataset from get_raw_logs (dataset_id), or
+    the incident's logs (incident_id).
+    
+    Args:
+        archive_name: Archive to mine (from archive_logs)
+        incident_id: Incident whose logs to fetch and mine
+        source_path: JSON log file under analytics/
+        dataset_id: Dataset ID (from get_raw_logs)
+        service_filter: Service name filter ('all' for every service)
+        level: Log level to mine (INFO, WARN, ERROR or 'all')
+        fields: Comma-separated text fields to mine
+        top: Templates returned per service
+        reset: Forget previously learned templates first
+    """
+    logger.info(f"Tool called: mine_log_templates(archive_name={archive_name}, incident_id={incident_id}, source_path={source_path}, dataset_id={dataset_id}, service_filter={service_filter}, level={level})")
+
+    if sum(bool(source) for source in (archive_name, incident_id, source_path, dataset_id)) != 1:
+        return "Error: Provide exactly one of archive_name, incident_id, source_path or dataset_id"
+
+    services = None if service_filter == "all" else [service_filter]
+    levels = None if level == "all" else [level.upper()]
+    text_fields = tuple(f.strip() for f in fields.split(",") if f.strip())
+    if not text_fields:
+        return "Error: fields must name at least one field"
+
+    if archive_name:
+        if not _safe_name(archive_name):
+            return f"Error: Invalid archive name: {archive_name}"
+        path = ARCHIVE_DIR / f"{archive_name}.logz"
+        if not path.exists():
+            return f"Error: Archive not found: {archive_name}"
+    elif source_path:
+        source = _analytics_path(source_path)
+        if source is None:
+            return f"Error: source_path must be an existing file under analytics/: {source_path}"
+
+    def source_rows():
+        if archive_name:
+            archive = LogArchive(path)
+            blocks = archive.candidate_blocks(None, None, services, levels)
+            return iter_block_rows(path, blocks)
+        if source_path:
+            return _load_log_file(source)
+        if dataset_id:
+            return _oldest_first(dataset_store.rows(dataset_id))
+        end = time.time()
+        window = parse_duration("1h")
+        batch = generate_logs(DEFAULT_LOG_ENTRIES, end - window, end, _incident_log_config(incident_id, window))
+        return batch.to_records(newest_first=False)
+
+    def mine():
+        rows = (
+            row for row in source_rows()
+            if (services is None or row.get("service") in services)
+            and (levels is None or row.get("level") in levels)
+        )
+        with template_lock:
+            if reset:
+                template_cache.clear()
+            counts = template_cache.mine(rows, text_fields)
+            report = {}
+            for service, matches in sorted(counts.items()):
+                miner = template_cache.get(service)
+                learned = {cluster.cluster_id: cluster for cluster, _ in miner.clusters.values()}
+                templates = []
+                for cluster_id, count in sorted(matches.items(), key=lambda item: (-item[1], item[0]))[:max(1, top)]:
+                    cluster = learned.get(cluster_id)
+                    if cluster is None:  # evicted later in this pass
+                        continue
+                    templates.append({
+                        "template_id": cluster_id,
+                        "template": cluster.template,
+                        "count": count,
+                        "total_learned": cluster.count,
+                        "example_ids": cluster.examples,
+                        "first_seen": cluster.first_seen,
+                        "last_seen": cluster.last_seen
+                    })
+                report[service] = {
+                    "rows_mined": sum(matches.values()),
+                    "templates_matched": len(matches),
+                    "templates_learned": len(miner.clusters),
+                    "templates": templates
+                }
+            return report
+
+    try:
+        report = await asyncio.to_thread(mine)
+    except (OSError, ValueError, KeyError, RuntimeError) as e:
+        return f"Error: {e}"
+
+    return json.dumps({
+        "source": archive_name or source_path or dataset_id or incident_id,
+        "level": level,
+        "fields": list(text_fields),
+        "services": report,
+        "note": "example_ids are positions of the first matching rows in the mined (filtered) stream of the call that learned them"
+    }, indent=2)
+
+
+async def _read_stream(stream: asyncio.StreamReader, chunks: List[str],
+                       on_text: Optional[Callable[[str], Awaitable[None]]] = None) -> None:
+    """Decode a child pipe into `chunks` as data arrives (kept if the read is cancelled)"""
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    while True:
+        data = await stream.read(65536)
+        text = decoder.decode(data, final=not data)
+        if text:
+            chunks.append(text)
+            if on_text is not None:
+                await on_text(text)
+        if not data:
+            return
+
+
+class _OutputProgress:
+    """Forwards new script output as MCP progress notifications (elapsed / timeout)"""
+
+    def __init__(self, ctx: Optional[Context], started: float):
+        self.ctx = ctx
+        self.started = started
+        self.pending = ""
+        self.last_sent = 0.0
+        self.notifications = 0
+
+    async def feed(self, text: str) -> None:
+        self.pending += text
+        if time.perf_counter() - self.last_sent >= PROGRESS_INTERVAL_SECONDS:
+            await self.flush()
+
+    async def flush(self) -> None:
+        message = self.pending.strip()
+        self.pending = ""
+        if not message:
+            return
+        self.last_sent = time.perf_counter()
+        logger.info(f"Analysis output: {message[-200:]}")
+        if self.ctx is None:
+            return
+        try:
+            await self.ctx.report_progress(
+                min(self.last_sent - self.started, ANALYSIS_TIMEOUT_SECONDS),
+                ANALYSIS_TIMEOUT_SECONDS,
+                message[-PROGRESS_MESSAGE_CHARS:]
+            )
+            self.notifications += 1
+        except Exception as e:
+            # Progress is best-effort; never fail the script over it
+            logger.debug(f"Progress notification failed: {e}")
+
+
+async def _run_analysis(command: List[str], env: Dict[str, str],
+                        ctx: Optional[Context]) -> Tuple[Optional[int], str, str, float, int]:
+    """
+    Run an analysis script, streaming its stdout as progress.
+
+    Returns:
+        (exit code or None on timeout, stdout, stderr, duration ms, progress notifications sent)
+    """
+    started = time.perf_counter()
+    progress = _OutputProgress(ctx, started)
+    process = await asyncio.create_subprocess_exec(
+        *command,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+        env=env
+    )
+    stdout: List[str] = []
+    stderr: List[str] = []
+    returncode = None
+    try:
+        await asyncio.wait_for(asyncio.gather(
+            _read_stream(process.stdout, stdout, progress.feed),
+            _read_stream(process.stderr, stderr),
+            process.wait()
+        ), ANALYSIS_TIMEOUT_SECONDS)
+        returncode = process.returncode
+    except asyncio.TimeoutError:
+        pass
+    finally:
+        # Timeout or tool cancellation: stop the script but keep what it printed
+        if process.returncode is None:
+            process.kill()
+            await process.wait()
+    if returncode is None:
+        try:
+            await asyncio.wait_for(asyncio.gather(
+                _read_stream(process.stdout, stdout),
+                _read_stream(process.stderr, stderr)
+            ), 1)
+        except asyncio.TimeoutError:
+            pass
+    await progress.flush()
+    duration_ms = round((time.perf_counter() - started) * 1000, 1)
+    return returncode, "".join(stdout), "".join(stderr), duration_ms, progress.notifications
+
+
+@mcp_server.tool()
+@tool_metrics.instrument
 async def execute_analysis_script(
     script_path: str,
-    log_data_path: str = "analytics/incident_logs.json"
+    log_data_path: str = "analytics/incident_logs.json",
+    dataset_id: str = "",
+    use_cache: bool = True,
+    ctx: Optional[Context] = None
 ) -> str:
     """
     Execute a Python analysis script against log data.
     
-    Runs the generated analysis code and returns results.
+    Runs the generated analysis code and returns results. The script
+    receives the log data file path as sys.argv[1] and in the
+    LOG_DATA_PATH environment variable.
+    
+    Output is streamed while the script runs: new stdout lines are sent as
+    progress notifications, so findings from long analyses show up before
+    the script exits. On timeout the script is stopped and the output it
+    produced so far is returned ("status": "timeout").
+    
+    Successful runs are memoized by the hash of the script (ignoring
+    comments and formatting) and of the input data: running the same
+    analysis on the same data again returns the stored output instantly
+    ("cache": {"hit": true}).
     
     Args:
         script_path: Path to the Python script to execute
         log_data_path: Path to JSON file containing log data
+        dataset_id: Dataset ID (from get_raw_logs) to analyze instead of log_data_path
+        use_cache: Reuse a stored result for identical script and data (default: true)
     """
-    logger.info(f"Tool called: execute_analysis_script(script_path={script_path}, log_data_path={log_data_path})")
+    logger.info(f"Tool called: execute_analysis_script(script_path={script_path}, log_data_path={log_data_path}, dataset_id={dataset_id}, use_cache={use_cache})")
+    
+    if dataset_id:
+        try:
+            log_data_path = str(dataset_store.path(dataset_id))
+        except KeyError as e:
+            return f"Error: {e.args[0]}"
     
     try:
-        # Execute the script
-        result = subprocess.run(
-            [sys.executable, script_path],
-            capture_output=True,
-            text=True,
-            timeout=30
+        source = Path(script_path).read_bytes()
+    except OSError as e:
+        return json.dumps({
+            "status": "error",
+            "error": str(e),
+            "script": script_path
+        }, indent=2)
+    
+    try:
+        data_file = Path(log_data_path)
+        
+        def lookup():
+            # Dataset IDs are already content hashes; data files can be large
+            data_hash = dataset_id or (exec_cache.file_digest(data_file) if data_file.is_file() else "missing")
+            cache_key = exec_cache.key(normalized_script_hash(source), data_hash)
+            return cache_key, exec_cache.get(cache_key) if use_cache else None
+        
+        cache_key, cached = await asyncio.to_thread(lookup)
+        if cached is not None:
+            return json.dumps({
+                "status": "success",
+                "script": script_path,
+                "output": cached["stdout"],
+                "stderr": cached["stderr"] or None,
+                "exit_code": cached["exit_code"],
+                "duration_ms": cached["duration_ms"],
+                "execution_time": "0s (cached)",
+                "cache": {
+                    "hit": True,
+                    "key": cache_key,
+                    "cached_at": datetime.fromtimestamp(cached["cached_at"]).isoformat(),
+                    "totals": exec_cache.stats()
+                }
+            }, indent=2)
+        
+        # Execute the script (from its cached bytecode when it compiles)
+        command = await asyncio.to_thread(exec_cache.command, Path(script_path), source, [log_data_path])
+        returncode, stdout, stderr, duration_ms, notifications = await _run_analysis(
+            command,
+            # Unbuffered, so the script's prints reach the pipe as they happen
+            {**os.environ, "LOG_DATA_PATH": log_data_path, "PYTHONUNBUFFERED": "1"},
+            ctx
         )
+        cache_info = {"hit": False, "key": cache_key, "stored": False}
         
-        if result.returncode == 0:
+        if returncode == 0:
+            if use_cache:
+                await asyncio.to_thread(exec_cache.put, cache_key, {
+                    "stdout": stdout,
+                    "stderr": stderr,
+                    "exit_code": returncode,
+                    "duration_ms": duration_ms,
+                    "script": script_path
+                })
+                cache_info["stored"] = True
+            cache_info["totals"] = exec_cache.stats()
             output = {
                 "status": "success",
                 "script": script_path,
-                "output": result.stdout,
-                "execution_time": "< 30s"
+                "output": stdout,
+                "duration_ms": duration_ms,
+                "execution_time": f"{duration_ms / 1000:.2f}s",
+                "progress_notifications": notifications,
+                "cache": cache_info
+            }
+        elif returncode is None:
+            output = {
+                "status": "timeout",
+                "script": script_path,
+                "error": f"Script execution timeout ({ANALYSIS_TIMEOUT_SECONDS}s limit); partial output returned",
+                "output": stdout,
+                "stderr": stderr or None,
+                "duration_ms": duration_ms,
+                "progress_notifications": notifications
             }
         else:
             output = {
                 "status": "error",
                 "script": script_path,
-                "error": result.stderr,
-                "exit_code": result.returncode
+                "output": stdout or None,
+                "error": stderr,
+                "exit_code": returncode,
+                "duration_ms": duration_ms,
+                "cache": cache_info
             }
         
         return json.dumps(output, indent=2)
     
-    except subprocess.TimeoutExpired:
-        return json.dumps({
-            "status": "error",
-            "error": "Script execution timeout (30s limit)",
-            "script": script_path
-        }, indent=2)
-    
     except Exception as e:
         return json.dumps({
             "status": "error",
@@ -208,7 +899,6 @@ async def execute_analysis_script(
             "script": script_path
         }, indent=2)
 
-
 if __name__ == "__main__":
     logger.info("Starting Log Analytics MCP Server on port 9003...")
     mcp_server.run(transport="streamable-http")
@@ -2,11 +2,29 @@
 """Monitoring & Analysis MCP Server - Streamable HTTP transport on port 9001."""
 
 import asyncio
-from mcp.server.fastmcp import FastMCP
-from typing import Any, Optional
+import copy
+from mcp.server.fastmcp import Context, FastMCP
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
 import json
 import logging
+import math
+import random
+import sys
+import threading
+import time
+import weakref
 from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+from server_utils.anomaly import AnomalyMonitor
+from server_utils.dataset_store import get_dataset_store
+from server_utils.health import HealthChecker, HealthProbe
+from server_utils.instrumentation import ToolMetrics, install_metrics_endpoints
+from server_utils.timeline import ErrorHistogram, EventTimeline, TimelineEvent, correlate_changes
+from server_utils.timeseries import MetricsStore, parse_duration
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -15,134 +33,881 @@ logger = logging.getLogger(__name__)
 mcp_server = FastMCP("monitoring-analysis", host="127.0.0.1", port=9001)
 
 
+@mcp_server.custom_route("/health", methods=["GET"])
+async def health(request: Request) -> JSONResponse:
+    """Liveness endpoint used by start-servers.sh and the multi-server host"""
+    return JSONResponse({"status": "ok", "server": mcp_server.name})
+
+
+# Per-tool call counts/latency/sizes, served on /metrics and via get_server_stats
+tool_metrics = ToolMetrics(mcp_server.name)
+install_metrics_endpoints(mcp_server, tool_metrics)
+
+# Large results by reference (shared with the other servers via the spill directory)
+dataset_store = get_dataset_store()
+
+
+# Metric series ingested for every scenario
+CORE_METRICS = [
+    "api_response_time_ms",
+    "error_rate_percent",
+    "cpu_percent",
+    "memory_percent",
+    "database_connections"
+]
+DEPENDENCY_METRICS = [
+    "redis_latency_ms",
+    "payment_gateway_latency_ms"
+]
+DATABASE_MAX_CONNECTIONS = 100
+
+SAMPLE_INTERVAL_SECONDS = 10
+BACKFILL_SECONDS = 6 * 3600
+INCIDENT_ONSET_MINUTES = 23
+INCIDENT_RAMP_SECONDS = 600
+
+# Log lines per sample interval
+LOG_ENTRIES_PER_SAMPLE = 330
+
+# Error types: (baseline count per sample, count per sample at full incident)
+ERROR_TYPE_RATES = {
+    "connection_leak": {
+        "connection_timeout": (0.01, 9.0),
+        "slow_query": (0.15, 0.3),
+        "rate_limit": (0.04, 0.04),
+        "auth_timeout": (0.02, 0.02),
+        "gateway_timeout": (0.01, 0.01)
+    },
+    "baseline": {
+        "connection_timeout": (0.01, 0.01),
+        "slow_query": (0.15, 0.15),
+        "rate_limit": (0.04, 0.04),
+        "auth_timeout": (0.02, 0.02),
+        "gateway_timeout": (0.01, 0.01)
+    }
+}
+
+# Where each error type surfaces and what it looks like in the logs
+ERROR_TYPE_DETAILS = {
+    "connection_timeout": {
+        "service": "UserProfileService",
+        "message": "Database connection timeout after 30s"
+    },
+    "slow_query": {
+        "service": "UserProfileService",
+        "message": "Query exceeded 2s slow-query threshold"
+    },
+    "rate_limit": {
+        "service": "api-gateway",
+        "message": "Client rate limit exceeded"
+    },
+    "auth_timeout": {
+        "service": "auth-service",
+        "message": "Authentication failed: token validation timeout"
+    },
+    "gateway_timeout": {
+        "service": "payment-service",
+        "message": "Payment processing failed: gateway timeout"
+    }
+}
+
+# Change history retained for correlation
+TIMELINE_HISTORY_SECONDS = 14 * 86400
+ERROR_HISTOGRAM_BUCKET_SECONDS = 60
+DEPLOY_INTERVAL_HOURS = (6, 14)
+# Release number (230 = v2.3.0) of each service's newest seeded deployment; older
+# ones count down from it. The ranges (at most ~56 deployments each) never
+# overlap, so a version names one deployment. UserProfileService's next
+# release is the incident's v2.3.1
+SEEDED_LATEST_RELEASES = {
+    "UserProfileService": 230,
+    "api-gateway": 410,
+    "auth-service": 960,
+    "payment-service": 750
+}
+
+# Known code-review findings attached to specific releases
+RELEASE_FINDINGS = {
+    ("UserProfileService", "v2.3.1"): {
+        "file": "services/user_profile.py",
+        "line": 234,
+        "problem": "Missing connection.close() in error handling path"
+    }
+}
+
+# Error-count series are sparse integers; keep a floor on their scale
+ANOMALY_OVERRIDES = {
+    "errors.": {"min_sigma": 1.0},
+    "log_entries": {"min_sigma": 10.0}
+}
+
+
+def _poisson(rng: random.Random, lam: float) -> int:
+    """Poisson sample (Knuth for small rates, normal approximation above)"""
+    if lam > 30:
+        return max(int(round(rng.gauss(lam, math.sqrt(lam)))), 0)
+    threshold, k, p = math.exp(-lam), 0, 1.0
+    while True:
+        p *= rng.random()
+        if p <= threshold:
+            return k
+        k += 1
+
+
+class ScenarioFeed:
+    """
+    Simulated telemetry source for one incident scenario.
+
+    Backfills history when created and ingests samples up to "now" on every
+    access, so tools always query a live, continuous series.
+    """
+
+    def __init__(self, incident_type: str, now: Optional[float] = None):
+        now = time.time() if now is None else now
+        self.incident_type = incident_type
+        self.store = MetricsStore()
+        self.onset_ts = now - INCIDENT_ONSET_MINUTES * 60 if incident_type == "connection_leak" else None
+        self.remediated_ts: Optional[float] = None
+        self.health: Optional[HealthChecker] = None
+        # metric -> (latest value, baseline), read for the probes before each health run
+        self.health_readings: Dict[str, Tuple[float, Optional[float]]] = {}
+        self._rng = random.Random(incident_type)
+        self.error_rates = ERROR_TYPE_RATES.get(incident_type, ERROR_TYPE_RATES["baseline"])
+        self.anomalies = AnomalyMonitor(self.store, ANOMALY_OVERRIDES)
+        start = now - BACKFILL_SECONDS
+        self._next_ts = start - (start % SAMPLE_INTERVAL_SECONDS)
+        
+        self.timeline = EventTimeline()
+        self.error_histograms = {
+            details["service"]: ErrorHistogram(now - TIMELINE_HISTORY_SECONDS, ERROR_HISTOGRAM_BUCKET_SECONDS)
+            for details in ERROR_TYPE_DETAILS.values()
+        }
+        self._seed_history(now - TIMELINE_HISTORY_SECONDS, self._next_ts)
+        self.advance(now)
+
+    def _seed_history(self, start: float, end: float) -> None:
+        """Backfill deployments and baseline per-service errors before the metric history"""
+        rng = random.Random(f"{self.incident_type}-timeline")
+        
+        for service in self.error_histograms:
+            ts = start + rng.uniform(0, 3600 * DEPLOY_INTERVAL_HOURS[0])
+            deploys = []
+            while ts < end:
+                deploys.append((ts, ts + rng.uniform(60, 300)))
+                ts += 3600 * rng.uniform(*DEPLOY_INTERVAL_HOURS)
+            release = SEEDED_LATEST_RELEASES[service] - len(deploys)
+            for deploy_start, deploy_end in deploys:
+                release += 1
+                self.timeline.add(TimelineEvent(
+                    event_id=f"deploy-{service}-{int(deploy_start)}",
+                    kind="deployment",
+                    service=service,
+                    start_ts=deploy_start,
+                    end_ts=deploy_end,
+                    version=f"v{release // 100}.{release // 10 % 10}.{release % 10}"
+                ))
+        
+        # Per-minute baseline error counts (the live feed adds samples afterwards)
+        per_bucket = ERROR_HISTOGRAM_BUCKET_SECONDS / SAMPLE_INTERVAL_SECONDS
+        ts = start
+        while ts < end:
+            for error_type, (base_rate, _) in self.error_rates.items():
+                count = _poisson(rng, base_rate * per_bucket)
+                if count:
+                    self.error_histograms[ERROR_TYPE_DETAILS[error_type]["service"]].add(ts, count)
+            ts += ERROR_HISTOGRAM_BUCKET_SECONDS
+        
+        if self.onset_ts is not None:
+            # Changes around the incident: the culprit release and two distractors
+            onset = self.onset_ts
+            self.timeline.add(TimelineEvent(
+                "config-api-gateway-ratelimit", "config_change", "api-gateway",
+                onset - 2 * 3600, version="ratelimit-v14"
+            ))
+            self.timeline.add(TimelineEvent(
+                "flag-payment-retry", "feature_flag", "payment-service",
+                onset - 40 * 60, version="payment_retry_backoff=on"
+            ))
+            self.timeline.add(TimelineEvent(
+                "deploy-UserProfileService-v2.3.1", "deployment", "UserProfileService",
+                onset - 20, onset + 90, version="v2.3.1"
+            ))
+
+    def advance(self, now: Optional[float] = None) -> int:
+        """Ingest all samples due up to `now`; returns the number ingested"""
+        now = time.time() if now is None else now
+        ingested = 0
+        while self._next_ts <= now:
+            self.store.ingest(self._sample(self._next_ts), self._next_ts)
+            self._next_ts += SAMPLE_INTERVAL_SECONDS
+            ingested += 1
+        return ingested
+
+    def incident_progress(self, ts: float) -> float:
+        """0.0 before the incident onset (or after remediation), ramping to 1.0 once fully degraded"""
+        if self.onset_ts is None or ts < self.onset_ts:
+            return 0.0
+        if self.remediated_ts is not None and ts >= self.remediated_ts:
+            return 0.0
+        return min((ts - self.onset_ts) / INCIDENT_RAMP_SECONDS, 1.0)
+
+    def remediate(self, now: Optional[float] = None) -> bool:
+        """
+        Mark the incident as remediated and record a fresh sample immediately.
+
+        Returns:
+            True if this call changed the state (False if already remediated)
+        """
+        if self.remediated_ts is not None:
+            return False
+        now = time.time() if now is None else now
+        self.advance(now)
+        self.remediated_ts = now
+        self.store.ingest(self._sample(now), now)
+        if self.health is not None:
+            self.health.invalidate()
+        return True
+
+    def baseline(self, name: str, now: Optional[float] = None) -> Optional[float]:
+        """Median of a series over the hour-long window ending one hour ago (or before the incident)"""
+        series = self.store.series.get(name)
+        if series is None:
+            return None
+        now = time.time() if now is None else now
+        end = now - 3600
+        if self.onset_ts is not None:
+            end = min(end, self.onset_ts)
+        values = sorted(value for _, value in series.range(end - 3600, end))
+        return values[len(values) // 2] if values else None
+
+    def _sample(self, ts: float) -> Dict[str, float]:
+        gauss = self._rng.gauss
+        leak = self.incident_progress(ts)
+        # Gentle diurnal swing on CPU so history is not flat
+        diurnal = math.sin(2 * math.pi * (ts % 86400) / 86400)
+
+        sample = {
+            "api_response_time_ms": max(200 + 2100 * leak + gauss(0, 15), 1.0),
+            "error_rate_percent": max(0.1 + 8.4 * leak + gauss(0, 0.03), 0.0),
+            "cpu_percent": min(max(45 + 5 * diurnal + gauss(0, 2), 0.0), 100.0),
+            "memory_percent": min(max(65 + 13 * leak + gauss(0, 1), 0.0), 100.0),
+            "database_connections": min(max(round(50 + 45 * leak + gauss(0, 2)), 0), DATABASE_MAX_CONNECTIONS),
+            "log_entries": _poisson(self._rng, LOG_ENTRIES_PER_SAMPLE),
+            "redis_latency_ms": max(self._rng.lognormvariate(math.log(2.0), 0.3), 0.1),
+            "payment_gateway_latency_ms": max(self._rng.lognormvariate(math.log(180.0), 0.2), 1.0)
+        }
+        for error_type, (base_rate, incident_rate) in self.error_rates.items():
+            rate = base_rate + (incident_rate - base_rate) * leak
+            count = _poisson(self._rng, rate)
+            sample[f"errors.{error_type}"] = count
+            if count:
+                self.error_histograms[ERROR_TYPE_DETAILS[error_type]["service"]].add(ts, count)
+        return sample
+
+    def spike_onset(self) -> Optional[float]:
+        """Onset of the earliest active error anomaly (error rate or any error type)"""
+        self.anomalies.update()
+        names = ["error_rate_percent"] + self.store.names("errors.")
+        onsets = [a["onset_ts"] for a in self.anomalies.anomalies(names, include_resolved=False)]
+        return min(onsets, default=None)
+
+    def window_total(self, name: str, seconds: float, now: Optional[float] = None) -> float:
+        """Sum of a series over the trailing window"""
+        series = self.store.series.get(name)
+        if series is None:
+            return 0.0
+        now = time.time() if now is None else now
+        return sum(value for _, value in series.range(now - seconds, math.inf))
+
+
+# One feed per scenario, created on first use
+scenario_feeds: Dict[str, ScenarioFeed] = {}
+# Remediation is scoped to the MCP session that ran it: that session gets a
+# remediated copy of the scenario's feed (dropped with the session), while
+# every other investigation keeps seeing the live incident
+remediated_feeds: "weakref.WeakKeyDictionary[Any, Dict[str, ScenarioFeed]]" = weakref.WeakKeyDictionary()
+# Guards the feeds. Only taken in worker threads (asyncio.to_thread): a
+# collector may hold it for a while, and the event loop must never wait on it
+feed_lock = threading.Lock()
+
+
+def get_feed(incident_type: Optional[str] = None, session: Any = None) -> ScenarioFeed:
+    """
+    Return the (advanced) feed for a scenario, creating it on first use; hold feed_lock.
+    A session that remediated the scenario gets its remediated copy.
+    """
+    key = incident_type or "baseline"
+    feed = remediated_feeds.get(session, {}).get(key) if session is not None else None
+    if feed is None:
+        feed = scenario_feeds.get(key)
+    if feed is None:
+        feed = scenario_feeds[key] = ScenarioFeed(key)
+    else:
+        feed.advance()
+    return feed
+
+
+def _remediate(feed: ScenarioFeed, session: Any = None) -> ScenarioFeed:
+    """Remediated copy of a shared feed, kept for the session (without one, only for this call)"""
+    if feed.remediated_ts is not None:
+        return feed
+    remediated = copy.deepcopy(feed, {id(feed.health): None})
+    remediated.remediate()
+    if session is not None:
+        remediated_feeds.setdefault(session, {})[feed.incident_type] = remediated
+    return remediated
+
+
+def _session(ctx: Optional[Context]) -> Any:
+    """MCP session of a tool call (None for direct and in-process calls)"""
+    if ctx is None:
+        return None
+    try:
+        return ctx.session
+    except ValueError:
+        # Context outside a request (FastMCP.call_tool from the same process)
+        return None
+
+
+def _prepare_feed(incident_type: Optional[str] = None, session: Any = None) -> None:
+    with feed_lock:
+        get_feed(incident_type, session)
+
+
+def _describe_anomaly(anomaly: Dict[str, Any], now: float) -> Dict[str, Any]:
+    minutes_ago = max(int((now - anomaly["onset_ts"]) // 60), 0)
+    described = {
+        "series": anomaly["series"],
+        "type": anomaly["type"],
+        "direction": anomaly["direction"],
+        "active": anomaly["active"],
+        "onset": datetime.fromtimestamp(anomaly["onset_ts"]).isoformat(),
+        "started": f"{minutes_ago} minutes ago",
+        "detected": datetime.fromtimestamp(anomaly["detected_ts"]).isoformat(),
+        "baseline": round(anomaly["baseline_mean"], 2),
+        "current": round(anomaly["current_value"], 2),
+        "peak_z": round(anomaly["peak_z"], 1)
+    }
+    if "resolved_ts" in anomaly:
+        described["resolved"] = datetime.fromtimestamp(anomaly["resolved_ts"]).isoformat()
+        described["resolution"] = anomaly.get("resolution")
+    return described
+
+
+def _round_bucket(bucket: Dict[str, float]) -> Dict[str, Any]:
+    rounded = {k: round(v, 2) for k, v in bucket.items() if k not in ("ts", "count")}
+    rounded["ts"] = datetime.fromtimestamp(bucket["ts"]).isoformat()
+    rounded["count"] = bucket["count"]
+    return rounded
+
+
 @mcp_server.tool()
-async def get_system_metrics(incident_type: Optional[str] = None) -> str:
-    """Get current system metrics including API response time, error rate, CPU, memory, and database connections"""
-    logger.info(f"Tool called: get_system_metrics with incident_type={incident_type}")
+@tool_metrics.instrument
+async def get_system_metrics(
+    incident_type: Optional[str] = None,
+    window: Optional[str] = None,
+    resolution: str = "1m",
+    metrics: Optional[List[str]] = None,
+    as_dataset: bool = False,
+    ctx: Optional[Context] = None
+) -> str:
+    """
+    Get current system metrics including API response time, error rate, CPU, memory, and database connections.
+
+    Pass `window` (e.g. '2h') to also get downsampled history at `resolution`
+    (e.g. '1m') with min/max/avg/p50/p95/p99 per bucket. With as_dataset,
+    long histories are stored server-side and returned as a dataset_id
+    that log-analytics and workflow tools accept.
+
+    Args:
+        incident_type: Scenario to read metrics for (e.g. 'connection_leak')
+        window: Optional lookback for history (e.g. '30m', '2h', '24h')
+        resolution: History bucket width (e.g. '10s', '1m', '5m')
+        metrics: Optional subset of metric names for history (default: all)
+        as_dataset: Return the history as a dataset handle instead of inline
+    """
+    logger.info(f"Tool called: get_system_metrics with incident_type={incident_type}, window={window}, resolution={resolution}")
     
     try:
-        if incident_type == "connection_leak":
-            metrics = {
-                "api_response_time_ms": 2300,
-                "error_rate_percent": 8.5,
-                "cpu_percent": 45,
-                "memory_percent": 78,
-                "database_connections": 95,
-                "database_max_connections": 100,
-                "timestamp": datetime.now().isoformat(),
-                "status": "degraded"
-            }
-        else:
-            metrics = {
-                "api_response_time_ms": 200,
-                "error_rate_percent": 0.1,
-                "cpu_percent": 45,
-                "memory_percent": 65,
-                "database_connections": 50,
-                "database_max_connections": 100,
-                "timestamp": datetime.now().isoformat(),
-                "status": "healthy"
-            }
+        result = await asyncio.to_thread(_current_metrics, incident_type, window, resolution, metrics, _session(ctx))
+        if window and as_dataset:
+            summary = {name: len(buckets) for name, buckets in result["history"]["series"].items()}
+            info = await asyncio.to_thread(
+                dataset_store.put, result["history"], "metrics", {"buckets": summary},
+                f"get_system_metrics:{incident_type or 'default'}"
+            )
+            result["history"] = {"window": window, "resolution": resolution, "dataset": dataset_store.handle(info)}
         
-        return json.dumps(metrics, indent=2)
+        return json.dumps(result, indent=2)
     except Exception as e:
         return f"Error: {str(e)}"
 
 
+def _current_metrics(incident_type: Optional[str] = None, window: Optional[str] = None,
+                     resolution: str = "1m", metrics: Optional[List[str]] = None,
+                     session: Any = None) -> Dict[str, Any]:
+    """Latest core metrics, plus downsampled history when a window is given"""
+    with feed_lock:
+        feed = get_feed(incident_type, session)
+        latest = feed.store.latest(CORE_METRICS)
+        
+        degraded = (
+            latest["error_rate_percent"] > 1.0
+            or latest["database_connections"] >= 0.9 * DATABASE_MAX_CONNECTIONS
+        )
+        result = {
+            "api_response_time_ms": round(latest["api_response_time_ms"]),
+            "error_rate_percent": round(latest["error_rate_percent"], 2),
+            "cpu_percent": round(latest["cpu_percent"]),
+            "memory_percent": round(latest["memory_percent"]),
+            "database_connections": int(latest["database_connections"]),
+            "database_max_connections": DATABASE_MAX_CONNECTIONS,
+            "timestamp": datetime.fromtimestamp(feed.store.latest_ts()).isoformat(),
+            "status": "degraded" if degraded else "healthy"
+        }
+        
+        if window:
+            names = metrics or CORE_METRICS
+            unknown = [name for name in names if name not in feed.store.series]
+            if unknown:
+                raise ValueError(f"Unknown metrics {unknown}. Available: {feed.store.names()}")
+            result["history"] = {
+                "window": window,
+                "resolution": resolution,
+                "series": {
+                    name: [_round_bucket(b) for b in feed.store.query(name, window, resolution)]
+                    for name in names
+                }
+            }
+    return result
+
+
 @mcp_server.tool()
-async def analyze_logs(timeframe: str, filter: Optional[str] = None, incident_type: Optional[str] = None) -> str:
-    """Analyze application logs for error patterns, anomalies, and correlations"""
+@tool_metrics.instrument
+async def analyze_logs(timeframe: str, filter: Optional[str] = None, incident_type: Optional[str] = None,
+                       ctx: Optional[Context] = None) -> str:
+    """
+    Analyze application logs for error patterns, anomalies, and correlations.
+
+    Error counts come from the per-error-type series; anomalies (with onset
+    timestamps) come from the streaming EWMA/CUSUM detectors, which only
+    process samples ingested since the previous call. Each anomaly is a
+    'level_shift' (sustained change) or a 'spike' (one outlying sample).
+
+    Args:
+        timeframe: Lookback window (e.g. '30m', '1h', '24h')
+        filter: Optional substring to restrict error types (e.g. 'timeout')
+        incident_type: Scenario to analyze (e.g. 'connection_leak')
+    """
     logger.info(f"Tool called: analyze_logs with timeframe={timeframe}, filter={filter}")
     
     try:
-        if incident_type == "connection_leak":
-            result = {
-                "timeframe": timeframe,
-                "filter": filter or "all",
-                "total_entries": 45237,
-                "errors_found": 1247,
-                "error_types": {
-                    "connection_timeout": 1247,
-                    "slow_query": 23,
-                    "rate_limit": 5
-                },
-                "pattern": {
-                    "started": "23 minutes ago",
-                    "correlation": "deployment_v2.3.1",
-                    "affected_service": "UserProfileService",
-                    "error_message": "Database connection timeout after 30s"
-                }
-            }
-        else:
-            result = {
-                "timeframe": timeframe,
-                "filter": filter or "all",
-                "total_entries": 12543,
-                "errors_found": 3,
-                "status": "normal"
-            }
-        
+        result = await asyncio.to_thread(_log_analysis, timeframe, filter, incident_type, _session(ctx))
         return json.dumps(result, indent=2)
     except Exception as e:
         return f"Error: {str(e)}"
 
 
+def _log_analysis(timeframe: str, filter: Optional[str] = None, incident_type: Optional[str] = None,
+                  session: Any = None) -> Dict[str, Any]:
+    """Error counts and anomalies over the timeframe (see analyze_logs)"""
+    window_seconds = parse_duration(timeframe)
+    with feed_lock:
+        feed = get_feed(incident_type, session)
+        feed.anomalies.update()
+        now = time.time()
+        
+        error_types = {}
+        for name in feed.store.names("errors."):
+            error_type = name[len("errors."):]
+            if filter and filter.lower() not in error_type.lower():
+                continue
+            count = int(feed.window_total(name, window_seconds, now))
+            if count:
+                error_types[error_type] = count
+        error_types = dict(sorted(error_types.items(), key=lambda item: -item[1]))
+        
+        anomalies = [
+            _describe_anomaly(a, now)
+            for a in feed.anomalies.anomalies(since=now - window_seconds, include_spikes=True)
+        ]
+        active = [a for a in anomalies if a["active"]]
+        
+        result = {
+            "timeframe": timeframe,
+            "filter": filter or "all",
+            "total_entries": int(feed.window_total("log_entries", window_seconds, now)),
+            "errors_found": sum(error_types.values()),
+            "error_types": error_types,
+            "anomalies": anomalies
+        }
+        
+        if active:
+            # Pattern is anchored on the earliest active anomaly; the dominant
+            # anomalous error type identifies the affected component
+            error_anomalies = [a for a in active if a["series"].startswith("errors.")]
+            dominant = max(error_anomalies, key=lambda a: a["current"], default=None)
+            details = ERROR_TYPE_DETAILS.get(dominant["series"][len("errors."):], {}) if dominant else {}
+            onset_ts = datetime.fromisoformat(active[0]["onset"]).timestamp()
+            recent_changes = feed.timeline.starting_between(onset_ts - 3600, onset_ts + 60)
+            result["pattern"] = {
+                "started": active[0]["started"],
+                "onset": active[0]["onset"],
+                "leading_signal": active[0]["series"],
+                "affected_series": [a["series"] for a in active],
+                "correlation": f"{recent_changes[-1].kind}_{recent_changes[-1].version}" if recent_changes else None,
+                "affected_service": details.get("service", "unknown"),
+                "error_message": details.get("message", "n/a")
+            }
+        else:
+            result["status"] = "normal"
+    return result
+
+
+def _format_lag(seconds: float) -> str:
+    minutes = int(abs(seconds) // 60)
+    if minutes >= 120:
+        return f"{minutes // 60} hours"
+    if minutes:
+        return f"{minutes} minutes"
+    return f"{int(abs(seconds))} seconds"
+
+
 @mcp_server.tool()
-async def root_cause_analysis(incident_type: str, deployment: Optional[str] = None) -> str:
-    """Perform deep root cause analysis based on symptoms and context"""
+@tool_metrics.instrument
+async def root_cause_analysis(incident_type: str, deployment: Optional[str] = None,
+                              ctx: Optional[Context] = None) -> str:
+    """
+    Perform deep root cause analysis based on symptoms and context.
+
+    Correlates the onset of the active error spike with the change timeline
+    (deployments, config changes, feature flags) and per-service error
+    histograms, ranking candidate causes by lag and error impact.
+
+    Args:
+        incident_type: Scenario to analyze (e.g. 'connection_leak')
+        deployment: Optional suspected version (e.g. 'v2.3.1') to evaluate explicitly
+    """
     logger.info(f"Tool called: root_cause_analysis with incident_type={incident_type}, deployment={deployment}")
     
     try:
-        if incident_type == "connection_leak" and deployment == "v2.3.1":
-            result = {
-                "root_cause_identified": True,
-                "confidence": 95,
-                "issue": {
-                    "type": "connection_leak",
-                    "component": "UserProfileService",
-                    "file": "services/user_profile.py",
-                    "line": 234,
-                    "problem": "Missing connection.close() in error handling path",
-                    "introduced_in": "v2.3.1",
-                    "deployed_at": "2024-11-28T14:37:00Z",
-                    "time_since_deploy": "23 minutes"
-                },
-                "evidence": [
-                    "Connection pool exhaustion correlates with v2.3.1 deployment",
-                    "Code review shows missing cleanup in error path",
-                    "Error spike started exactly at deployment time"
-                ]
+        result = await asyncio.to_thread(_root_cause, incident_type, deployment, _session(ctx))
+        return json.dumps(result, indent=2)
+    except Exception as e:
+        return f"Error: {str(e)}"
+
+
+def _root_cause(incident_type: str, deployment: Optional[str] = None, session: Any = None) -> Dict[str, Any]:
+    """Change candidates correlated with the active error spike (see root_cause_analysis)"""
+    with feed_lock:
+        feed = get_feed(incident_type, session)
+        onset = feed.spike_onset()
+        if onset is None:
+            return {
+                "root_cause_identified": False,
+                "message": "No active error spike detected; insufficient data for root cause analysis"
             }
-        else:
-            result = {
+        
+        now = time.time()
+        candidates = correlate_changes(feed.timeline, onset, feed.error_histograms)
+        
+        suspected = feed.timeline.find_version(deployment) if deployment else None
+        if suspected is not None and all(c["event"] is not suspected for c in candidates):
+            # Score the suspected change explicitly even if it falls outside the top candidates
+            lookback = max(onset - suspected.start_ts, 0) + 60
+            candidates += [
+                c for c in correlate_changes(feed.timeline, onset, feed.error_histograms,
+                                             lookback=lookback, max_candidates=len(feed.timeline))
+                if c["event"] is suspected
+            ]
+        
+        ranked = [
+            {
+                "rank": i,
+                "kind": c["event"].kind,
+                "service": c["event"].service,
+                "version": c["event"].version,
+                "started_at": datetime.fromtimestamp(c["event"].start_ts).isoformat(),
+                "lag_before_spike": _format_lag(c["lag_seconds"]),
+                "service_errors_before": int(c["errors_before"]),
+                "service_errors_after": int(c["errors_after"]),
+                "score": round(c["score"], 3)
+            }
+            for i, c in enumerate(candidates, 1)
+        ]
+        
+        top = candidates[0] if candidates else None
+        if top is None or top["score"] < 0.5:
+            return {
                 "root_cause_identified": False,
-                "message": "Insufficient data for root cause analysis"
+                "spike_onset": datetime.fromtimestamp(onset).isoformat(),
+                "message": "No change correlates strongly with the error spike",
+                "candidates": ranked
             }
         
+        event = top["event"]
+        issue = {
+            "type": incident_type,
+            "component": event.service,
+            "change_kind": event.kind,
+            "introduced_in": event.version,
+            "deployed_at": datetime.fromtimestamp(event.start_ts).isoformat(),
+            "time_since_deploy": _format_lag(now - event.start_ts)
+        }
+        issue.update(RELEASE_FINDINGS.get((event.service, event.version), {}))
+        
+        evidence = [
+            f"Error spike onset {datetime.fromtimestamp(onset).isoformat()} is {_format_lag(top['lag_seconds'])} after {event.kind} {event.version} of {event.service}",
+            f"{event.service} errors rose from {int(top['errors_before'])} to {int(top['errors_after'])} in the 10 minutes around the change",
+        ]
+        if "problem" in issue:
+            evidence.append(f"Code review finding for {event.version}: {issue['problem']}")
+        
+        result = {
+            "root_cause_identified": True,
+            "confidence": int(round(top["score"] * 100)),
+            "issue": issue,
+            "evidence": evidence,
+            "candidates": ranked
+        }
+        if deployment:
+            result["suspected_deployment"] = {
+                "version": deployment,
+                "in_timeline": suspected is not None,
+                "matches_top_candidate": suspected is event
+            }
+    return result
+
+
+# Health probes: (check name, metric series, healthy if value <= baseline * factor, timeout s)
+HEALTH_PROBES = [
+    ("api_response_time", "api_response_time_ms", 1.5, 1.0),
+    ("error_rate", "error_rate_percent", 3.0, 1.0),
+    ("database_connections", "database_connections", None, 1.0),
+    ("redis", "redis_latency_ms", 3.0, 0.5),
+    ("payment_gateway", "payment_gateway_latency_ms", 2.0, 2.0)
+]
+HEALTH_CACHE_TTL_SECONDS = 10.0
+DATABASE_POOL_HEALTHY_PERCENT = 80
+
+
+def _build_health_checker(feed: ScenarioFeed) -> HealthChecker:
+    """Probes read the feed's health_readings; dependency probes also pay a simulated round trip"""
+    
+    def make_check(check_name: str, metric: str, factor: Optional[float]):
+        async def check() -> Dict[str, Any]:
+            value, baseline = feed.health_readings[metric]
+            if metric in DEPENDENCY_METRICS:
+                # Dependency probes take as long as the dependency responds
+                await asyncio.sleep(value / 1000)
+            
+            if factor is None:
+                usage = value / DATABASE_MAX_CONNECTIONS * 100
+                healthy = usage < DATABASE_POOL_HEALTHY_PERCENT
+                result = {"value": int(value), "max": DATABASE_MAX_CONNECTIONS, "usage_percent": round(usage, 1)}
+            else:
+                healthy = baseline is None or value <= baseline * factor
+                result = {"value": round(value, 2), "baseline": round(baseline, 2) if baseline is not None else None}
+            
+            result["status"] = "✅ healthy" if healthy else "❌ degraded"
+            return result
+        return check
+    
+    return HealthChecker(
+        HealthProbe(name, make_check(name, metric, factor), timeout=timeout, ttl=HEALTH_CACHE_TTL_SECONDS)
+        for name, metric, factor, timeout in HEALTH_PROBES
+    )
+
+
+@mcp_server.tool()
+@tool_metrics.instrument
+async def verify_health(after_remediation: bool = False, incident_type: Optional[str] = None, force: bool = False,
+                        ctx: Optional[Context] = None) -> str:
+    """
+    Verify overall system health and check if issues are resolved.
+
+    Probes (API latency, error rate, DB pool usage, Redis, payment gateway)
+    run concurrently with per-probe timeouts and are compared against
+    baselines from the metrics history. Results are cached for a few seconds,
+    so post-remediation polling does not re-run probes checked moments ago.
+
+    Args:
+        after_remediation: Set once remediation has been executed (applies to
+            this session's investigation; other sessions still see the incident)
+        incident_type: Scenario to verify (e.g. 'connection_leak')
+        force: Bypass the probe result cache
+    """
+    logger.info(f"Tool called: verify_health with after_remediation={after_remediation}, incident_type={incident_type}")
+    
+    try:
+        result = await _health_report(after_remediation, incident_type, force, _session(ctx))
         return json.dumps(result, indent=2)
     except Exception as e:
         return f"Error: {str(e)}"
 
 
+def _read_health(incident_type: Optional[str] = None, after_remediation: bool = False,
+                 session: Any = None) -> ScenarioFeed:
+    """Advance (and optionally remediate) the feed and read the probed metrics into health_readings"""
+    with feed_lock:
+        feed = get_feed(incident_type, session)
+        if after_remediation:
+            feed = _remediate(feed, session)
+        if feed.health is None:
+            feed.health = _build_health_checker(feed)
+        metrics = [metric for _, metric, _, _ in HEALTH_PROBES]
+        latest = feed.store.latest(metrics)
+        feed.health_readings = {
+            metric: (latest[metric], feed.baseline(metric) if factor is not None else None)
+            for _, metric, factor, _ in HEALTH_PROBES
+        }
+    return feed
+
+
+async def _health_report(after_remediation: bool = False, incident_type: Optional[str] = None,
+                         force: bool = False, session: Any = None) -> Dict[str, Any]:
+    """Run (or reuse cached) health probes (see verify_health)"""
+    feed = await asyncio.to_thread(_read_health, incident_type, after_remediation, session)
+    
+    started = time.perf_counter()
+    checks = await feed.health.run(force=force)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    
+    healthy = all(check["status"] == "✅ healthy" for check in checks.values())
+    return {
+        "status": "healthy" if healthy else "degraded",
+        "after_remediation": after_remediation,
+        "checks": checks,
+        "verification_time_ms": round(elapsed_ms, 1)
+    }
+
+
+# Collectors combined by get_incident_snapshot: name -> timeout (s)
+SNAPSHOT_COLLECTOR_TIMEOUTS = {
+    "metrics": 2.0,
+    "logs": 3.0,
+    "root_cause": 3.0,
+    "health": 3.0
+}
+SNAPSHOT_MAX_ANOMALIES = 5
+SNAPSHOT_MAX_CANDIDATES = 3
+
+
+async def _run_collector(call: Callable[[], Awaitable[Dict[str, Any]]], timeout: float) -> Dict[str, Any]:
+    """Run one snapshot collector; failures and timeouts are reported, not raised"""
+    started = time.perf_counter()
+    try:
+        result = {"status": "ok", "data": await asyncio.wait_for(call(), timeout=timeout)}
+    except asyncio.TimeoutError:
+        result = {"status": "timeout", "error": f"Collector exceeded {timeout}s timeout"}
+    except Exception as e:
+        result = {"status": "error", "error": str(e)}
+    result["duration_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    return result
+
+
+def _snapshot_summary(sections: Dict[str, Optional[Dict[str, Any]]]) -> Dict[str, Any]:
+    """Headline fields from whichever collectors succeeded"""
+    summary: Dict[str, Any] = {}
+    metrics, logs, root_cause, health = (sections.get(name) for name in ("metrics", "logs", "root_cause", "health"))
+    if metrics:
+        summary["system_status"] = metrics["status"]
+        summary["error_rate_percent"] = metrics["error_rate_percent"]
+        summary["api_response_time_ms"] = metrics["api_response_time_ms"]
+        summary["database_connections"] = f"{metrics['database_connections']}/{metrics['database_max_connections']}"
+    if logs:
+        summary["errors_found"] = logs["errors_found"]
+        pattern = logs.get("pattern")
+        if pattern:
+            summary["spike_onset"] = pattern["onset"]
+            summary["affected_service"] = pattern["affected_service"]
+            summary["error_message"] = pattern["error_message"]
+    if root_cause:
+        summary["root_cause_identified"] = root_cause["root_cause_identified"]
+        if root_cause["root_cause_identified"]:
+            issue = root_cause["issue"]
+            summary["root_cause"] = f"{issue['change_kind']} {issue['introduced_in']} of {issue['component']}"
+            summary["confidence"] = root_cause["confidence"]
+    if health:
+        summary["health"] = health["status"]
+        summary["degraded_checks"] = [
+            name for name, check in health["checks"].items() if check["status"] != "✅ healthy"
+        ]
+    return summary
+
+
 @mcp_server.tool()
-async def verify_health(after_remediation: bool = False) -> str:
-    """Verify overall system health and check if issues are resolved"""
-    logger.info(f"Tool called: verify_health with after_remediation={after_remediation}")
+@tool_metrics.instrument
+async def get_incident_snapshot(
+    incident_type: Optional[str] = None,
+    timeframe: str = "1h",
+    deployment: Optional[str] = None,
+    timeout_seconds: Optional[float] = None,
+    ctx: Optional[Context] = None
+) -> str:
+    """
+    One-call incident triage: current metrics, log error analysis, root cause
+    candidates and health checks in a single compact document.
+
+    The four collectors (the work behind get_system_metrics, analyze_logs,
+    root_cause_analysis and verify_health) run concurrently, each with its
+    own timeout; a slow or failing collector is reported in `collectors` and
+    the others are still returned. Use the individual tools only for
+    details not included here (metric history, full candidate lists).
+
+    Args:
+        incident_type: Scenario to snapshot (e.g. 'connection_leak')
+        timeframe: Log analysis lookback (e.g. '30m', '1h')
+        deployment: Optional suspected version to evaluate in root cause analysis
+        timeout_seconds: Override the per-collector timeouts (2-3s by default)
+    """
+    logger.info(f"Tool called: get_incident_snapshot with incident_type={incident_type}, timeframe={timeframe}, deployment={deployment}")
     
     try:
-        if after_remediation:
-            result = {
-                "status": "healthy",
-                "checks": {
-                    "api_response_time": {"value": 190, "baseline": 200, "status": "✅ healthy"},
-                    "error_rate": {"value": 0.08, "baseline": 0.1, "status": "✅ healthy"},
-                    "database_connections": {"value": 12, "max": 200, "status": "✅ healthy"}
-                }
-            }
-        else:
-            result = {"status": "degraded"}
+        parse_duration(timeframe)
+        # Build (or advance) the feed up front: backfill is CPU-bound and
+        # would otherwise count against whichever collector ran first
+        session = _session(ctx)
+        await asyncio.to_thread(_prepare_feed, incident_type, session)
         
-        return json.dumps(result, indent=2)
+        # The CPU-bound collectors run in worker threads and take feed_lock
+        # there, so the loop stays free and a timeout returns without waiting
+        # for them (a timed-out thread finishes in the background; later
+        # calls wait for feed_lock in their own worker thread)
+        calls = {
+            "metrics": lambda: asyncio.to_thread(_current_metrics, incident_type, session=session),
+            "logs": lambda: asyncio.to_thread(_log_analysis, timeframe, None, incident_type, session),
+            "root_cause": lambda: asyncio.to_thread(_root_cause, incident_type, deployment, session),
+            "health": lambda: _health_report(False, incident_type, session=session)
+        }
+        started = time.perf_counter()
+        results = await asyncio.gather(*(
+            _run_collector(call, timeout_seconds or SNAPSHOT_COLLECTOR_TIMEOUTS[name])
+            for name, call in calls.items()
+        ))
+        collected = dict(zip(calls, results))
+        
+        sections = {name: result.get("data") for name, result in collected.items()}
+        logs = sections["logs"]
+        if logs and len(logs["anomalies"]) > SNAPSHOT_MAX_ANOMALIES:
+            # Keep active anomalies first, then the most recent
+            logs["anomalies"] = sorted(logs["anomalies"], key=lambda a: not a["active"])[:SNAPSHOT_MAX_ANOMALIES]
+        if sections["root_cause"]:
+            sections["root_cause"]["candidates"] = sections["root_cause"].get("candidates", [])[:SNAPSHOT_MAX_CANDIDATES]
+        
+        snapshot = {
+            "incident_type": incident_type or "baseline",
+            "generated_at": datetime.now().isoformat(),
+            "summary": _snapshot_summary(sections),
+            **sections,
+            "collectors": {
+                name: {key: value for key, value in result.items() if key != "data"}
+                for name, result in collected.items()
+            },
+            "collection_time_ms": round((time.perf_counter() - started) * 1000, 1)
+        }
+        
+        return json.dumps(snapshot, indent=2)
     except Exception as e:
         return f"Error: {str(e)}"
 
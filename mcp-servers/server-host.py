@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Multi-Server Host - runs all three MCP servers in one process.
+
+The monitoring-analysis, workflow-orchestration and log-analytics servers
+share a single event loop and ASGI app. Each server keeps its usual port
+(9001/9002/9003) and /mcp endpoint, so agent configuration is unchanged:
+requests are dispatched by the local port they arrived on. Every server is
+also mounted by name on all ports (e.g. http://127.0.0.1:9001/log-analytics/mcp).
+
+Readiness:
+    GET /ready returns 200 once every server's session manager (and every
+    log-analytics worker) is running, 503 before that.
+
+Multi-worker mode:
+    --log-analytics-workers N serves the CPU-heavy log-analytics server from
+    N worker processes sharing port 9003 via SO_REUSEPORT (Linux/BSD). The
+    kernel balances connections across workers; workers run stateless, since
+    MCP sessions cannot be shared between processes.
+
+Usage:
+    python mcp-servers/server-host.py
+    python mcp-servers/server-host.py --log-analytics-workers 4
+"""
+
+import argparse
+import asyncio
+import importlib.util
+import logging
+import multiprocessing
+import socket
+import sys
+from contextlib import AsyncExitStack, asynccontextmanager
+from pathlib import Path
+from types import ModuleType
+from typing import Dict, List, Optional
+
+import uvicorn
+from mcp.server.fastmcp import FastMCP
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Mount, Route
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("server-host")
+
+SERVERS_DIR = Path(__file__).parent
+
+# Server name -> module file, in start order
+SERVER_FILES = {
+    "monitoring-analysis": "monitoring-analysis-server.py",
+    "workflow-orchestration": "workflow-orchestration-server.py",
+    "log-analytics": "log-analytics-server.py",
+}
+
+# Server run out-of-process in multi-worker mode, and its fixed port
+WORKER_SERVER = "log-analytics"
+WORKER_PORT = 9003
+
+HOST_ROUTES = ("/ready",)
+LISTEN_BACKLOG = 2048
+
+
+def load_server_module(name: str) -> ModuleType:
+    """Import a server module by file path (cached in sys.modules as mcp_<name>)"""
+    module_name = f"mcp_{name.replace('-', '_')}"
+    if module_name in sys.modules:
+        return sys.modules[module_name]
+    path = SERVERS_DIR / SERVER_FILES[name]
+    spec = importlib.util.spec_from_file_location(module_name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def load_server(name: str) -> FastMCP:
+    """Import a server module by file path and return its FastMCP instance"""
+    return load_server_module(name).mcp_server
+
+
+def bind_socket(host: str, port: int, reuse_port: bool = False) -> socket.socket:
+    """
+    Create a bound TCP socket for uvicorn.
+
+    Args:
+        host: Interface to bind
+        port: Port to bind
+        reuse_port: Set SO_REUSEPORT so several processes can share the port
+
+    Raises:
+        RuntimeError: If SO_REUSEPORT is requested but unsupported
+    """
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    if reuse_port:
+        if not hasattr(socket, "SO_REUSEPORT"):
+            sock.close()
+            raise RuntimeError("SO_REUSEPORT is not supported on this platform")
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind((host, port))
+    sock.listen(LISTEN_BACKLOG)
+    sock.set_inheritable(True)
+    return sock
+
+
+class MultiServerHost:
+    """
+    ASGI app hosting several FastMCP servers.
+
+    HTTP requests for host routes (/ready) are handled here; everything else
+    goes to the server owning the local port, falling back to the by-name
+    mounts. The lifespan runs every server's session manager.
+
+    Args:
+        servers: FastMCP instances keyed by name
+        workers_ready: Readiness events of out-of-process workers
+    """
+
+    def __init__(self, servers: Dict[str, FastMCP], workers_ready: Optional[List] = None):
+        self.servers = servers
+        self.workers_ready = workers_ready or []
+        self.ready = False
+        self.apps = {name: server.streamable_http_app() for name, server in servers.items()}
+        self.port_apps = {server.settings.port: self.apps[name] for name, server in servers.items()}
+
+        routes = [Route("/ready", self.readiness, methods=["GET"])]
+        routes.extend(Mount(f"/{name}", app=app) for name, app in self.apps.items())
+        self.router = Starlette(routes=routes, lifespan=self.lifespan)
+
+    @asynccontextmanager
+    async def lifespan(self, app: Starlette):
+        async with AsyncExitStack() as stack:
+            for name, server in self.servers.items():
+                await stack.enter_async_context(server.session_manager.run())
+                logger.info(f"{name} session manager started")
+            self.ready = True
+            try:
+                yield
+            finally:
+                self.ready = False
+
+    def is_ready(self) -> bool:
+        return self.ready and all(event.is_set() for event in self.workers_ready)
+
+    async def readiness(self, request: Request) -> JSONResponse:
+        workers = [event.is_set() for event in self.workers_ready]
+        body = {
+            "ready": self.is_ready(),
+            "servers": sorted(self.servers),
+            "workers_ready": f"{sum(workers)}/{len(workers)}" if workers else None,
+        }
+        return JSONResponse(body, status_code=200 if body["ready"] else 503)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http" and scope["path"] not in HOST_ROUTES:
+            server = scope.get("server")
+            app: Optional[ASGIApp] = self.port_apps.get(server[1]) if server else None
+            if app is not None and not self._is_mount_path(scope["path"]):
+                await app(scope, receive, send)
+                return
+        await self.router(scope, receive, send)
+
+    def _is_mount_path(self, path: str) -> bool:
+        return any(path.startswith(f"/{name}/") for name in self.apps)
+
+
+async def _signal_when_started(server: uvicorn.Server, event) -> None:
+    while not server.started:
+        await asyncio.sleep(0.05)
+    event.set()
+
+
+def run_worker(name: str, host: str, port: int, ready_event) -> None:
+    """Worker process entry point: serve one server on a SO_REUSEPORT socket"""
+    server = load_server(name)
+    server.settings.stateless_http = True
+    sock = bind_socket(host, port, reuse_port=True)
+    config = uvicorn.Config(server.streamable_http_app(), log_level=server.settings.log_level.lower())
+    uv_server = uvicorn.Server(config)
+
+    async def serve():
+        watcher = asyncio.create_task(_signal_when_started(uv_server, ready_event))
+        try:
+            await uv_server.serve(sockets=[sock])
+        finally:
+            watcher.cancel()
+
+    asyncio.run(serve())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run all MCP servers in one process")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to bind (default: 127.0.0.1)")
+    parser.add_argument(
+        "--log-analytics-workers", type=int, default=0,
+        help="Serve log-analytics from N SO_REUSEPORT worker processes (default: in-process)"
+    )
+    args = parser.parse_args()
+
+    hosted = [name for name in SERVER_FILES if not (args.log_analytics_workers and name == WORKER_SERVER)]
+    servers = {name: load_server(name) for name in hosted}
+
+    workers = []
+    workers_ready = []
+    if args.log_analytics_workers:
+        ctx = multiprocessing.get_context("spawn")
+        for _ in range(args.log_analytics_workers):
+            event = ctx.Event()
+            process = ctx.Process(target=run_worker, args=(WORKER_SERVER, args.host, WORKER_PORT, event), daemon=True)
+            process.start()
+            workers.append(process)
+            workers_ready.append(event)
+        logger.info(f"Started {len(workers)} {WORKER_SERVER} workers on port {WORKER_PORT} (SO_REUSEPORT)")
+
+    host_app = MultiServerHost(servers, workers_ready)
+    sockets = [bind_socket(args.host, server.settings.port) for server in servers.values()]
+    for name, server in servers.items():
+        logger.info(f"{name}: http://{args.host}:{server.settings.port}{server.settings.streamable_http_path}")
+
+    config = uvicorn.Config(host_app, log_level="info")
+    try:
+        uvicorn.Server(config).run(sockets=sockets)
+    finally:
+        for process in workers:
+            process.terminate()
+        for process in workers:
+            process.join(timeout=5)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+"""Shared engines for the MCP servers"""
+
+from .timeseries import MetricsStore, RingSeries, parse_duration
+from .anomaly import AnomalyMonitor, SeriesDetector
+from .timeline import ErrorHistogram, EventTimeline, TimelineEvent, correlate_changes
+from .health import HealthChecker, HealthProbe
+from .instrumentation import ToolMetrics, install_metrics_endpoints
+from .aggregation import LogAggregate, QuantileSketch, aggregate_archive
+from .alert_grouping import AlertGroup, AlertGrouper, IncidentRegistry, alert_fingerprint
+from .dataset_store import DatasetInfo, DatasetStore, get_dataset_store
+from .exec_cache import ExecCache
+from .log_archive import ArchiveQueryResult, LogArchive, LogArchiveWriter
+from .log_templates import LogCluster, TemplateMiner, TemplateMinerCache
+from .log_generator import (
+    InjectedIncident, LogBatch, LogGeneratorConfig, ServiceProfile, generate_logs, read_columnar, write_columnar
+)
+
+__all__ = [
+    'MetricsStore', 'RingSeries', 'parse_duration',
+    'AnomalyMonitor', 'SeriesDetector',
+    'ErrorHistogram', 'EventTimeline', 'TimelineEvent', 'correlate_changes',
+    'HealthChecker', 'HealthProbe',
+    'ToolMetrics', 'install_metrics_endpoints',
+    'InjectedIncident', 'LogBatch', 'LogGeneratorConfig', 'ServiceProfile', 'generate_logs',
+    'read_columnar', 'write_columnar',
+    'ArchiveQueryResult', 'LogArchive', 'LogArchiveWriter',
+    'LogAggregate', 'QuantileSketch', 'aggregate_archive',
+    'AlertGroup', 'AlertGrouper', 'IncidentRegistry', 'alert_fingerprint',
+    'LogCluster', 'TemplateMiner', 'TemplateMinerCache',
+    'DatasetInfo', 'DatasetStore', 'get_dataset_store',
+    'ExecCache'
+]
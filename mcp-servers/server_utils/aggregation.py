@@ -0,0 +1,346 @@
+"""
+Partitioned Log Aggregation
+
+Map/merge aggregation over log archives across CPU cores:
+- The archive's candidate blocks are split into partitions, either by time
+  range (contiguous block runs) or by service
+- Each partition is aggregated in a ProcessPoolExecutor worker into a
+  LogAggregate: counts by level/service/endpoint/error code, latency sums,
+  per-minute error counts and mergeable latency quantile sketches
+- Partials are merged in the parent; merging is associative, so the result
+  does not depend on the number of workers
+
+Decompressing and decoding JSON rows is the expensive part and runs
+entirely in the workers.
+"""
+
+import atexit
+import math
+import multiprocessing
+import os
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Union
+
+from .log_archive import BlockInfo, LogArchive, iter_block_rows, to_epoch
+
+PARTITION_MODES = ("time", "service")
+# Time partitions per worker, so uneven blocks still balance
+PARTITIONS_PER_WORKER = 4
+
+
+class QuantileSketch:
+    """
+    Log-bucketed quantile sketch (DDSketch-style): quantiles are within
+    `relative_accuracy` of the true value, memory grows with the log of the
+    value range, and two sketches merge by adding bucket counts.
+    """
+
+    __slots__ = ("relative_accuracy", "gamma", "_log_gamma", "buckets", "zeros", "count")
+
+    def __init__(self, relative_accuracy: float = 0.01):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.buckets: Counter = Counter()
+        self.zeros = 0
+        self.count = 0
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        if value <= 0:
+            self.zeros += 1
+        else:
+            self.buckets[math.ceil(math.log(value) / self._log_gamma)] += 1
+
+    def merge(self, other: "QuantileSketch") -> None:
+        if other.gamma != self.gamma:
+            raise ValueError("Cannot merge sketches with different accuracy")
+        self.buckets.update(other.buckets)
+        self.zeros += other.zeros
+        self.count += other.count
+
+    def quantile(self, q: float) -> Optional[float]:
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.zeros
+        if rank < seen:
+            return 0.0
+        for key in sorted(self.buckets):
+            seen += self.buckets[key]
+            if seen > rank:
+                return 2 * self.gamma ** key / (self.gamma + 1)
+        return 2 * self.gamma ** max(self.buckets) / (self.gamma + 1)
+
+    def __getstate__(self):
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+    def __setstate__(self, state):
+        for slot, value in state.items():
+            setattr(self, slot, value)
+
+
+class LogAggregate:
+    """
+    Mergeable summary of log rows.
+
+    Args:
+        bucket_seconds: Width of the error-count time buckets
+    """
+
+    def __init__(self, bucket_seconds: int = 60):
+        self.bucket_seconds = bucket_seconds
+        self.rows = 0
+        self.min_ts: Optional[float] = None
+        self.max_ts: Optional[float] = None
+        self.levels: Counter = Counter()
+        self.services: Counter = Counter()
+        self.service_errors: Counter = Counter()
+        self.endpoints: Counter = Counter()
+        self.error_codes: Counter = Counter()
+        self.errors_per_bucket: Counter = Counter()
+        self.latency_sum: Counter = Counter()
+        self.latency_max: Dict[str, float] = {}
+        self.latency: Dict[str, QuantileSketch] = {}
+
+    def add(self, row: Dict[str, Any], ts: float) -> None:
+        service = row.get("service", "unknown")
+        level = row.get("level", "INFO")
+        self.rows += 1
+        if self.min_ts is None or ts < self.min_ts:
+            self.min_ts = ts
+        if self.max_ts is None or ts > self.max_ts:
+            self.max_ts = ts
+        self.levels[level] += 1
+        self.services[service] += 1
+        self.endpoints[row.get("endpoint", "unknown")] += 1
+        if level == "ERROR":
+            self.service_errors[service] += 1
+            self.error_codes[row.get("error_code", "UNKNOWN")] += 1
+            self.errors_per_bucket[int(ts // self.bucket_seconds) * self.bucket_seconds] += 1
+
+        latency = row.get("response_time_ms")
+        if latency is not None:
+            self.latency_sum[service] += latency
+            if latency > self.latency_max.get(service, -1):
+                self.latency_max[service] = latency
+            sketch = self.latency.get(service)
+            if sketch is None:
+                sketch = self.latency[service] = QuantileSketch()
+            sketch.add(latency)
+
+    def merge(self, other: "LogAggregate") -> "LogAggregate":
+        self.rows += other.rows
+        if other.min_ts is not None:
+            self.min_ts = other.min_ts if self.min_ts is None else min(self.min_ts, other.min_ts)
+            self.max_ts = other.max_ts if self.max_ts is None else max(self.max_ts, other.max_ts)
+        for name in ("levels", "services", "service_errors", "endpoints", "error_codes",
+                     "errors_per_bucket", "latency_sum"):
+            getattr(self, name).update(getattr(other, name))
+        for service, value in other.latency_max.items():
+            self.latency_max[service] = max(value, self.latency_max.get(service, value))
+        for service, sketch in other.latency.items():
+            if service in self.latency:
+                self.latency[service].merge(sketch)
+            else:
+                self.latency[service] = sketch
+        return self
+
+    def to_dict(self, top: int = 10) -> Dict[str, Any]:
+        """JSON-ready summary"""
+        services = {}
+        for service, count in _top(self.services):
+            sketch = self.latency.get(service)
+            samples = sketch.count if sketch else 0
+            services[service] = {
+                "rows": count,
+                "errors": self.service_errors[service],
+                "error_rate_percent": round(100 * self.service_errors[service] / count, 2),
+                "latency_ms": {
+                    "avg": round(self.latency_sum[service] / samples, 1) if samples else None,
+                    "p50": _round(sketch.quantile(0.50)) if sketch else None,
+                    "p95": _round(sketch.quantile(0.95)) if sketch else None,
+                    "p99": _round(sketch.quantile(0.99)) if sketch else None,
+                    "max": self.latency_max.get(service)
+                }
+            }
+
+        peak = _top(self.errors_per_bucket, top)
+        return {
+            "rows": self.rows,
+            "start": _iso(self.min_ts),
+            "end": _iso(self.max_ts),
+            "levels": dict(sorted(self.levels.items())),
+            "error_rate_percent": round(100 * self.levels["ERROR"] / self.rows, 2) if self.rows else 0.0,
+            "services": services,
+            "error_codes": dict(_top(self.error_codes)),
+            "top_endpoints": dict(_top(self.endpoints, top)),
+            "peak_error_buckets": [{"start": _iso(ts), "errors": count} for ts, count in sorted(peak)],
+            "bucket_seconds": self.bucket_seconds
+        }
+
+
+def _top(counter: Counter, n: Optional[int] = None) -> List[tuple]:
+    """most_common() with ties broken by key, so merge order never changes the output"""
+    return sorted(counter.items(), key=lambda item: (-item[1], item[0]))[:n]
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return round(value, 1) if value is not None else None
+
+
+def _iso(ts: Optional[float]) -> Optional[str]:
+    if ts is None:
+        return None
+    return time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(ts))
+
+
+def aggregate_rows(rows: Iterable[Dict[str, Any]], start: Optional[float] = None, end: Optional[float] = None,
+                   services: Optional[Sequence[str]] = None, bucket_seconds: int = 60) -> LogAggregate:
+    """Aggregate log dicts within [start, end] from the given services"""
+    aggregate = LogAggregate(bucket_seconds)
+    service_set = set(services) if services else None
+    for row in rows:
+        if service_set is not None and row.get("service") not in service_set:
+            continue
+        ts = to_epoch(row["timestamp"])
+        if (start is not None and ts < start) or (end is not None and ts > end):
+            continue
+        aggregate.add(row, ts)
+    return aggregate
+
+
+def aggregate_blocks(path: Union[str, Path], blocks: Sequence[BlockInfo], start: Optional[float] = None,
+                     end: Optional[float] = None, services: Optional[Sequence[str]] = None,
+                     bucket_seconds: int = 60) -> LogAggregate:
+    """Aggregate the rows of some archive blocks (the per-partition map step, run in workers)"""
+    return aggregate_rows(iter_block_rows(path, blocks), start, end, services, bucket_seconds)
+
+
+def plan_partitions(archive: LogArchive, blocks: List[BlockInfo], services: Optional[Sequence[str]],
+                    partition_by: str, workers: int) -> List[Dict[str, Any]]:
+    """
+    Split candidate blocks into partitions.
+
+    'time': contiguous block runs of similar row counts (each block read once).
+    'service': one partition per service, reading only blocks containing it;
+    best when blocks hold few services (e.g. archives written per service).
+    """
+    if partition_by not in PARTITION_MODES:
+        raise ValueError(f"partition_by must be one of {PARTITION_MODES}")
+
+    if partition_by == "service":
+        partitions = []
+        for service in services or archive.index.services:
+            bit = archive.index.service_bit(service)
+            service_blocks = [block for block in blocks if block.service_bitmap & bit]
+            if service_blocks:
+                partitions.append({"blocks": service_blocks, "services": [service], "label": service})
+        return partitions
+
+    count = max(1, min(len(blocks), workers * PARTITIONS_PER_WORKER))
+    total_rows = sum(block.rows for block in blocks)
+    partitions, current, current_rows = [], [], 0
+    for block in blocks:
+        current.append(block)
+        current_rows += block.rows
+        if current_rows >= total_rows / count and len(partitions) < count - 1:
+            partitions.append(current)
+            current, current_rows = [], 0
+    if current:
+        partitions.append(current)
+    return [
+        {"blocks": part, "services": services, "label": f"{_iso(part[0].min_ts)}..{_iso(part[-1].max_ts)}"}
+        for part in partitions
+    ]
+
+
+_executors: Dict[int, ProcessPoolExecutor] = {}
+
+
+def get_executor(workers: int) -> ProcessPoolExecutor:
+    """Shared process pool per worker count (spawned once, reused across calls)"""
+    executor = _executors.get(workers)
+    if executor is None:
+        executor = _executors[workers] = ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+        )
+    return executor
+
+
+@atexit.register
+def shutdown_executors() -> None:
+    for executor in _executors.values():
+        executor.shutdown(wait=False, cancel_futures=True)
+    _executors.clear()
+
+
+def default_workers() -> int:
+    return os.cpu_count() or 1
+
+
+def aggregate_archive(path: Union[str, Path], start: Union[str, float, None] = None,
+                      end: Union[str, float, None] = None, services: Optional[Sequence[str]] = None,
+                      partition_by: str = "time", workers: Optional[int] = None,
+                      bucket_seconds: int = 60) -> Dict[str, Any]:
+    """
+    Aggregate an archive in parallel.
+
+    Args:
+        path: Archive file
+        start: Earliest timestamp (ISO string or unix seconds)
+        end: Latest timestamp (ISO string or unix seconds)
+        services: Only these services
+        partition_by: 'time' or 'service'
+        workers: Worker processes (default: CPU count; 1 runs in-process)
+        bucket_seconds: Width of the error-count time buckets
+
+    Returns:
+        Dict with the merged aggregate and execution stats
+    """
+    started = time.perf_counter()
+    workers = max(1, workers or default_workers())
+    start_ts = to_epoch(start) if start is not None else None
+    end_ts = to_epoch(end) if end is not None else None
+
+    archive = LogArchive(path)
+    blocks = [
+        block for block in archive.index.blocks
+        if (start_ts is None or block.max_ts >= start_ts) and (end_ts is None or block.min_ts <= end_ts)
+    ]
+    partitions = plan_partitions(archive, blocks, services, partition_by, workers)
+
+    args = [(archive.path, p["blocks"], start_ts, end_ts, p["services"], bucket_seconds) for p in partitions]
+    if workers == 1 or len(partitions) <= 1:
+        partials = [aggregate_blocks(*arg) for arg in args]
+    else:
+        executor = get_executor(workers)
+        try:
+            partials = [future.result() for future in [executor.submit(aggregate_blocks, *arg) for arg in args]]
+        except BrokenProcessPool:
+            # A worker died (e.g. OOM-killed); the next call gets a fresh pool
+            _executors.pop(workers, None)
+            raise RuntimeError("Aggregation worker process died; retry with fewer workers or a narrower window")
+
+    merged = LogAggregate(bucket_seconds)
+    for partial in partials:
+        merged.merge(partial)
+
+    return {
+        "aggregate": merged.to_dict(),
+        "execution": {
+            "workers": workers,
+            "partition_by": partition_by,
+            "partitions": [
+                {"label": p["label"], "blocks": len(p["blocks"]), "rows": partial.rows}
+                for p, partial in zip(partitions, partials)
+            ],
+            "blocks_read": sum(len(p["blocks"]) for p in partitions),
+            "blocks_total": len(archive.index.blocks),
+            "elapsed_seconds": round(time.perf_counter() - started, 3)
+        }
+    }
@@ -0,0 +1,405 @@
+"""
+Alert Deduplication and Grouping
+
+During an outage the same problem fires hundreds of near-identical alerts.
+Grouping them before incidents are created means one incident - and one
+investigation - per real problem.
+
+- Fingerprint = hash of (service, error_code, normalized message); the
+  message is normalized with the log template masks, so alerts differing
+  only in hosts, IDs, counts or durations share a fingerprint
+- Groups are sliding windows: an alert joins its fingerprint's group when
+  it arrives within `window_seconds` of the group's last alert, so a storm
+  that keeps firing stays one group however long it lasts
+- Lookup uses a hashed window index keyed by (fingerprint, window bucket);
+  an alert probes its own bucket and its two neighbours, so the cost per
+  alert is O(1) regardless of how many groups are open. Groups that went
+  quiet are pruned as time moves on
+- IncidentRegistry tracks incidents by ID and open incidents by
+  fingerprint; a new group whose fingerprint already has an open incident
+  (e.g. the problem came back after a quiet window) is attached to it
+  instead of opening another
+"""
+
+import hashlib
+import itertools
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .log_archive import to_epoch
+from .log_templates import WILDCARD, mask_message
+
+DEFAULT_WINDOW_SECONDS = 300.0
+MAX_SAMPLE_ALERTS = 5
+MAX_INCIDENTS = 10_000
+
+# Most severe first; unknown severities rank below all of them
+SEVERITY_ORDER = ("SEV1", "SEV2", "SEV3", "SEV4")
+
+
+# Short hex IDs (request/trace IDs) the log template masks leave partly unmasked
+HEX_ID = re.compile(r"\b(?=[0-9a-f]*\d)[0-9a-f]{6,}\b", re.I)
+
+
+def normalize_message(message: str) -> str:
+    """Masked, lowercased message with collapsed whitespace"""
+    message = mask_message(HEX_ID.sub(WILDCARD, message))
+    return re.sub(r"\s+", " ", message).strip().lower()
+
+
+def alert_fingerprint(service: str, error_code: Optional[str], message: str) -> str:
+    key = f"{service.strip().lower()}|{(error_code or '').strip().upper()}|{normalize_message(message)}"
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+
+
+def _severity_rank(severity: Optional[str]) -> int:
+    severity = (severity or "").upper()
+    return SEVERITY_ORDER.index(severity) if severity in SEVERITY_ORDER else len(SEVERITY_ORDER)
+
+
+def highest_severity(*severities: Optional[str]) -> Optional[str]:
+    known = [severity.upper() for severity in severities if severity]
+    return min(known, key=_severity_rank) if known else None
+
+
+@dataclass
+class Alert:
+    """One incoming alert, validated"""
+    service: str
+    message: str
+    ts: float
+    error_code: Optional[str] = None
+    severity: Optional[str] = None
+    alert_id: Optional[str] = None
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], default_ts: float) -> "Alert":
+        """Raises ValueError for a malformed alert"""
+        if not isinstance(data, dict):
+            raise ValueError("alert must be an object")
+        service = data.get("service")
+        message = data.get("message")
+        if not service or not isinstance(service, str):
+            raise ValueError("missing 'service'")
+        if not message or not isinstance(message, str):
+            raise ValueError("missing 'message'")
+        timestamp = data.get("timestamp")
+        try:
+            ts = default_ts if timestamp is None else to_epoch(timestamp)
+        except (TypeError, ValueError):
+            raise ValueError(f"invalid 'timestamp': {timestamp!r}")
+        error_code = data.get("error_code")
+        severity = data.get("severity")
+        return cls(
+            service=service,
+            message=message,
+            ts=ts,
+            error_code=str(error_code) if error_code is not None else None,
+            severity=str(severity) if severity is not None else None,
+            alert_id=data.get("id") or data.get("alert_id")
+        )
+
+
+@dataclass
+class AlertGroup:
+    """Alerts sharing a fingerprint within a sliding window"""
+    group_id: str
+    fingerprint: str
+    service: str
+    error_code: Optional[str]
+    template: str
+    first_seen: float
+    last_seen: float
+    count: int = 0
+    severity: Optional[str] = None
+    incident_id: Optional[str] = None
+    sample_alerts: List[str] = field(default_factory=list)
+
+    def add(self, alert: Alert) -> None:
+        self.count += 1
+        self.first_seen = min(self.first_seen, alert.ts)
+        self.last_seen = max(self.last_seen, alert.ts)
+        self.severity = highest_severity(self.severity, alert.severity)
+        if alert.alert_id and len(self.sample_alerts) < MAX_SAMPLE_ALERTS:
+            self.sample_alerts.append(str(alert.alert_id))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "group_id": self.group_id,
+            "fingerprint": self.fingerprint,
+            "service": self.service,
+            "error_code": self.error_code,
+            "template": self.template,
+            "count": self.count,
+            "severity": self.severity,
+            "first_seen": datetime.fromtimestamp(self.first_seen).isoformat(),
+            "last_seen": datetime.fromtimestamp(self.last_seen).isoformat(),
+            "incident_id": self.incident_id,
+            "sample_alerts": self.sample_alerts
+        }
+
+
+class AlertGrouper:
+    """
+    Sliding-window grouping over a hashed (fingerprint, bucket) index.
+
+    Args:
+        window_seconds: Max gap between consecutive alerts of one group
+                        (also the index bucket width)
+    """
+
+    def __init__(self, window_seconds: float = DEFAULT_WINDOW_SECONDS):
+        if window_seconds <= 0:
+            raise ValueError("window_seconds must be positive")
+        self.window_seconds = float(window_seconds)
+        self._index: Dict[Tuple[str, int], AlertGroup] = {}
+        self._ids = itertools.count(1)
+        self._latest_bucket: Optional[int] = None
+
+    def __len__(self) -> int:
+        return len({id(group) for group in self._index.values()})
+
+    def _bucket(self, ts: float) -> int:
+        return int(ts // self.window_seconds)
+
+    def add(self, alert: Alert) -> Tuple[AlertGroup, bool]:
+        """
+        Place an alert in its group.
+
+        Returns:
+            (group, True if the group was opened by this alert)
+        """
+        fingerprint = alert_fingerprint(alert.service, alert.error_code, alert.message)
+        bucket = self._bucket(alert.ts)
+
+        group = None
+        for probe in (bucket, bucket - 1, bucket + 1):
+            candidate = self._index.get((fingerprint, probe))
+            if candidate is not None and (
+                candidate.first_seen - self.window_seconds <= alert.ts <= candidate.last_seen + self.window_seconds
+            ):
+                group = candidate
+                break
+
+        created = group is None
+        if created:
+            group = AlertGroup(
+                group_id=f"GRP-{next(self._ids):05d}",
+                fingerprint=fingerprint,
+                service=alert.service,
+                error_code=alert.error_code,
+                template=normalize_message(alert.message),
+                first_seen=alert.ts,
+                last_seen=alert.ts
+            )
+        group.add(alert)
+        # A group is reachable from every bucket it has alerts in
+        self._index[(fingerprint, bucket)] = group
+        self._index.setdefault((fingerprint, self._bucket(group.last_seen)), group)
+
+        if self._latest_bucket is None or bucket > self._latest_bucket:
+            self._latest_bucket = bucket
+            self._prune()
+        return group, created
+
+    def _prune(self) -> None:
+        """Drop index entries of groups quiet for longer than a window"""
+        horizon = (self._latest_bucket - 2) * self.window_seconds
+        stale = [key for key, group in self._index.items() if group.last_seen < horizon]
+        for key in stale:
+            del self._index[key]
+
+    def open_groups(self) -> List[AlertGroup]:
+        unique = {id(group): group for group in self._index.values()}
+        return sorted(unique.values(), key=lambda group: group.first_seen)
+
+
+@dataclass
+class IncidentRecord:
+    """An incident with the alert groups attached to it"""
+    incident_id: str
+    severity: str
+    title: str
+    description: str
+    root_cause: Optional[str] = None
+    status: str = "INVESTIGATING"
+    created_at: str = field(default_factory=lambda: datetime.now().isoformat())
+    resolved_at: Optional[str] = None
+    fingerprints: List[str] = field(default_factory=list)
+    group_ids: List[str] = field(default_factory=list)
+    alert_count: int = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.incident_id,
+            "severity": self.severity,
+            "title": self.title,
+            "description": self.description,
+            "root_cause": self.root_cause,
+            "status": self.status,
+            "created_at": self.created_at,
+            "resolved_at": self.resolved_at,
+            "alert_count": self.alert_count,
+            "alert_groups": self.group_ids
+        }
+
+
+class IncidentRegistry:
+    """
+    Incidents by ID, plus the open incident of each alert fingerprint.
+
+    Args:
+        max_incidents: Incidents kept; the oldest are forgotten past it
+    """
+
+    def __init__(self, max_incidents: int = MAX_INCIDENTS):
+        self.max_incidents = max_incidents
+        self._incidents: "OrderedDict[str, IncidentRecord]" = OrderedDict()
+        self._open_by_fingerprint: Dict[str, str] = {}
+        self._ids = itertools.count(1)
+
+    def __len__(self) -> int:
+        return len(self._incidents)
+
+    def get(self, incident_id: str) -> Optional[IncidentRecord]:
+        return self._incidents.get(incident_id)
+
+    def _next_id(self) -> str:
+        year = datetime.now().year
+        while True:
+            incident_id = f"INC-{year}-A{next(self._ids):04d}"
+            if incident_id not in self._incidents:
+                return incident_id
+
+    def create(self, severity: str, title: str, description: str, root_cause: Optional[str] = None,
+               incident_id: Optional[str] = None) -> IncidentRecord:
+        """Register an incident (replacing one with the same ID)"""
+        record = IncidentRecord(
+            incident_id=incident_id or self._next_id(),
+            severity=severity.upper(),
+            title=title,
+            description=description,
+            root_cause=root_cause
+        )
+        self._incidents.pop(record.incident_id, None)
+        self._incidents[record.incident_id] = record
+        while len(self._incidents) > self.max_incidents:
+            _, evicted = self._incidents.popitem(last=False)
+            self._forget_fingerprints(evicted)
+        return record
+
+    def open_incident_for(self, fingerprint: str) -> Optional[IncidentRecord]:
+        incident_id = self._open_by_fingerprint.get(fingerprint)
+        return self._incidents.get(incident_id) if incident_id else None
+
+    def attach(self, record: IncidentRecord, group: AlertGroup, alerts: int) -> None:
+        """Count `alerts` new alerts of the group against the incident"""
+        group.incident_id = record.incident_id
+        if group.group_id not in record.group_ids:
+            record.group_ids.append(group.group_id)
+        if group.fingerprint not in record.fingerprints:
+            record.fingerprints.append(group.fingerprint)
+        record.alert_count += alerts
+        if record.status != "RESOLVED":
+            self._open_by_fingerprint[group.fingerprint] = record.incident_id
+        escalated = highest_severity(record.severity, group.severity)
+        if escalated:
+            record.severity = escalated
+
+    def resolve(self, incident_id: str) -> Optional[IncidentRecord]:
+        """Mark resolved; later alerts with its fingerprints open a new incident"""
+        record = self._incidents.get(incident_id)
+        if record is None:
+            return None
+        record.status = "RESOLVED"
+        record.resolved_at = datetime.now().isoformat()
+        self._forget_fingerprints(record)
+        return record
+
+    def _forget_fingerprints(self, record: IncidentRecord) -> None:
+        for fingerprint in record.fingerprints:
+            if self._open_by_fingerprint.get(fingerprint) == record.incident_id:
+                del self._open_by_fingerprint[fingerprint]
+
+
+def ingest(alerts: Iterable[Dict[str, Any]], grouper: AlertGrouper, registry: IncidentRegistry,
+           create_incidents: bool = True, now: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Group a batch of alerts and attach each group to an incident.
+
+    Args:
+        alerts: Alert dicts (service, message; optional error_code,
+                timestamp, severity, id)
+        grouper: Sliding-window grouper (state persists across batches)
+        registry: Incident registry
+        create_incidents: Open an incident for groups without one (otherwise
+                          they are reported with incident_id None)
+        now: Timestamp for alerts without one (default: current time)
+
+    Returns:
+        Summary with the touched groups, new incidents (the ones that need
+        an investigation), duplicates attached and invalid alerts
+    """
+    now = time.time() if now is None else now
+    received = 0
+    invalid = []
+    batch_counts: "OrderedDict[str, int]" = OrderedDict()
+    groups: Dict[str, AlertGroup] = {}
+    new_groups = set()
+
+    parsed = []
+    for position, data in enumerate(alerts):
+        received += 1
+        try:
+            parsed.append(Alert.from_dict(data, now))
+        except ValueError as e:
+            invalid.append({"index": position, "error": str(e)})
+
+    # In time order, so a batch delivered out of order groups like a live stream
+    for alert in sorted(parsed, key=lambda alert: alert.ts):
+        group, created = grouper.add(alert)
+        groups[group.group_id] = group
+        batch_counts[group.group_id] = batch_counts.get(group.group_id, 0) + 1
+        if created:
+            new_groups.add(group.group_id)
+
+    created_incidents = []
+    attached = 0
+    for group_id, count in batch_counts.items():
+        group = groups[group_id]
+        record = registry.get(group.incident_id) if group.incident_id else None
+        if record is None or record.status == "RESOLVED":
+            record = registry.open_incident_for(group.fingerprint)
+        if record is None and create_incidents:
+            label = group.error_code or group.template[:80]
+            record = registry.create(
+                severity=group.severity or "SEV3",
+                title=f"{group.service}: {label}",
+                description=f"{group.count} alert(s) like: {group.template}"
+            )
+            created_incidents.append(record)
+            # The alert that opened the incident is not a duplicate
+            attached += count - 1
+        elif record is not None:
+            attached += count
+        if record is not None:
+            registry.attach(record, group, count)
+
+    created_ids = {record.incident_id for record in created_incidents}
+    return {
+        "alerts_received": received,
+        "alerts_grouped": received - len(invalid),
+        "invalid_alerts": invalid,
+        "groups": [
+            {**groups[group_id].to_dict(), "batch_count": count, "new_group": group_id in new_groups}
+            for group_id, count in batch_counts.items()
+        ],
+        "incidents_created": [record.to_dict() for record in created_incidents],
+        "duplicates_attached": attached,
+        "incidents_to_investigate": sorted(created_ids),
+        "open_groups": len(grouper)
+    }
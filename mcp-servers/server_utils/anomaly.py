@@ -0,0 +1,334 @@
+"""
+Streaming Anomaly Detection
+
+Online detectors that keep O(1) state per series:
+- EWMA mean/variance plus an EWMA of absolute deviation (robust scale)
+- Robust z-score per sample for spike detection: a single outlying
+  sample, confirmed once the next one is back within `spike_z`
+- Two-sided CUSUM on the clipped z-score for change-point (level shift)
+  detection. The onset is the start of the alarming run, refined by a
+  second, high-threshold CUSUM that noise rarely keeps positive, so large
+  shifts are not back-dated to an unrelated noise excursion
+
+AnomalyMonitor drives one detector per series of a MetricsStore and only
+processes samples newer than the last call, so repeated queries are cheap.
+"""
+
+import math
+from typing import Any, Dict, Iterable, List, Optional
+
+from .timeseries import MetricsStore
+
+
+# Scale factor turning mean absolute deviation into a normal-equivalent sigma
+MAD_TO_SIGMA = 1.2533
+
+
+class SeriesDetector:
+    """
+    Online EWMA / robust z-score / CUSUM detector for one series.
+
+    While an anomaly is active the baseline level keeps adapting, but at
+    `active_alpha` (a small fraction of `alpha`), so a persistent level shift
+    stays anchored to its onset for hours while a slow drift (e.g. a diurnal
+    curve) is followed. The anomaly resolves once the series is back near
+    either the pre-anomaly baseline ('recovered') or the adapted one
+    ('absorbed'); one still open after `max_active_samples` is expired and
+    the baseline restarts at the current level ('rebaselined').
+    """
+
+    __slots__ = (
+        "alpha", "spike_z", "z_clip", "cusum_k", "cusum_h", "warmup",
+        "min_sigma", "recovery_samples", "active_alpha", "max_active_samples",
+        "count", "mean", "var", "mad", "last_ts", "last_value",
+        "fast_k", "cusum_pos", "cusum_neg", "pos_run_start", "neg_run_start",
+        "fast_pos", "fast_neg", "fast_pos_start", "fast_neg_start",
+        "active", "last_spike", "last_resolved", "_pending_spike", "_calm", "_calm_recovered",
+        "_active_samples"
+    )
+
+    def __init__(
+        self,
+        alpha: float = 0.02,
+        spike_z: float = 6.0,
+        z_clip: float = 6.0,
+        cusum_k: float = 0.5,
+        cusum_h: float = 10.0,
+        fast_k: float = 2.0,
+        warmup: int = 30,
+        min_sigma: float = 1e-6,
+        recovery_samples: int = 12,
+        active_alpha: Optional[float] = None,
+        max_active_samples: int = 720
+    ):
+        self.alpha = alpha
+        self.spike_z = spike_z
+        self.z_clip = z_clip
+        self.cusum_k = cusum_k
+        self.cusum_h = cusum_h
+        self.fast_k = fast_k
+        self.warmup = warmup
+        self.min_sigma = min_sigma
+        self.recovery_samples = recovery_samples
+        self.active_alpha = alpha / 10 if active_alpha is None else active_alpha
+        self.max_active_samples = max_active_samples
+
+        self.count = 0
+        self.mean = 0.0
+        self.var = 0.0
+        self.mad = 0.0
+        self.last_ts: Optional[float] = None
+        self.last_value: Optional[float] = None
+        self.cusum_pos = 0.0
+        self.cusum_neg = 0.0
+        self.pos_run_start: Optional[float] = None
+        self.neg_run_start: Optional[float] = None
+        self.fast_pos = 0.0
+        self.fast_neg = 0.0
+        self.fast_pos_start: Optional[float] = None
+        self.fast_neg_start: Optional[float] = None
+        self.active: Optional[Dict[str, Any]] = None
+        self.last_spike: Optional[Dict[str, Any]] = None
+        self._pending_spike: Optional[Dict[str, Any]] = None
+        self.last_resolved: Optional[Dict[str, Any]] = None
+        self._calm = self._calm_recovered = 0
+        self._active_samples = 0
+
+    def sigma(self) -> float:
+        """Robust scale estimate of the baseline"""
+        return max(MAD_TO_SIGMA * self.mad, math.sqrt(self.var), self.min_sigma)
+
+    def zscore(self, value: float) -> float:
+        """Robust z-score of `value` against the current baseline"""
+        return (value - self.mean) / self.sigma()
+
+    def update(self, ts: float, value: float) -> Optional[Dict[str, Any]]:
+        """
+        Feed one sample.
+
+        Args:
+            ts: Sample timestamp (unix seconds)
+            value: Sample value
+
+        Returns:
+            The anomaly dict if this sample opened a new level-shift anomaly
+        """
+        self.last_ts = ts
+        self.last_value = value
+        self.count += 1
+
+        if self.count == 1:
+            self.mean = value
+            return None
+
+        if self.count <= self.warmup:
+            self._update_baseline(value)
+            return None
+
+        z = self.zscore(value)
+
+        opened = None
+        if self.active is None:
+            self._track_spike(ts, value, z)
+            opened = self._update_cusum(ts, z)
+            if opened is None:
+                self._update_baseline(value)
+        else:
+            self._track_active(ts, value, z)
+
+        return opened
+
+    def _track_spike(self, ts: float, value: float, z: float) -> None:
+        # An outlier followed by another is the start of a shift (CUSUM's
+        # job); only a lone one is reported as a spike
+        pending, self._pending_spike = self._pending_spike, None
+        if abs(z) >= self.spike_z:
+            self._pending_spike = {
+                "type": "spike",
+                "direction": "increase" if z > 0 else "decrease",
+                "onset_ts": ts,
+                "baseline_mean": self.mean,
+                "baseline_sigma": self.sigma(),
+                "peak_value": value,
+                "peak_z": z
+            }
+        elif pending is not None:
+            pending["detected_ts"] = ts
+            self.last_spike = pending
+
+    def _update_baseline(self, value: float) -> None:
+        diff = value - self.mean
+        incr = self.alpha * diff
+        self.mean += incr
+        self.var = (1 - self.alpha) * (self.var + diff * incr)
+        self.mad += self.alpha * (abs(diff) - self.mad)
+
+    def _update_cusum(self, ts: float, z: float) -> Optional[Dict[str, Any]]:
+        clipped = max(-self.z_clip, min(self.z_clip, z))
+
+        if self.cusum_pos == 0.0:
+            self.pos_run_start = ts
+        self.cusum_pos = max(0.0, self.cusum_pos + clipped - self.cusum_k)
+        if self.cusum_neg == 0.0:
+            self.neg_run_start = ts
+        self.cusum_neg = max(0.0, self.cusum_neg - clipped - self.cusum_k)
+
+        if self.fast_pos == 0.0:
+            self.fast_pos_start = ts
+        self.fast_pos = max(0.0, self.fast_pos + clipped - self.fast_k)
+        if self.fast_neg == 0.0:
+            self.fast_neg_start = ts
+        self.fast_neg = max(0.0, self.fast_neg - clipped - self.fast_k)
+
+        if self.cusum_pos > self.cusum_h:
+            direction = "increase"
+            onset = self.fast_pos_start if self.fast_pos > 0.0 else self.pos_run_start
+        elif self.cusum_neg > self.cusum_h:
+            direction = "decrease"
+            onset = self.fast_neg_start if self.fast_neg > 0.0 else self.neg_run_start
+        else:
+            return None
+
+        self._pending_spike = None
+        self.active = {
+            "type": "level_shift",
+            "direction": direction,
+            "onset_ts": onset,
+            "detected_ts": ts,
+            "baseline_mean": self.mean,
+            "baseline_sigma": self.sigma(),
+            "peak_value": self.last_value,
+            "peak_z": z
+        }
+        self._calm = self._calm_recovered = 0
+        self._active_samples = 0
+        return self.active
+
+    def _track_active(self, ts: float, value: float, z: float) -> None:
+        active = self.active
+        if abs(z) > abs(active["peak_z"]):
+            active["peak_z"] = z
+            active["peak_value"] = value
+        self._active_samples += 1
+
+        # Calm when back near the pre-anomaly baseline, or near the slowly
+        # adapted one (the shift was a drift the baseline has caught up with)
+        # (within 2 pre-anomaly sigmas, or 1 sigma of the adapted level)
+        onset_z = (value - active["baseline_mean"]) / active["baseline_sigma"]
+        if abs(onset_z) < self.cusum_k * 4 or abs(z) < self.cusum_k * 2:
+            self._calm += 1
+            if abs(onset_z) < self.cusum_k * 4:
+                self._calm_recovered += 1
+        else:
+            self._calm = self._calm_recovered = 0
+        # Only the level follows; the shift itself must not inflate the scale
+        self.mean += self.active_alpha * (value - self.mean)
+
+        if self._calm >= self.recovery_samples:
+            if self._calm_recovered * 2 >= self._calm:
+                # Back at the old level; drop what the baseline drifted toward the shift
+                self.mean = active["baseline_mean"]
+                self._resolve(ts, "recovered")
+            else:
+                self._resolve(ts, "absorbed")
+        elif self._active_samples >= self.max_active_samples:
+            # The new level is the norm now; restart the baseline from it
+            self.mean = value
+            self._resolve(ts, "rebaselined")
+
+    def _resolve(self, ts: float, resolution: str) -> None:
+        self.active["resolved_ts"] = ts
+        self.active["resolution"] = resolution
+        self.last_resolved = self.active
+        self.active = None
+        self.cusum_pos = self.cusum_neg = 0.0
+        self.fast_pos = self.fast_neg = 0.0
+        self._calm = self._calm_recovered = 0
+        self._active_samples = 0
+
+
+class AnomalyMonitor:
+    """
+    Incremental anomaly detection over every series of a MetricsStore.
+
+    Args:
+        store: Store to watch
+        overrides: Detector kwargs keyed by series-name prefix
+                   (e.g. {"errors.": {"min_sigma": 1.0}})
+    """
+
+    def __init__(self, store: MetricsStore, overrides: Optional[Dict[str, Dict[str, Any]]] = None):
+        self.store = store
+        self.overrides = overrides or {}
+        self.detectors: Dict[str, SeriesDetector] = {}
+
+    def _detector(self, name: str) -> SeriesDetector:
+        detector = self.detectors.get(name)
+        if detector is None:
+            kwargs = {}
+            for prefix, options in self.overrides.items():
+                if name.startswith(prefix):
+                    kwargs.update(options)
+            detector = self.detectors[name] = SeriesDetector(**kwargs)
+        return detector
+
+    def update(self) -> int:
+        """
+        Process samples ingested since the previous call.
+
+        Returns:
+            Number of samples processed
+        """
+        processed = 0
+        for name, series in self.store.series.items():
+            detector = self._detector(name)
+            start = -math.inf if detector.last_ts is None else math.nextafter(detector.last_ts, math.inf)
+            for ts, value in series.range(start, math.inf):
+                detector.update(ts, value)
+                processed += 1
+        return processed
+
+    def anomalies(
+        self,
+        names: Optional[Iterable[str]] = None,
+        since: Optional[float] = None,
+        include_resolved: bool = True,
+        include_spikes: bool = False
+    ) -> List[Dict[str, Any]]:
+        """
+        Current (and recently resolved) level-shift anomalies.
+
+        Args:
+            names: Restrict to these series (default: all)
+            since: Only anomalies whose onset or resolution is at/after this timestamp
+            include_resolved: Also report the last resolved anomaly per series
+            include_spikes: Also report the last spike per series (never active)
+
+        Returns:
+            Anomaly dicts sorted by onset, each tagged with 'series' and 'active';
+            'type' is 'level_shift' or 'spike'
+        """
+        results = []
+        for name in (names if names is not None else self.detectors):
+            detector = self.detectors.get(name)
+            if detector is None:
+                continue
+            candidates = [(detector.active, True)]
+            if include_resolved:
+                candidates.append((detector.last_resolved, False))
+            for anomaly, active in candidates:
+                if anomaly is None:
+                    continue
+                if since is not None and not active and anomaly.get("resolved_ts", 0) < since:
+                    continue
+                entry = dict(anomaly)
+                entry["series"] = name
+                entry["active"] = active
+                entry["current_value"] = detector.last_value
+                results.append(entry)
+            spike = detector.last_spike
+            if include_spikes and spike is not None and (since is None or spike["onset_ts"] >= since):
+                results.append({**spike, "series": name, "active": False, "current_value": spike["peak_value"]})
+
+        results.sort(key=lambda a: a["onset_ts"])
+        return results
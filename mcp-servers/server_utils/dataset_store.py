@@ -0,0 +1,299 @@
+"""
+Dataset Store
+
+Result-by-reference data plane for the MCP servers. A tool that produces a
+large result stores it here and returns a short dataset ID with a schema
+and summary; other tools (on any server) accept the ID and load the data
+directly, so multi-megabyte payloads never pass through the agent.
+
+- Datasets are content-addressed (ID = hash of the JSON encoding), so
+  storing the same data twice yields the same ID
+- Every dataset is written to a shared spill directory (JSON, readable by
+  generated analysis scripts and by other server processes)
+- A memory LRU keeps recently used datasets decoded; the directory has its
+  own byte budget with least-recently-used eviction
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+DEFAULT_DATASET_DIR = Path(__file__).resolve().parent.parent.parent / "analytics" / "datasets" / "store"
+DATASET_DIR_ENV = "MCP_DATASET_DIR"
+
+DEFAULT_MEMORY_BYTES = 256 * 1024 * 1024
+DEFAULT_DISK_BYTES = 4 * 1024 * 1024 * 1024
+SCHEMA_SAMPLE_ROWS = 1000
+
+
+@dataclass
+class DatasetInfo:
+    """Metadata stored next to each dataset"""
+    dataset_id: str
+    kind: str
+    rows: Optional[int]
+    size_bytes: int
+    schema: Dict[str, Any]
+    summary: Dict[str, Any] = field(default_factory=dict)
+    source: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def dataset_rows(data: Any) -> Optional[List[Any]]:
+    """The row list of a dataset: the data itself, or its 'logs'/'rows' list"""
+    if isinstance(data, list):
+        return data
+    if isinstance(data, dict):
+        for key in ("logs", "rows"):
+            if isinstance(data.get(key), list):
+                return data[key]
+    return None
+
+
+def infer_schema(data: Any) -> Dict[str, Any]:
+    """
+    Field -> {type, present_percent} over the first rows of a row dataset,
+    or the top-level keys and their types for other objects.
+    """
+    rows = dataset_rows(data)
+    if rows is None:
+        if isinstance(data, dict):
+            return {"type": "object", "fields": {key: type(value).__name__ for key, value in data.items()}}
+        return {"type": type(data).__name__}
+
+    sample = rows[:SCHEMA_SAMPLE_ROWS]
+    fields: Dict[str, Dict[str, int]] = {}
+    for row in sample:
+        if not isinstance(row, dict):
+            continue
+        for key, value in row.items():
+            types = fields.setdefault(key, {})
+            name = type(value).__name__
+            types[name] = types.get(name, 0) + 1
+
+    return {
+        "type": "rows",
+        "sampled_rows": len(sample),
+        "fields": {
+            key: {
+                "type": "|".join(sorted(types, key=lambda name: -types[name])),
+                "present_percent": round(100 * sum(types.values()) / len(sample), 1)
+            }
+            for key, types in fields.items()
+        }
+    }
+
+
+class DatasetStore:
+    """
+    Memory LRU over a shared on-disk dataset directory.
+
+    Args:
+        directory: Spill directory shared by all server processes
+            (default: $MCP_DATASET_DIR or analytics/datasets/store)
+        max_memory_bytes: Encoded size of datasets kept decoded in memory
+        max_disk_bytes: Size of the directory before LRU eviction
+    """
+
+    def __init__(self, directory: Optional[Path] = None, max_memory_bytes: int = DEFAULT_MEMORY_BYTES,
+                 max_disk_bytes: int = DEFAULT_DISK_BYTES):
+        self.directory = Path(directory or os.environ.get(DATASET_DIR_ENV) or DEFAULT_DATASET_DIR)
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self._memory: "OrderedDict[str, Tuple[Any, int]]" = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_loads = 0
+        self.misses = 0
+
+    def _path(self, dataset_id: str, suffix: str) -> Path:
+        # IDs come from clients; only "ds-" + alphanumerics may name a file
+        if not dataset_id.startswith("ds-") or not dataset_id[3:].isascii() or not dataset_id[3:].isalnum():
+            raise KeyError(f"Invalid dataset ID: {dataset_id}")
+        return self.directory / f"{dataset_id}{suffix}"
+
+    def _data_path(self, dataset_id: str) -> Path:
+        return self._path(dataset_id, ".json")
+
+    def _meta_path(self, dataset_id: str) -> Path:
+        return self._path(dataset_id, ".meta.json")
+
+    def put(self, data: Any, kind: str = "rows", summary: Optional[Dict[str, Any]] = None,
+            source: Optional[str] = None) -> DatasetInfo:
+        """
+        Store JSON-serializable data and return its metadata. The caller must
+        not mutate `data` afterwards (it is cached as-is).
+        """
+        encoded = json.dumps(data, separators=(",", ":"), default=str).encode("utf-8")
+        dataset_id = "ds-" + hashlib.sha256(encoded).hexdigest()[:20]
+        rows = dataset_rows(data)
+        info = DatasetInfo(
+            dataset_id=dataset_id,
+            kind=kind,
+            rows=len(rows) if rows is not None else None,
+            size_bytes=len(encoded),
+            schema=infer_schema(data),
+            summary=summary or {},
+            source=source
+        )
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self._data_path(dataset_id)
+        if path.exists():
+            os.utime(path)
+        else:
+            _atomic_write(path, encoded)
+        _atomic_write(self._meta_path(dataset_id), json.dumps(info.to_dict()).encode("utf-8"))
+
+        self._remember(dataset_id, data, len(encoded))
+        self._enforce_disk_budget(keep=dataset_id)
+        return info
+
+    def get(self, dataset_id: str) -> Any:
+        """
+        Decoded dataset, from memory or the shared directory.
+
+        Raises:
+            KeyError: Unknown or evicted dataset
+        """
+        with self._lock:
+            entry = self._memory.get(dataset_id)
+            if entry is not None:
+                self._memory.move_to_end(dataset_id)
+                self.hits += 1
+        path = self._data_path(dataset_id)
+        if entry is not None:
+            _touch(path)
+            return entry[0]
+
+        try:
+            encoded = path.read_bytes()
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            raise KeyError(f"Dataset not found (unknown or evicted): {dataset_id}") from None
+        _touch(path)
+        data = json.loads(encoded)
+        with self._lock:
+            self.disk_loads += 1
+        self._remember(dataset_id, data, len(encoded))
+        return data
+
+    def rows(self, dataset_id: str) -> List[Any]:
+        """Row list of a dataset (KeyError if unknown, ValueError if not row-shaped)"""
+        rows = dataset_rows(self.get(dataset_id))
+        if rows is None:
+            raise ValueError(f"Dataset {dataset_id} has no rows")
+        return rows
+
+    def info(self, dataset_id: str) -> DatasetInfo:
+        try:
+            meta = json.loads(self._meta_path(dataset_id).read_text())
+        except FileNotFoundError:
+            raise KeyError(f"Dataset not found (unknown or evicted): {dataset_id}") from None
+        return DatasetInfo(**meta)
+
+    def path(self, dataset_id: str) -> Path:
+        """JSON file of a dataset (e.g. for analysis scripts)"""
+        path = self._data_path(dataset_id)
+        if not path.exists():
+            raise KeyError(f"Dataset not found (unknown or evicted): {dataset_id}")
+        _touch(path)
+        return path
+
+    def handle(self, info: DatasetInfo) -> Dict[str, Any]:
+        """Compact reference returned by tools in place of the data"""
+        reference = info.to_dict()
+        reference["path"] = str(self._data_path(info.dataset_id))
+        return reference
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "directory": str(self.directory),
+                "memory_datasets": len(self._memory),
+                "memory_bytes": self._memory_bytes,
+                "memory_hits": self.hits,
+                "disk_loads": self.disk_loads,
+                "misses": self.misses
+            }
+
+    def _remember(self, dataset_id: str, data: Any, size: int) -> None:
+        if size > self.max_memory_bytes:
+            return
+        with self._lock:
+            if dataset_id in self._memory:
+                self._memory.move_to_end(dataset_id)
+                return
+            self._memory[dataset_id] = (data, size)
+            self._memory_bytes += size
+            while self._memory_bytes > self.max_memory_bytes:
+                _, (_, evicted_size) = self._memory.popitem(last=False)
+                self._memory_bytes -= evicted_size
+
+    def _enforce_disk_budget(self, keep: str) -> None:
+        files = []
+        for path in self.directory.glob("ds-*.json"):
+            if path.name.endswith(".meta.json"):
+                continue
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_disk_bytes:
+                break
+            dataset_id = path.name[:-len(".json")]
+            if dataset_id == keep:
+                continue
+            path.unlink(missing_ok=True)
+            self._meta_path(dataset_id).unlink(missing_ok=True)
+            with self._lock:
+                entry = self._memory.pop(dataset_id, None)
+                if entry is not None:
+                    self._memory_bytes -= entry[1]
+            total -= size
+
+
+def _atomic_write(path: Path, data: bytes) -> None:
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as handle:
+            handle.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+def _touch(path: Path) -> None:
+    # mtime doubles as the disk LRU clock
+    try:
+        os.utime(path)
+    except FileNotFoundError:
+        pass
+
+
+_default_store: Optional[DatasetStore] = None
+
+
+def get_dataset_store() -> DatasetStore:
+    """Process-wide store (shared by all servers in the single-process host)"""
+    global _default_store
+    if _default_store is None:
+        _default_store = DatasetStore()
+    return _default_store
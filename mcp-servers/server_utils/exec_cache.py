@@ -0,0 +1,199 @@
+"""
+Analysis Execution Cache
+
+Content-addressed memoization for execute_analysis_script:
+- Key = hash of the script (its AST, so comment/formatting-only edits of a
+  regenerated script still hit) + hash of the input data + interpreter
+  version; value = stdout, stderr, exit code and duration
+- Compiled bytecode is cached per exact script source, and scripts run
+  through a small loader that execs the cached code object (tracebacks
+  still point at the script's lines)
+- Results and bytecode share one directory with a byte budget and
+  least-recently-used eviction (file mtime is the LRU clock)
+
+Only successful runs (exit code 0) are cached; failures and timeouts are
+always re-run.
+"""
+
+import ast
+import hashlib
+import json
+import marshal
+import os
+import py_compile
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+# Runs a cached code object as __main__: argv = [loader, pyc, script, *args]
+BYTECODE_LOADER = (
+    "import marshal, os, sys\n"
+    "pyc = sys.argv[1]\n"
+    "sys.argv = sys.argv[2:]\n"
+    "sys.path[0] = os.path.dirname(os.path.abspath(sys.argv[0]))\n"
+    "with open(pyc, 'rb') as f:\n"
+    "    code = marshal.loads(f.read()[16:])\n"
+    "exec(code, {'__name__': '__main__', '__file__': sys.argv[0], '__builtins__': __builtins__})\n"
+)
+
+
+def normalized_script_hash(source: bytes) -> str:
+    """Hash of the script's AST (ignores comments, whitespace and line numbers)"""
+    try:
+        canonical = ast.dump(ast.parse(source)).encode("utf-8")
+    except (SyntaxError, ValueError):
+        canonical = source
+    return hashlib.sha256(canonical).hexdigest()
+
+
+class ExecCache:
+    """
+    On-disk result and bytecode cache.
+
+    Args:
+        directory: Cache directory (results/ and bytecode/ inside)
+        max_bytes: Disk budget for both
+    """
+
+    def __init__(self, directory: Path, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.saved_ms = 0.0
+        self._digests: Dict[Tuple[str, int, int], str] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def results_dir(self) -> Path:
+        return self.directory / "results"
+
+    @property
+    def bytecode_dir(self) -> Path:
+        return self.directory / "bytecode"
+
+    def file_digest(self, path: Path) -> str:
+        """SHA-256 of a file, memoized by (path, size, mtime) so large inputs are hashed once"""
+        stat = path.stat()
+        memo_key = (str(path.resolve()), stat.st_size, stat.st_mtime_ns)
+        digest = self._digests.get(memo_key)
+        if digest is None:
+            hasher = hashlib.sha256()
+            with open(path, "rb") as handle:
+                for chunk in iter(lambda: handle.read(1 << 20), b""):
+                    hasher.update(chunk)
+            digest = self._digests[memo_key] = hasher.hexdigest()
+        return digest
+
+    @staticmethod
+    def key(script_hash: str, data_hash: str) -> str:
+        interpreter = f"{sys.implementation.cache_tag}:{sys.version}"
+        return hashlib.sha256(f"{script_hash}:{data_hash}:{interpreter}".encode("utf-8")).hexdigest()[:32]
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        path = self.results_dir / f"{key}.json"
+        try:
+            entry = json.loads(path.read_text())
+        except (FileNotFoundError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+        _touch(path)
+        with self._lock:
+            self.hits += 1
+            self.saved_ms += entry.get("duration_ms", 0.0)
+        return entry
+
+    def put(self, key: str, entry: Dict[str, Any]) -> None:
+        self.results_dir.mkdir(parents=True, exist_ok=True)
+        entry = {**entry, "cached_at": time.time()}
+        _atomic_write(self.results_dir / f"{key}.json", json.dumps(entry).encode("utf-8"))
+        self._enforce_budget()
+
+    def bytecode(self, script_path: Path, source: bytes) -> Optional[Path]:
+        """
+        Cached .pyc for this exact source (compiled on first use), or None if
+        it does not compile (the script is then run directly so the
+        interpreter reports the error).
+        """
+        digest = hashlib.sha256(source).hexdigest()[:32]
+        path = self.bytecode_dir / f"{digest}.{sys.implementation.cache_tag}.pyc"
+        if path.exists():
+            _touch(path)
+            return path
+        self.bytecode_dir.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.bytecode_dir, prefix=".tmp-", suffix=".pyc")
+        os.close(fd)
+        try:
+            py_compile.compile(str(script_path), cfile=tmp, dfile=str(script_path), doraise=True)
+            # The loader skips the 16-byte header; make sure it is marshal data
+            marshal.loads(Path(tmp).read_bytes()[16:])
+            os.replace(tmp, path)
+        except (py_compile.PyCompileError, ValueError, EOFError, OSError):
+            Path(tmp).unlink(missing_ok=True)
+            return None
+        self._enforce_budget()
+        return path
+
+    def command(self, script_path: Path, source: bytes, args: List[str]) -> List[str]:
+        """Interpreter command running the script through its cached bytecode when possible"""
+        pyc = self.bytecode(script_path, source)
+        if pyc is None:
+            return [sys.executable, str(script_path), *args]
+        return [sys.executable, "-c", BYTECODE_LOADER, str(pyc), str(script_path), *args]
+
+    def stats(self) -> Dict[str, Any]:
+        entries = list(self.results_dir.glob("*.json")) if self.results_dir.exists() else []
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate_percent": round(100 * self.hits / lookups, 1) if lookups else None,
+                "saved_seconds": round(self.saved_ms / 1000, 2),
+                "cached_results": len(entries)
+            }
+
+    def _enforce_budget(self) -> None:
+        files = []
+        for directory in (self.results_dir, self.bytecode_dir):
+            if not directory.exists():
+                continue
+            for path in directory.iterdir():
+                if path.name.startswith(".tmp-"):
+                    continue
+                try:
+                    stat = path.stat()
+                except FileNotFoundError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+
+
+def _atomic_write(path: Path, data: bytes) -> None:
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as handle:
+            handle.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+def _touch(path: Path) -> None:
+    try:
+        os.utime(path)
+    except FileNotFoundError:
+        pass
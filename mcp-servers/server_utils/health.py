@@ -0,0 +1,108 @@
+"""
+Parallel Health-Check Engine
+
+Runs health probes concurrently with asyncio.gather, each with its own
+timeout and a short-TTL result cache. Total verification time is bounded by
+the slowest probe, and polling within the TTL reuses recent results instead
+of re-running probes. Concurrent callers share in-flight probe runs.
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+
+@dataclass
+class HealthProbe:
+    """
+    A single health check.
+
+    Attributes:
+        name: Check name reported in results
+        check: Async callable returning a dict (at least 'status')
+        timeout: Seconds before the probe is reported as timed out
+        ttl: Seconds a result is reused before the probe runs again
+    """
+    name: str
+    check: Callable[[], Awaitable[Dict[str, Any]]]
+    timeout: float = 2.0
+    ttl: float = 5.0
+
+
+class HealthChecker:
+    """Concurrent, cached execution of a fixed set of probes"""
+
+    def __init__(self, probes: Iterable[HealthProbe], clock: Callable[[], float] = time.monotonic):
+        self.probes: Dict[str, HealthProbe] = {probe.name: probe for probe in probes}
+        self._clock = clock
+        self._cache: Dict[str, Dict[str, Any]] = {}
+        self._cached_at: Dict[str, float] = {}
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._generation = 0
+
+    def invalidate(self, names: Optional[Iterable[str]] = None) -> None:
+        """Drop cached results (all, or only the named probes)"""
+        # Runs already in flight finish for their callers but are not cached
+        self._generation += 1
+        for name in (list(names) if names is not None else list(self.probes)):
+            self._cache.pop(name, None)
+            self._cached_at.pop(name, None)
+            self._inflight.pop(name, None)
+
+    async def run(self, names: Optional[List[str]] = None, force: bool = False) -> Dict[str, Dict[str, Any]]:
+        """
+        Run probes concurrently, reusing fresh cached results.
+
+        Args:
+            names: Subset of probes to run (default: all)
+            force: Ignore cached results
+
+        Returns:
+            Mapping of probe name to result dict. Each result carries
+            'duration_ms' and 'cached'; timeouts and exceptions are reported
+            as status 'timeout' / 'error' rather than raised.
+        """
+        selected = [self.probes[name] for name in (names or self.probes)]
+        results = await asyncio.gather(*(self._run_probe(probe, force) for probe in selected))
+        return {probe.name: result for probe, result in zip(selected, results)}
+
+    async def _run_probe(self, probe: HealthProbe, force: bool) -> Dict[str, Any]:
+        now = self._clock()
+        cached_at = self._cached_at.get(probe.name)
+        if not force and cached_at is not None and now - cached_at < probe.ttl:
+            result = dict(self._cache[probe.name])
+            result["cached"] = True
+            result["age_s"] = round(now - cached_at, 2)
+            return result
+
+        task = self._inflight.get(probe.name)
+        if task is None:
+            task = asyncio.ensure_future(self._execute(probe, self._generation))
+            self._inflight[probe.name] = task
+            task.add_done_callback(lambda done, name=probe.name: self._forget(name, done))
+
+        # Shield so one caller's cancellation doesn't abort a shared probe run
+        result = dict(await asyncio.shield(task))
+        result["cached"] = False
+        return result
+
+    def _forget(self, name: str, task: asyncio.Task) -> None:
+        if self._inflight.get(name) is task:
+            del self._inflight[name]
+
+    async def _execute(self, probe: HealthProbe, generation: int) -> Dict[str, Any]:
+        started = self._clock()
+        try:
+            result = dict(await asyncio.wait_for(probe.check(), timeout=probe.timeout))
+        except asyncio.TimeoutError:
+            result = {"status": "timeout", "error": f"Probe exceeded {probe.timeout}s timeout"}
+        except Exception as e:
+            result = {"status": "error", "error": str(e)}
+
+        finished = self._clock()
+        result["duration_ms"] = round((finished - started) * 1000, 1)
+        if generation == self._generation:
+            self._cache[probe.name] = result
+            self._cached_at[probe.name] = finished
+        return result
@@ -0,0 +1,260 @@
+"""
+Tool Instrumentation
+
+Per-tool call counts, errors, in-flight gauge, latency and response-size
+histograms for FastMCP servers, collected by a decorator:
+
+    tool_metrics = ToolMetrics(mcp_server.name)
+
+    @mcp_server.tool()
+    @tool_metrics.instrument
+    async def my_tool(...) -> str: ...
+
+install_metrics_endpoints() exposes the data as Prometheus text on
+GET /metrics and as JSON through a `get_server_stats` MCP tool.
+"""
+
+import functools
+import json
+import time
+from bisect import bisect_left
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Upper bounds (bytes) of the response-size histogram buckets
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216, 67108864)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class Histogram:
+    """Cumulative-bucket histogram (Prometheus semantics) with quantile estimates"""
+
+    __slots__ = ("bounds", "counts", "sum", "count", "max")
+
+    def __init__(self, bounds: Sequence[float]):
+        self.bounds = tuple(bounds)
+        # Last slot is the +Inf bucket
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+        if value > self.max:
+            self.max = value
+
+    def cumulative(self) -> List[int]:
+        """Counts of observations <= each bound, then the total (+Inf)"""
+        running = 0
+        result = []
+        for count in self.counts:
+            running += count
+            result.append(running)
+        return result
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        Estimate a quantile by linear interpolation inside its bucket, as
+        Prometheus' histogram_quantile() does, capped at the largest
+        observed value (which also covers the +Inf bucket).
+        """
+        if not self.count:
+            return None
+        rank = q * self.count
+        running = 0
+        for i, count in enumerate(self.counts):
+            if running + count >= rank and count:
+                if i == len(self.bounds):
+                    return self.max
+                lower = self.bounds[i - 1] if i else 0.0
+                return min(lower + (self.bounds[i] - lower) * (rank - running) / count, self.max)
+            running += count
+        return self.max
+
+
+class ToolStats:
+    """Counters and histograms for one tool"""
+
+    __slots__ = ("calls", "errors", "in_flight", "latency", "response_bytes")
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.response_bytes = Histogram(SIZE_BUCKETS)
+
+
+def _response_size(result: Any) -> int:
+    if isinstance(result, str):
+        # isascii() is O(1) in CPython; json.dumps output is ASCII by default
+        return len(result) if result.isascii() else len(result.encode("utf-8"))
+    if isinstance(result, (bytes, bytearray)):
+        return len(result)
+    return len(str(result))
+
+
+def _ms(seconds: Optional[float]) -> Optional[float]:
+    return round(seconds * 1000, 2) if seconds is not None else None
+
+
+def _is_error_result(result: Any) -> bool:
+    # Tools catch their own exceptions and return "Error: ..." strings
+    return isinstance(result, str) and result.startswith("Error")
+
+
+class ToolMetrics:
+    """
+    Per-tool metrics for one server.
+
+    Args:
+        server: Server name, used as the `server` label
+        clock: Monotonic clock (seconds)
+    """
+
+    def __init__(self, server: str, clock: Callable[[], float] = time.perf_counter):
+        self.server = server
+        self.tools: Dict[str, ToolStats] = {}
+        self.started_at = time.time()
+        self._clock = clock
+
+    def _stats(self, name: str) -> ToolStats:
+        stats = self.tools.get(name)
+        if stats is None:
+            stats = self.tools[name] = ToolStats()
+        return stats
+
+    def instrument(self, func: Callable) -> Callable:
+        """
+        Decorator recording calls, latency, in-flight count, response size
+        and errors of an async tool. functools.wraps keeps the signature and
+        docstring, so FastMCP derives the same tool schema.
+        """
+        stats = self._stats(func.__name__)
+        clock = self._clock
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            stats.calls += 1
+            stats.in_flight += 1
+            started = clock()
+            try:
+                result = await func(*args, **kwargs)
+            except BaseException:
+                stats.errors += 1
+                raise
+            else:
+                if _is_error_result(result):
+                    stats.errors += 1
+                stats.response_bytes.observe(_response_size(result))
+                return result
+            finally:
+                stats.in_flight -= 1
+                stats.latency.observe(clock() - started)
+
+        return wrapper
+
+    def snapshot(self) -> Dict[str, Any]:
+        """JSON-serializable view of all tool metrics"""
+        tools = {}
+        for name, stats in sorted(self.tools.items()):
+            latency = stats.latency
+            sizes = stats.response_bytes
+            tools[name] = {
+                "calls": stats.calls,
+                "errors": stats.errors,
+                "in_flight": stats.in_flight,
+                "latency_ms": {
+                    "avg": _ms(latency.sum / latency.count) if latency.count else None,
+                    "p50": _ms(latency.quantile(0.50)),
+                    "p95": _ms(latency.quantile(0.95)),
+                    "p99": _ms(latency.quantile(0.99)),
+                    "max": _ms(latency.max) if latency.count else None
+                },
+                "response_bytes": {
+                    "total": int(sizes.sum),
+                    "avg": int(sizes.sum / sizes.count) if sizes.count else None,
+                    "max": int(sizes.max)
+                }
+            }
+
+        return {
+            "server": self.server,
+            "uptime_seconds": round(time.time() - self.started_at, 1),
+            "total_calls": sum(stats.calls for stats in self.tools.values()),
+            "total_errors": sum(stats.errors for stats in self.tools.values()),
+            "tools": tools
+        }
+
+    def render_prometheus(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)"""
+        lines = []
+
+        def family(name: str, kind: str, help_text: str) -> None:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        def labels(tool: str, extra: str = "") -> str:
+            return f'{{server="{self.server}",tool="{tool}"{extra}}}'
+
+        def histogram(name: str, attr: str) -> None:
+            for tool, stats in sorted(self.tools.items()):
+                hist = getattr(stats, attr)
+                cumulative = hist.cumulative()
+                bounds = [f"{bound:g}" for bound in hist.bounds] + ["+Inf"]
+                for bound, count in zip(bounds, cumulative):
+                    le = f',le="{bound}"'
+                    lines.append(f"{name}_bucket{labels(tool, le)} {count}")
+                lines.append(f"{name}_sum{labels(tool)} {hist.sum:.6g}")
+                lines.append(f"{name}_count{labels(tool)} {hist.count}")
+
+        family("mcp_tool_calls_total", "counter", "Tool calls started")
+        for tool, stats in sorted(self.tools.items()):
+            lines.append(f"mcp_tool_calls_total{labels(tool)} {stats.calls}")
+
+        family("mcp_tool_errors_total", "counter", "Tool calls that raised or returned an error")
+        for tool, stats in sorted(self.tools.items()):
+            lines.append(f"mcp_tool_errors_total{labels(tool)} {stats.errors}")
+
+        family("mcp_tool_in_flight", "gauge", "Tool calls currently executing")
+        for tool, stats in sorted(self.tools.items()):
+            lines.append(f"mcp_tool_in_flight{labels(tool)} {stats.in_flight}")
+
+        family("mcp_tool_duration_seconds", "histogram", "Tool call latency")
+        histogram("mcp_tool_duration_seconds", "latency")
+
+        family("mcp_tool_response_bytes", "histogram", "Tool response size")
+        histogram("mcp_tool_response_bytes", "response_bytes")
+
+        family("mcp_server_uptime_seconds", "gauge", "Seconds since the server started")
+        lines.append(f'mcp_server_uptime_seconds{{server="{self.server}"}} {time.time() - self.started_at:.1f}')
+
+        return "\n".join(lines) + "\n"
+
+
+def install_metrics_endpoints(mcp_server, metrics: ToolMetrics) -> None:
+    """
+    Expose `metrics` on a FastMCP server: GET /metrics (Prometheus text) and
+    a `get_server_stats` tool returning the JSON snapshot.
+    """
+    from starlette.requests import Request
+    from starlette.responses import Response
+
+    @mcp_server.custom_route("/metrics", methods=["GET"])
+    async def prometheus_metrics(request: Request) -> Response:
+        return Response(metrics.render_prometheus(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+    @mcp_server.tool()
+    async def get_server_stats() -> str:
+        """
+        Per-tool statistics for this MCP server: call counts, errors, calls in
+        flight, latency (avg/p50/p95/p99 ms) and response sizes. Use it to
+        find hot tools and tail latency.
+        """
+        return json.dumps(metrics.snapshot(), indent=2)
@@ -0,0 +1,440 @@
+"""
+Chunked Log Archive
+
+Append-only on-disk format for incident logs. Rows (JSON-ready log dicts, as
+returned by get_raw_logs) are grouped into blocks of a few thousand rows,
+each compressed independently with zstd (optional `zstandard` package) or
+gzip. A footer index records, per block, the min/max timestamp, level counts
+and a bitmap of services present, so a time-window or service query only
+decompresses the blocks that can match.
+
+File layout:
+
+    MAGIC
+    block*        BLOCK_MAGIC, payload length (u32), codec-compressed JSON lines
+    footer        JSON index
+    trailer       footer length (u64), FOOTER_MAGIC
+
+Appending truncates the footer, writes new blocks and rewrites the footer,
+so the file is readable after every flush during a live incident. If a
+writer dies before writing the footer, the index is rebuilt by scanning
+the self-delimiting blocks.
+"""
+
+import gzip
+import json
+import os
+import struct
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Union
+
+try:
+    import zstandard
+except ImportError:  # optional: gzip is always available
+    zstandard = None
+
+MAGIC = b"LOGARCH1"
+BLOCK_MAGIC = b"BLK1"
+FOOTER_MAGIC = b"LOGIDX01"
+BLOCK_HEADER = struct.Struct(">4sI")
+TRAILER = struct.Struct(">Q8s")
+
+DEFAULT_BLOCK_ROWS = 4096
+LEVELS = ("INFO", "WARN", "ERROR")
+
+
+def default_codec() -> str:
+    """zstd when the zstandard package is installed, else gzip"""
+    return "zstd" if zstandard is not None else "gzip"
+
+
+def _compress(codec: str, data: bytes) -> bytes:
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("zstd codec requires the 'zstandard' package")
+        return zstandard.ZstdCompressor(level=3).compress(data)
+    if codec == "gzip":
+        return gzip.compress(data, compresslevel=6, mtime=0)
+    raise ValueError(f"Unknown codec: {codec}")
+
+
+def _decompress(codec: str, data: bytes) -> bytes:
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("Archive block is zstd-compressed; install the 'zstandard' package to read it")
+        return zstandard.ZstdDecompressor().decompress(data)
+    if codec == "gzip":
+        return gzip.decompress(data)
+    raise ValueError(f"Unknown codec: {codec}")
+
+
+def _detect_codec(payload: bytes) -> str:
+    # Used only when rebuilding a lost index
+    return "gzip" if payload[:2] == b"\x1f\x8b" else "zstd"
+
+
+def to_epoch(value: Union[str, float, int, datetime]) -> float:
+    """
+    Unix seconds from an ISO-8601 string, datetime or number. Naive
+    timestamps are taken as UTC.
+    """
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+@dataclass
+class BlockInfo:
+    """Footer index entry for one block"""
+    offset: int
+    length: int
+    codec: str
+    rows: int
+    min_ts: float
+    max_ts: float
+    levels: Dict[str, int]
+    service_bitmap: int
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "offset": self.offset, "length": self.length, "codec": self.codec, "rows": self.rows,
+            "min_ts": self.min_ts, "max_ts": self.max_ts, "levels": self.levels,
+            "service_bitmap": self.service_bitmap
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "BlockInfo":
+        return cls(**data)
+
+
+@dataclass
+class ArchiveIndex:
+    """Footer contents: block index plus the service names behind the bitmaps"""
+    blocks: List[BlockInfo] = field(default_factory=list)
+    services: List[str] = field(default_factory=list)
+
+    @property
+    def rows(self) -> int:
+        return sum(block.rows for block in self.blocks)
+
+    @property
+    def data_end(self) -> int:
+        """Offset just past the last block (where the footer starts)"""
+        if not self.blocks:
+            return len(MAGIC)
+        last = self.blocks[-1]
+        return last.offset + BLOCK_HEADER.size + last.length
+
+    def service_bit(self, service: str, add: bool = False) -> int:
+        if service not in self.services:
+            if not add:
+                return 0
+            self.services.append(service)
+        return 1 << self.services.index(service)
+
+    def to_bytes(self) -> bytes:
+        return json.dumps({
+            "version": 1,
+            "services": self.services,
+            "blocks": [block.to_dict() for block in self.blocks]
+        }, separators=(",", ":")).encode("utf-8")
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "ArchiveIndex":
+        footer = json.loads(data)
+        return cls([BlockInfo.from_dict(b) for b in footer["blocks"]], footer["services"])
+
+
+def _read_index(handle) -> ArchiveIndex:
+    """Read the footer index, rebuilding it by scanning blocks if it is missing or damaged"""
+    handle.seek(0, os.SEEK_END)
+    size = handle.tell()
+    handle.seek(0)
+    if handle.read(len(MAGIC)) != MAGIC:
+        raise ValueError("Not a log archive (bad magic)")
+
+    if size >= len(MAGIC) + TRAILER.size:
+        handle.seek(size - TRAILER.size)
+        footer_length, footer_magic = TRAILER.unpack(handle.read(TRAILER.size))
+        footer_start = size - TRAILER.size - footer_length
+        if footer_magic == FOOTER_MAGIC and footer_start >= len(MAGIC):
+            handle.seek(footer_start)
+            try:
+                index = ArchiveIndex.from_bytes(handle.read(footer_length))
+                if index.data_end == footer_start:
+                    return index
+            except (ValueError, KeyError, TypeError):
+                pass
+
+    return _scan_blocks(handle, size)
+
+
+def _scan_blocks(handle, size: int) -> ArchiveIndex:
+    """Rebuild the index from the blocks themselves, stopping at the first incomplete one"""
+    index = ArchiveIndex()
+    offset = len(MAGIC)
+    while offset + BLOCK_HEADER.size <= size:
+        handle.seek(offset)
+        magic, length = BLOCK_HEADER.unpack(handle.read(BLOCK_HEADER.size))
+        if magic != BLOCK_MAGIC or offset + BLOCK_HEADER.size + length > size:
+            break
+        payload = handle.read(length)
+        codec = _detect_codec(payload)
+        try:
+            rows = _decode_rows(codec, payload)
+        except Exception:
+            break
+        index.blocks.append(_describe_block(index, rows, offset, length, codec))
+        offset += BLOCK_HEADER.size + length
+    return index
+
+
+def _decode_rows(codec: str, payload: bytes) -> List[Dict[str, Any]]:
+    return [json.loads(line) for line in _decompress(codec, payload).splitlines() if line]
+
+
+def _describe_block(index: ArchiveIndex, rows: Sequence[Dict[str, Any]], offset: int,
+                    length: int, codec: str) -> BlockInfo:
+    levels = dict.fromkeys(LEVELS, 0)
+    bitmap = 0
+    timestamps = []
+    for row in rows:
+        level = row.get("level", "INFO")
+        levels[level] = levels.get(level, 0) + 1
+        bitmap |= index.service_bit(row.get("service", ""), add=True)
+        timestamps.append(to_epoch(row["timestamp"]))
+    return BlockInfo(offset, length, codec, len(rows), min(timestamps), max(timestamps), levels, bitmap)
+
+
+class LogArchiveWriter:
+    """
+    Append rows to an archive, creating it if needed.
+
+    Rows are buffered and written as a block every `block_rows` rows;
+    flush() writes a partial block and the footer so readers see every row
+    appended so far. Use as a context manager to flush on exit.
+
+    Args:
+        path: Archive file
+        block_rows: Rows per block
+        codec: 'zstd' or 'gzip' (default: zstd if available)
+    """
+
+    def __init__(self, path: Union[str, Path], block_rows: int = DEFAULT_BLOCK_ROWS,
+                 codec: Optional[str] = None):
+        self.path = Path(path)
+        self.block_rows = max(1, block_rows)
+        self.codec = codec or default_codec()
+        _compress(self.codec, b"")  # fail early on an unavailable codec
+        self._buffer: List[Dict[str, Any]] = []
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if self.path.exists() and self.path.stat().st_size > 0:
+            self._handle = open(self.path, "r+b")
+            self.index = _read_index(self._handle)
+        else:
+            self._handle = open(self.path, "w+b")
+            self._handle.write(MAGIC)
+            self.index = ArchiveIndex()
+        # Drop the old footer (or a torn trailing block); rewritten on flush
+        self._handle.truncate(self.index.data_end)
+        self._handle.seek(self.index.data_end)
+
+    @property
+    def rows(self) -> int:
+        """Rows written so far, including buffered ones"""
+        return self.index.rows + len(self._buffer)
+
+    @property
+    def max_ts(self) -> Optional[float]:
+        """Newest timestamp in the written blocks"""
+        return max((block.max_ts for block in self.index.blocks), default=None)
+
+    def append(self, row: Dict[str, Any]) -> None:
+        """Append one row (needs a 'timestamp'; 'level' and 'service' are indexed)"""
+        if "timestamp" not in row:
+            raise ValueError("Log rows need a 'timestamp'")
+        self._buffer.append(row)
+        if len(self._buffer) >= self.block_rows:
+            self._write_block()
+
+    def extend(self, rows: Iterable[Dict[str, Any]]) -> None:
+        for row in rows:
+            self.append(row)
+
+    def _write_block(self) -> None:
+        rows, self._buffer = self._buffer, []
+        if not rows:
+            return
+        data = "\n".join(json.dumps(row, separators=(",", ":")) for row in rows).encode("utf-8")
+        payload = _compress(self.codec, data)
+        offset = self.index.data_end
+        self._handle.seek(offset)
+        self._handle.write(BLOCK_HEADER.pack(BLOCK_MAGIC, len(payload)))
+        self._handle.write(payload)
+        self.index.blocks.append(_describe_block(self.index, rows, offset, len(payload), self.codec))
+
+    def flush(self) -> None:
+        """Write buffered rows and the footer, leaving a complete archive on disk"""
+        self._write_block()
+        footer = self.index.to_bytes()
+        self._handle.seek(self.index.data_end)
+        self._handle.write(footer)
+        self._handle.write(TRAILER.pack(len(footer), FOOTER_MAGIC))
+        self._handle.truncate()
+        self._handle.flush()
+        os.fsync(self._handle.fileno())
+        # Next block overwrites the footer
+        self._handle.seek(self.index.data_end)
+
+    def close(self) -> None:
+        if self._handle.closed:
+            return
+        self.flush()
+        self._handle.close()
+
+    def __enter__(self) -> "LogArchiveWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+@dataclass
+class ArchiveQueryResult:
+    """Matching rows plus how much of the archive had to be read"""
+    records: List[Dict[str, Any]]
+    blocks_total: int
+    blocks_read: int
+    rows_scanned: int
+    truncated: bool = False
+
+
+class LogArchive:
+    """
+    Read-only view of an archive. The index is loaded once; blocks are
+    decompressed on demand.
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        with open(self.path, "rb") as handle:
+            self.index = _read_index(handle)
+
+    @property
+    def rows(self) -> int:
+        return self.index.rows
+
+    def summary(self) -> Dict[str, Any]:
+        """Row count, time range, level totals and services, from the index alone"""
+        blocks = self.index.blocks
+        levels: Dict[str, int] = {}
+        for block in blocks:
+            for level, count in block.levels.items():
+                levels[level] = levels.get(level, 0) + count
+        return {
+            "rows": self.rows,
+            "blocks": len(blocks),
+            "file_size_bytes": self.path.stat().st_size,
+            "start": _iso(min((b.min_ts for b in blocks), default=None)),
+            "end": _iso(max((b.max_ts for b in blocks), default=None)),
+            "levels": levels,
+            "services": self.index.services,
+            "codecs": sorted({b.codec for b in blocks})
+        }
+
+    def candidate_blocks(self, start: Optional[float], end: Optional[float],
+                         services: Optional[Sequence[str]], levels: Optional[Sequence[str]]) -> List[BlockInfo]:
+        """Blocks whose index entry does not rule out a match"""
+        mask = None
+        if services:
+            mask = 0
+            for service in services:
+                mask |= self.index.service_bit(service)
+        return [
+            block for block in self.index.blocks
+            if (start is None or block.max_ts >= start)
+            and (end is None or block.min_ts <= end)
+            and (mask is None or block.service_bitmap & mask)
+            and (not levels or any(block.levels.get(level) for level in levels))
+        ]
+
+    def read_block(self, block: BlockInfo, handle=None) -> List[Dict[str, Any]]:
+        if handle is None:
+            with open(self.path, "rb") as handle:
+                return self.read_block(block, handle)
+        handle.seek(block.offset + BLOCK_HEADER.size)
+        return _decode_rows(block.codec, handle.read(block.length))
+
+    def query(self, start: Union[str, float, None] = None, end: Union[str, float, None] = None,
+              services: Optional[Sequence[str]] = None, levels: Optional[Sequence[str]] = None,
+              limit: Optional[int] = None) -> ArchiveQueryResult:
+        """
+        Rows within [start, end] from the given services and levels, in
+        archive (append) order. Blocks whose index entry rules them out are
+        not read.
+
+        Args:
+            start: Earliest timestamp (ISO string or unix seconds)
+            end: Latest timestamp (ISO string or unix seconds)
+            services: Only these services
+            levels: Only these levels
+            limit: Stop after this many matching rows
+        """
+        start_ts = to_epoch(start) if start is not None else None
+        end_ts = to_epoch(end) if end is not None else None
+        service_set = set(services) if services else None
+        level_set = set(levels) if levels else None
+
+        blocks = self.candidate_blocks(start_ts, end_ts, services, levels)
+        records: List[Dict[str, Any]] = []
+        blocks_read = rows_scanned = 0
+        truncated = False
+
+        with open(self.path, "rb") as handle:
+            for block in blocks:
+                blocks_read += 1
+                # Rows of blocks entirely inside the window need no timestamp check
+                check_time = ((start_ts is not None and block.min_ts < start_ts)
+                              or (end_ts is not None and block.max_ts > end_ts))
+                for row in self.read_block(block, handle):
+                    rows_scanned += 1
+                    if service_set is not None and row.get("service") not in service_set:
+                        continue
+                    if level_set is not None and row.get("level") not in level_set:
+                        continue
+                    if check_time:
+                        ts = to_epoch(row["timestamp"])
+                        if (start_ts is not None and ts < start_ts) or (end_ts is not None and ts > end_ts):
+                            continue
+                    if limit is not None and len(records) >= limit:
+                        truncated = True
+                        break
+                    records.append(row)
+                if truncated:
+                    break
+
+        return ArchiveQueryResult(records, len(self.index.blocks), blocks_read, rows_scanned, truncated)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        yield from iter_block_rows(self.path, self.index.blocks)
+
+
+def iter_block_rows(path: Union[str, Path], blocks: Iterable[BlockInfo]) -> Iterator[Dict[str, Any]]:
+    """Rows of the given blocks, in order (no index read; used by worker processes)"""
+    with open(path, "rb") as handle:
+        for block in blocks:
+            handle.seek(block.offset + BLOCK_HEADER.size)
+            yield from _decode_rows(block.codec, handle.read(block.length))
+
+
+def _iso(ts: Optional[float]) -> Optional[str]:
+    if ts is None:
+        return None
+    return datetime.fromtimestamp(ts, tz=timezone.utc).replace(tzinfo=None).isoformat()
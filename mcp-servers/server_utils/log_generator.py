@@ -0,0 +1,379 @@
+"""
+Vectorized Synthetic Log Generator
+
+Generates realistic request logs as numpy columns, millions of rows per
+second, for incident rehearsal:
+- Timestamps follow a diurnal traffic curve (inverse-transform sampling of a
+  non-homogeneous Poisson process, so rows come out already sorted)
+- Configurable service mix, endpoints and log-normal latency per service
+- Background error rate, random short error bursts, and injected incidents
+  that ramp up error rate and latency on one service
+- Seedable: the same config and seed always produce the same rows
+
+A LogBatch keeps categorical columns as small integer codes plus
+vocabularies, renders JSON-ready records on demand, and can be written to /
+read from a compressed columnar .npz file for replay.
+"""
+
+import json
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+LEVELS = ("INFO", "WARN", "ERROR")
+LEVEL_INFO, LEVEL_WARN, LEVEL_ERROR = range(3)
+
+# error_code -> (message, HTTP status)
+ERROR_DETAILS = {
+    "AUTH_TIMEOUT": ("Authentication failed: token validation timeout", 504),
+    "REDIS_TIMEOUT": ("Redis connection failed: ETIMEDOUT", 503),
+    "DB_POOL_EXHAUSTED": ("Database query timeout: connection pool exhausted", 503),
+    "PAYMENT_GATEWAY_TIMEOUT": ("Payment processing failed: gateway timeout", 504),
+    "UPSTREAM_TIMEOUT": ("Upstream service timeout", 504),
+    "INTERNAL_ERROR": ("Unhandled exception while processing request", 500),
+}
+
+# error_code -> stack trace template; {ms} is the request latency, {n} a per-user number
+STACK_TRACES = {
+    "AUTH_TIMEOUT": "TimeoutError: Token validation exceeded {ms}ms limit (issuer idp-{n}.auth.internal)",
+    "REDIS_TIMEOUT": "ConnectionError: redis-cluster-0{n}.internal:6379 ETIMEDOUT after {ms}ms",
+    "DB_POOL_EXHAUSTED": "PoolTimeoutError: No connection available after {ms}ms (pool size 100, waiting {n})",
+    "PAYMENT_GATEWAY_TIMEOUT": "GatewayTimeout: POST https://api.stripe.com/v1/charges timed out after {ms}ms",
+    "UPSTREAM_TIMEOUT": "UpstreamTimeout: upstream 10.0.{n}.12:8080 did not respond within {ms}ms",
+    "INTERNAL_ERROR": "RuntimeError: Unexpected state in request handler (worker {n})",
+}
+
+LEVEL_MESSAGES = {
+    LEVEL_INFO: "Request processed successfully",
+    LEVEL_WARN: "Request processing slow",
+}
+
+# Resolution of the traffic-rate grid used for timestamp sampling
+MAX_RATE_GRID_POINTS = 100_000
+
+
+@dataclass(frozen=True)
+class ServiceProfile:
+    """Traffic share, endpoints, latency and error behaviour of one service"""
+    name: str
+    weight: float
+    endpoints: Tuple[str, ...]
+    latency_median_ms: float
+    latency_sigma: float = 0.5
+    error_rate: float = 0.002
+    error_codes: Tuple[str, ...] = ("INTERNAL_ERROR",)
+
+
+@dataclass(frozen=True)
+class InjectedIncident:
+    """
+    An incident on one service.
+
+    Attributes:
+        service: Affected service
+        error_code: Error code of the incident's errors
+        start_offset: Start in seconds from the dataset start (negative: from the end)
+        duration: Seconds the incident lasts
+        error_rate: Error probability at full severity
+        latency_multiplier: Latency factor at full severity
+        ramp_seconds: Time to reach full severity
+    """
+    service: str
+    error_code: str
+    start_offset: float
+    duration: float
+    error_rate: float = 0.3
+    latency_multiplier: float = 5.0
+    ramp_seconds: float = 120.0
+
+
+DEFAULT_SERVICES = (
+    ServiceProfile("api-gateway", 0.30, ("/api/v1/users", "/api/v1/users/profile", "/api/v1/orders"), 60, 0.45,
+                   0.002, ("UPSTREAM_TIMEOUT", "DB_POOL_EXHAUSTED")),
+    ServiceProfile("auth-service", 0.15, ("/api/v1/login", "/api/v1/token/refresh"), 45, 0.4,
+                   0.003, ("AUTH_TIMEOUT",)),
+    ServiceProfile("session-store", 0.10, ("/api/v1/session/validate",), 8, 0.5,
+                   0.001, ("REDIS_TIMEOUT",)),
+    ServiceProfile("product-service", 0.15, ("/api/v1/products", "/api/v1/recommendations"), 70, 0.5),
+    ServiceProfile("user-service", 0.10, ("/api/v1/users",), 50, 0.45),
+    ServiceProfile("search-service", 0.12, ("/api/v1/search",), 120, 0.6),
+    ServiceProfile("payment-service", 0.08, ("/api/v1/payments/process",), 250, 0.5,
+                   0.004, ("PAYMENT_GATEWAY_TIMEOUT",)),
+)
+
+
+@dataclass(frozen=True)
+class LogGeneratorConfig:
+    """
+    Generator settings.
+
+    Attributes:
+        seed: RNG seed (None: nondeterministic)
+        services: Service mix
+        diurnal_amplitude: Relative traffic swing around the daily mean (0-1)
+        peak_hour_utc: Hour of peak traffic
+        slow_threshold_ms: Successful requests slower than this log as WARN
+        burst_rate_per_hour: Mean number of random error bursts per hour
+        burst_duration: Seconds each burst lasts
+        burst_error_rate: Error probability inside a burst (on one service)
+        error_latency_factor: Latency multiplier for failed requests
+        incidents: Injected incidents
+        user_population: Distinct user IDs
+    """
+    seed: Optional[int] = None
+    services: Tuple[ServiceProfile, ...] = DEFAULT_SERVICES
+    diurnal_amplitude: float = 0.6
+    peak_hour_utc: float = 15.0
+    slow_threshold_ms: float = 800.0
+    burst_rate_per_hour: float = 0.5
+    burst_duration: float = 60.0
+    burst_error_rate: float = 0.2
+    error_latency_factor: float = 4.0
+    incidents: Tuple[InjectedIncident, ...] = ()
+    user_population: int = 50_000
+
+
+def stable_seed(key: str) -> int:
+    """Deterministic seed from a string (e.g. an incident ID), stable across processes"""
+    return zlib.crc32(key.encode("utf-8"))
+
+
+class LogBatch:
+    """
+    Columnar log rows.
+
+    Columns (all numpy arrays of equal length, sorted by ts):
+        ts: float64 unix seconds
+        level: uint8 index into LEVELS
+        service: uint8 index into `services`
+        endpoint: uint16 index into `endpoints`
+        error_code: int16 index into `error_codes` (-1: none)
+        status: uint16 HTTP status
+        response_time_ms: float32
+        user_id: uint32
+    """
+
+    COLUMNS = ("ts", "level", "service", "endpoint", "error_code", "status", "response_time_ms", "user_id")
+
+    def __init__(self, columns: Dict[str, np.ndarray], services: Sequence[str],
+                 endpoints: Sequence[str], error_codes: Sequence[str]):
+        self.columns = columns
+        self.services = list(services)
+        self.endpoints = list(endpoints)
+        self.error_codes = list(error_codes)
+
+    def __len__(self) -> int:
+        return len(self.columns["ts"])
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.columns[name]
+
+    def vocabularies(self) -> Dict[str, List[str]]:
+        return {"services": self.services, "endpoints": self.endpoints, "error_codes": self.error_codes}
+
+    def select(self, mask_or_slice: Union[np.ndarray, slice]) -> "LogBatch":
+        """Rows matching a boolean mask or slice (vocabularies are shared)"""
+        columns = {name: values[mask_or_slice] for name, values in self.columns.items()}
+        return LogBatch(columns, self.services, self.endpoints, self.error_codes)
+
+    def service_mask(self, service: str) -> np.ndarray:
+        """Boolean mask of rows from `service` (all False if unknown)"""
+        if service not in self.services:
+            return np.zeros(len(self), dtype=bool)
+        return self.columns["service"] == self.services.index(service)
+
+    def level_counts(self) -> Dict[str, int]:
+        counts = np.bincount(self.columns["level"], minlength=len(LEVELS))
+        return {level: int(count) for level, count in zip(LEVELS, counts)}
+
+    def to_records(self, newest_first: bool = True, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Render rows as JSON-ready dicts (the get_raw_logs entry format).
+
+        Args:
+            newest_first: Order rows by descending timestamp
+            limit: Maximum rows rendered
+        """
+        order = slice(None, None, -1) if newest_first else slice(None)
+        cols = {name: values[order][:limit] for name, values in self.columns.items()}
+        timestamps = np.datetime_as_string((cols["ts"] * 1e6).astype("datetime64[us]"), unit="us").tolist()
+
+        # Plain Python lists and lookup tables: per-element numpy scalar access is ~10x slower
+        services = self.services
+        endpoints = self.endpoints
+        error_codes = self.error_codes
+        error_messages = [ERROR_DETAILS[code][0] for code in error_codes]
+        stack_traces = [STACK_TRACES[code] for code in error_codes]
+        latencies = cols["response_time_ms"].astype(np.int64).tolist()
+
+        records = []
+        for timestamp, level, service, endpoint, code, latency, user, status in zip(
+                timestamps, cols["level"].tolist(), cols["service"].tolist(), cols["endpoint"].tolist(),
+                cols["error_code"].tolist(), latencies, cols["user_id"].tolist(), cols["status"].tolist()):
+            entry = {
+                "timestamp": timestamp,
+                "level": LEVELS[level],
+                "service": services[service],
+                "message": error_messages[code] if code >= 0 else LEVEL_MESSAGES[level],
+                "endpoint": endpoints[endpoint],
+                "response_time_ms": latency,
+                "user_id": f"user_{user}",
+                "status_code": status,
+            }
+            if code >= 0:
+                entry["error_code"] = error_codes[code]
+                entry["stack_trace"] = stack_traces[code].format(ms=latency, n=user % 8)
+            records.append(entry)
+        return records
+
+
+def _sample_timestamps(rng: np.random.Generator, rows: int, start_ts: float, end_ts: float,
+                       config: LogGeneratorConfig) -> np.ndarray:
+    """Sorted timestamps following the diurnal rate curve"""
+    duration = end_ts - start_ts
+    points = int(min(MAX_RATE_GRID_POINTS, max(1, duration)))
+    step = duration / points
+    centers = start_ts + (np.arange(points) + 0.5) * step
+    hours = (centers % 86400) / 3600
+    rate = 1.0 + config.diurnal_amplitude * np.cos(2 * np.pi * (hours - config.peak_hour_utc) / 24)
+    rate = np.maximum(rate, 1e-3)
+
+    cumulative = np.cumsum(rate)
+    # Sorted uniforms through the inverse CDF give sorted timestamps directly
+    targets = np.sort(rng.random(rows)) * cumulative[-1]
+    bins = np.minimum(np.searchsorted(cumulative, targets, side="right"), points - 1)
+    previous = np.where(bins > 0, cumulative[bins - 1], 0.0)
+    within = np.clip((targets - previous) / rate[bins], 0.0, 1.0)
+    return start_ts + (bins + within) * step
+
+
+def generate_logs(rows: int, start_ts: float, end_ts: float,
+                  config: Optional[LogGeneratorConfig] = None) -> LogBatch:
+    """
+    Generate `rows` log rows between start_ts and end_ts.
+
+    Args:
+        rows: Number of rows
+        start_ts: Window start (unix seconds)
+        end_ts: Window end (unix seconds)
+        config: Generator settings (default: LogGeneratorConfig())
+
+    Returns:
+        LogBatch sorted by timestamp
+
+    Raises:
+        ValueError: On an empty window, negative row count or unknown incident service
+    """
+    config = config or LogGeneratorConfig()
+    if end_ts <= start_ts:
+        raise ValueError("end_ts must be after start_ts")
+    if rows < 0:
+        raise ValueError("rows must be non-negative")
+
+    rng = np.random.default_rng(config.seed)
+    services = config.services
+    service_names = [s.name for s in services]
+
+    endpoints: List[str] = []
+    endpoint_offset, endpoint_count = [], []
+    for service in services:
+        endpoint_offset.append(len(endpoints))
+        endpoint_count.append(len(service.endpoints))
+        endpoints.extend(service.endpoints)
+
+    error_codes = list(ERROR_DETAILS)
+    service_codes = [[error_codes.index(code) for code in s.error_codes] for s in services]
+    code_offset = np.cumsum([0] + [len(codes) for codes in service_codes[:-1]])
+    code_count = np.array([len(codes) for codes in service_codes])
+    code_table = np.array([code for codes in service_codes for code in codes], dtype=np.int16)
+
+    ts = _sample_timestamps(rng, rows, start_ts, end_ts, config)
+
+    weights = np.array([s.weight for s in services], dtype=np.float64)
+    service = rng.choice(len(services), size=rows, p=weights / weights.sum()).astype(np.uint8)
+
+    endpoint = (np.array(endpoint_offset)[service]
+                + rng.integers(0, 1 << 30, rows) % np.array(endpoint_count)[service]).astype(np.uint16)
+
+    median = np.array([s.latency_median_ms for s in services])[service]
+    sigma = np.array([s.latency_sigma for s in services])[service]
+    latency = median * np.exp(sigma * rng.standard_normal(rows))
+
+    error_prob = np.array([s.error_rate for s in services])[service]
+    incident_code = np.full(rows, -1, dtype=np.int16)
+
+    # Random short bursts of errors, each on one service
+    hours = (end_ts - start_ts) / 3600
+    for _ in range(rng.poisson(config.burst_rate_per_hour * hours)):
+        burst_start = rng.uniform(start_ts, end_ts)
+        lo, hi = np.searchsorted(ts, [burst_start, burst_start + config.burst_duration])
+        burst_service = rng.integers(len(services))
+        window = error_prob[lo:hi]
+        hit = service[lo:hi] == burst_service
+        window[hit] = np.maximum(window[hit], config.burst_error_rate)
+
+    for incident in config.incidents:
+        if incident.service not in service_names:
+            raise ValueError(f"Unknown incident service: {incident.service}")
+        begin = (end_ts if incident.start_offset < 0 else start_ts) + incident.start_offset
+        lo, hi = np.searchsorted(ts, [begin, begin + incident.duration])
+        hit = np.flatnonzero(service[lo:hi] == service_names.index(incident.service)) + lo
+        severity = np.clip((ts[hit] - begin) / max(incident.ramp_seconds, 1e-9), 0.0, 1.0)
+        error_prob[hit] = np.maximum(error_prob[hit], incident.error_rate * severity)
+        latency[hit] *= 1.0 + (incident.latency_multiplier - 1.0) * severity
+        incident_code[hit] = error_codes.index(incident.error_code)
+
+    is_error = rng.random(rows) < error_prob
+    error_code = np.full(rows, -1, dtype=np.int16)
+    error_rows = np.flatnonzero(is_error)
+    error_services = service[error_rows]
+    background_codes = code_table[code_offset[error_services] + rng.integers(0, 1 << 30, len(error_rows)) % code_count[error_services]]
+    error_code[error_rows] = np.where(incident_code[error_rows] >= 0, incident_code[error_rows], background_codes)
+    latency[error_rows] *= config.error_latency_factor
+
+    level = np.full(rows, LEVEL_INFO, dtype=np.uint8)
+    level[latency > config.slow_threshold_ms] = LEVEL_WARN
+    level[is_error] = LEVEL_ERROR
+
+    status_table = np.array([ERROR_DETAILS[code][1] for code in error_codes], dtype=np.uint16)
+    status = np.full(rows, 200, dtype=np.uint16)
+    status[error_rows] = status_table[error_code[error_rows]]
+
+    columns = {
+        "ts": ts,
+        "level": level,
+        "service": service,
+        "endpoint": endpoint,
+        "error_code": error_code,
+        "status": status,
+        "response_time_ms": latency.astype(np.float32),
+        "user_id": rng.integers(0, config.user_population, rows, dtype=np.uint32),
+    }
+    return LogBatch(columns, service_names, endpoints, error_codes)
+
+
+def write_columnar(batch: LogBatch, path: Union[str, Path]) -> Path:
+    """
+    Write a batch as a compressed columnar .npz file (one array per column,
+    vocabularies as JSON). Readable without pickle.
+
+    Returns:
+        Path written (numpy appends .npz if missing)
+    """
+    path = Path(path)
+    if path.suffix != ".npz":
+        path = path.with_suffix(path.suffix + ".npz")
+    path.parent.mkdir(parents=True, exist_ok=True)
+    np.savez_compressed(path, vocabularies=np.array(json.dumps(batch.vocabularies())), **batch.columns)
+    return path
+
+
+def read_columnar(path: Union[str, Path]) -> LogBatch:
+    """Load a batch written by write_columnar"""
+    with np.load(path, allow_pickle=False) as data:
+        vocab = json.loads(str(data["vocabularies"]))
+        columns = {name: data[name] for name in LogBatch.COLUMNS}
+    return LogBatch(columns, vocab["services"], vocab["endpoints"], vocab["error_codes"])
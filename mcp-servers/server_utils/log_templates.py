@@ -0,0 +1,235 @@
+"""
+Log Template Mining
+
+Streaming Drain-style template miner: clusters free-text log messages such
+as "redis-cluster-03.internal:6379 ETIMEDOUT after 3120ms" into templates
+like "redis-cluster-<*>.internal:<*> ETIMEDOUT after <*>ms" in one pass,
+without relying on an error_code field.
+
+- Variable-looking tokens (numbers, hex, IPs, UUIDs) are masked first
+- A fixed-depth prefix tree routes each message by token count and leading
+  tokens to a small list of candidate clusters
+- The most similar cluster above `similarity` absorbs the message (differing
+  tokens become <*>), otherwise a new cluster starts
+- Memory is bounded: tree fan-out is capped (overflow goes to a <*> child)
+  and the least recently matched clusters are evicted past `max_clusters`
+
+TemplateMinerCache keeps one learned tree per service so repeated calls
+reuse and refine the same templates.
+"""
+
+import re
+import time
+from collections import Counter, OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+WILDCARD = "<*>"
+
+# (pattern, replacement) applied before tokenizing; order matters
+MASKS = (
+    (re.compile(r"\b[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}\b", re.I), WILDCARD),
+    (re.compile(r"\b\d{1,3}(?:\.\d{1,3}){3}(?::\d+)?\b"), WILDCARD),
+    (re.compile(r"\b0x[0-9a-f]+\b", re.I), WILDCARD),
+    (re.compile(r"\b[0-9a-f]{16,}\b", re.I), WILDCARD),
+    (re.compile(r"(?<![A-Za-z])-?\d+(?:\.\d+)?"), WILDCARD),
+)
+
+
+def mask_message(message: str) -> str:
+    for pattern, replacement in MASKS:
+        message = pattern.sub(replacement, message)
+    return message
+
+
+def tokenize(message: str) -> List[str]:
+    return mask_message(message).split()
+
+
+class LogCluster:
+    """One template with its match count and a few example IDs"""
+
+    __slots__ = ("cluster_id", "tokens", "count", "examples", "first_seen", "last_seen")
+
+    def __init__(self, cluster_id: int, tokens: List[str]):
+        self.cluster_id = cluster_id
+        self.tokens = tokens
+        self.count = 0
+        self.examples: List[Any] = []
+        self.first_seen: Optional[str] = None
+        self.last_seen: Optional[str] = None
+
+    @property
+    def template(self) -> str:
+        return " ".join(self.tokens)
+
+
+class _Node:
+    __slots__ = ("children", "clusters")
+
+    def __init__(self):
+        self.children: Dict[str, "_Node"] = {}
+        self.clusters: List[LogCluster] = []
+
+
+class TemplateMiner:
+    """
+    Drain-style streaming template miner.
+
+    Args:
+        depth: Prefix-tree depth (token-count level + depth-2 leading tokens)
+        similarity: Minimum fraction of equal tokens to join a cluster
+        max_children: Fan-out cap per tree node
+        max_clusters: Clusters kept before least-recently-matched eviction
+        max_examples: Example IDs kept per cluster
+    """
+
+    def __init__(self, depth: int = 4, similarity: float = 0.5, max_children: int = 100,
+                 max_clusters: int = 1000, max_examples: int = 3):
+        self.depth = max(3, depth)
+        self.similarity = similarity
+        self.max_children = max_children
+        self.max_clusters = max_clusters
+        self.max_examples = max_examples
+        self.root = _Node()
+        # cluster_id -> (cluster, leaf node), in least-recently-matched order
+        self.clusters: "OrderedDict[int, Tuple[LogCluster, _Node]]" = OrderedDict()
+        self.messages = 0
+        self.evicted = 0
+        self._next_id = 1
+        self.last_used = time.monotonic()
+
+    def _leaf(self, tokens: List[str], create: bool) -> Optional[_Node]:
+        node = self.root.children.get(str(len(tokens)))
+        if node is None:
+            if not create:
+                return None
+            node = self.root.children[str(len(tokens))] = _Node()
+
+        for token in tokens[:self.depth - 2]:
+            # Tokens containing digits are likely variables; route them together
+            key = WILDCARD if any(c.isdigit() for c in token) else token
+            child = node.children.get(key) or node.children.get(WILDCARD)
+            if child is None:
+                if not create:
+                    return None
+                if len(node.children) >= self.max_children - 1 and key != WILDCARD:
+                    key = WILDCARD
+                child = node.children.setdefault(key, _Node())
+            node = child
+        return node
+
+    @staticmethod
+    def _score(template: List[str], tokens: List[str]) -> Tuple[float, int]:
+        equal = wildcards = 0
+        for a, b in zip(template, tokens):
+            if a == WILDCARD:
+                wildcards += 1
+            elif a == b:
+                equal += 1
+        return equal / len(tokens), wildcards
+
+    def _best_match(self, leaf: _Node, tokens: List[str]) -> Optional[LogCluster]:
+        best, best_score = None, (-1.0, -1)
+        for cluster in leaf.clusters:
+            score = self._score(cluster.tokens, tokens)
+            if score > best_score:
+                best, best_score = cluster, score
+        return best if best is not None and best_score[0] >= self.similarity else None
+
+    def add(self, message: str, example_id: Any = None, timestamp: Optional[str] = None) -> LogCluster:
+        """Add one message; returns the cluster it joined or created"""
+        self.messages += 1
+        self.last_used = time.monotonic()
+        tokens = tokenize(message) or [""]
+        leaf = self._leaf(tokens, create=True)
+        cluster = self._best_match(leaf, tokens)
+
+        if cluster is None:
+            cluster = LogCluster(self._next_id, tokens)
+            self._next_id += 1
+            leaf.clusters.append(cluster)
+            self.clusters[cluster.cluster_id] = (cluster, leaf)
+            if len(self.clusters) > self.max_clusters:
+                self._evict()
+        else:
+            cluster.tokens = [a if a == b else WILDCARD for a, b in zip(cluster.tokens, tokens)]
+            self.clusters.move_to_end(cluster.cluster_id)
+
+        cluster.count += 1
+        if example_id is not None and len(cluster.examples) < self.max_examples:
+            cluster.examples.append(example_id)
+        if timestamp is not None:
+            cluster.first_seen = cluster.first_seen or timestamp
+            cluster.last_seen = timestamp
+        return cluster
+
+    def match(self, message: str) -> Optional[LogCluster]:
+        """Cluster a message would join, without learning from it"""
+        tokens = tokenize(message) or [""]
+        leaf = self._leaf(tokens, create=False)
+        return self._best_match(leaf, tokens) if leaf is not None else None
+
+    def _evict(self) -> None:
+        cluster_id, (cluster, leaf) = self.clusters.popitem(last=False)
+        leaf.clusters.remove(cluster)
+        self.evicted += 1
+
+    def templates(self, top: Optional[int] = None) -> List[LogCluster]:
+        """Clusters by descending count"""
+        ordered = sorted((c for c, _ in self.clusters.values()), key=lambda c: (-c.count, c.cluster_id))
+        return ordered[:top]
+
+
+class TemplateMinerCache:
+    """
+    One TemplateMiner per service, reused across calls. Least recently used
+    services are dropped past `max_services`.
+    """
+
+    def __init__(self, max_services: int = 64, **miner_options):
+        self.max_services = max_services
+        self.miner_options = miner_options
+        self._miners: "OrderedDict[str, TemplateMiner]" = OrderedDict()
+
+    def get(self, service: str) -> TemplateMiner:
+        miner = self._miners.get(service)
+        if miner is None:
+            miner = self._miners[service] = TemplateMiner(**self.miner_options)
+            while len(self._miners) > self.max_services:
+                self._miners.popitem(last=False)
+        else:
+            self._miners.move_to_end(service)
+        return miner
+
+    def services(self) -> List[str]:
+        return list(self._miners)
+
+    def clear(self, service: Optional[str] = None) -> None:
+        if service is None:
+            self._miners.clear()
+        else:
+            self._miners.pop(service, None)
+
+    def mine(self, rows: Iterable[Dict[str, Any]], fields: Tuple[str, ...] = ("message",),
+             id_field: Optional[str] = None) -> Dict[str, Counter]:
+        """
+        Feed rows to their service's miner in one pass.
+
+        Args:
+            rows: Log dicts
+            fields: Text fields mined (joined with ' | ' when several are present)
+            id_field: Row field used as example ID (default: row position)
+
+        Returns:
+            service -> Counter of cluster_id matches from these rows only
+        """
+        counts: Dict[str, Counter] = {}
+        for position, row in enumerate(rows):
+            text = " | ".join(str(row[f]) for f in fields if row.get(f))
+            if not text:
+                continue
+            service = row.get("service", "unknown")
+            example_id = row.get(id_field, position) if id_field else position
+            cluster = self.get(service).add(text, example_id, row.get("timestamp"))
+            counts.setdefault(service, Counter())[cluster.cluster_id] += 1
+        return counts
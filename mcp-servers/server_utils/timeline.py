@@ -0,0 +1,224 @@
+"""
+Change Timeline and Error Correlation
+
+- EventTimeline: deployments/config changes with an interval index (starts
+  kept sorted, plus a running max of end times) for fast overlap queries
+- ErrorHistogram: per-service error counts in fixed-width buckets with lazily
+  maintained prefix sums, so any window count is O(1) over weeks of history
+- correlate_changes: ranks candidate changes for an error spike by the lag
+  between change and spike and by the error increase on the changed service
+"""
+
+import math
+from array import array
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional
+
+
+@dataclass
+class TimelineEvent:
+    """A change that could explain an incident (deployment, config change, ...)"""
+    event_id: str
+    kind: str
+    service: str
+    start_ts: float
+    end_ts: Optional[float] = None
+    version: Optional[str] = None
+    metadata: Dict[str, Any] = field(default_factory=dict)
+
+    def __post_init__(self):
+        if self.end_ts is None:
+            self.end_ts = self.start_ts
+
+
+class EventTimeline:
+    """
+    Interval index over change events.
+
+    Events are kept sorted by start time alongside a prefix maximum of end
+    times. An overlap query bisects on start and walks backwards only while
+    an earlier event could still reach into the window.
+    """
+
+    def __init__(self):
+        self._starts: List[float] = []
+        self._events: List[TimelineEvent] = []
+        self._max_end: List[float] = []
+        self._by_id: Dict[str, TimelineEvent] = {}
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+    def add(self, event: TimelineEvent) -> None:
+        """Insert an event (replacing any event with the same ID)"""
+        if event.event_id in self._by_id:
+            self.remove(event.event_id)
+
+        i = bisect_right(self._starts, event.start_ts)
+        self._starts.insert(i, event.start_ts)
+        self._events.insert(i, event)
+        self._by_id[event.event_id] = event
+        self._rebuild_max_end(i)
+
+    def remove(self, event_id: str) -> None:
+        """Remove an event by ID (no-op if unknown)"""
+        event = self._by_id.pop(event_id, None)
+        if event is None:
+            return
+        i = self._events.index(event)
+        del self._starts[i]
+        del self._events[i]
+        del self._max_end[i]
+        self._rebuild_max_end(i)
+
+    def get(self, event_id: str) -> Optional[TimelineEvent]:
+        return self._by_id.get(event_id)
+
+    def find_version(self, version: str) -> Optional[TimelineEvent]:
+        """Most recent event for a version string"""
+        for event in reversed(self._events):
+            if event.version == version:
+                return event
+        return None
+
+    def _rebuild_max_end(self, start_index: int) -> None:
+        del self._max_end[start_index:]
+        running = self._max_end[-1] if self._max_end else -math.inf
+        for event in self._events[start_index:]:
+            running = max(running, event.end_ts)
+            self._max_end.append(running)
+
+    def overlapping(self, start: float, end: float, kinds: Optional[Iterable[str]] = None) -> List[TimelineEvent]:
+        """
+        Events whose [start_ts, end_ts] intersects [start, end].
+
+        Args:
+            start: Window start (unix seconds)
+            end: Window end (unix seconds)
+            kinds: Optional filter on event kind
+
+        Returns:
+            Matching events in start order
+        """
+        kinds = set(kinds) if kinds else None
+        hi = bisect_right(self._starts, end)
+        matches = []
+        i = hi - 1
+        while i >= 0 and self._max_end[i] >= start:
+            event = self._events[i]
+            if event.end_ts >= start and (kinds is None or event.kind in kinds):
+                matches.append(event)
+            i -= 1
+        matches.reverse()
+        return matches
+
+    def starting_between(self, start: float, end: float) -> List[TimelineEvent]:
+        """Events that started in [start, end]"""
+        return self._events[bisect_left(self._starts, start):bisect_right(self._starts, end)]
+
+
+class ErrorHistogram:
+    """
+    Fixed-width bucketed error counts for one service.
+
+    Buckets live in a contiguous array('d') starting at `origin`. Prefix sums
+    are brought up to date lazily from the first modified bucket, so live
+    appends stay cheap and range counts are O(1).
+    """
+
+    def __init__(self, origin: float, bucket_seconds: float = 60.0):
+        self.origin = origin - (origin % bucket_seconds)
+        self.bucket_seconds = bucket_seconds
+        self._counts = array("d")
+        self._prefix = array("d", [0.0])
+        self._dirty_from: Optional[int] = None
+
+    def _index(self, ts: float) -> int:
+        return int((ts - self.origin) // self.bucket_seconds)
+
+    def add(self, ts: float, count: float = 1.0) -> None:
+        """Add `count` errors at `ts` (timestamps before origin are ignored)"""
+        index = self._index(ts)
+        if index < 0 or not count:
+            return
+        if index >= len(self._counts):
+            self._counts.extend([0.0] * (index + 1 - len(self._counts)))
+        self._counts[index] += count
+        if self._dirty_from is None or index < self._dirty_from:
+            self._dirty_from = index
+
+    def _prefix_sums(self) -> array:
+        if self._dirty_from is not None:
+            prefix = self._prefix
+            del prefix[self._dirty_from + 1:]
+            running = prefix[-1]
+            for value in self._counts[self._dirty_from:]:
+                running += value
+                prefix.append(running)
+            self._dirty_from = None
+        return self._prefix
+
+    def count(self, start: float, end: float) -> float:
+        """Errors in buckets overlapping [start, end)"""
+        prefix = self._prefix_sums()
+        lo = min(max(self._index(start), 0), len(prefix) - 1)
+        hi = min(max(self._index(end - 1e-9) + 1, 0), len(prefix) - 1)
+        return prefix[hi] - prefix[lo] if hi > lo else 0.0
+
+
+def correlate_changes(
+    timeline: EventTimeline,
+    spike_onset: float,
+    histograms: Dict[str, ErrorHistogram],
+    lookback: float = 6 * 3600,
+    compare_window: float = 600,
+    lag_scale: float = 900,
+    max_candidates: int = 5
+) -> List[Dict[str, Any]]:
+    """
+    Rank changes that could have caused an error spike.
+
+    Each change that started within `lookback` before the spike (or up to one
+    bucket after, to allow for clock skew) is scored by:
+    - lag: exp(-lag / lag_scale), favouring changes just before the spike
+    - impact: error increase on the changed service, comparing
+      `compare_window` before the change with `compare_window` after
+
+    Args:
+        timeline: Change events
+        spike_onset: Onset timestamp of the error spike
+        histograms: Per-service error histograms
+        lookback: How far before the spike to consider changes
+        compare_window: Before/after comparison window in seconds
+        lag_scale: Lag (seconds) at which the lag score decays to 1/e
+        max_candidates: Number of candidates returned
+
+    Returns:
+        Candidate dicts sorted by descending score
+    """
+    candidates = []
+    for event in timeline.starting_between(spike_onset - lookback, spike_onset + 60):
+        lag = spike_onset - event.start_ts
+        lag_score = math.exp(-max(lag, 0.0) / lag_scale)
+
+        histogram = histograms.get(event.service)
+        before = after = 0.0
+        if histogram is not None:
+            before = histogram.count(event.start_ts - compare_window, event.start_ts)
+            after = histogram.count(event.start_ts, event.start_ts + compare_window)
+        # Laplace-smoothed ratio, squashed into [0, 1)
+        ratio = (after + 1.0) / (before + 1.0)
+        impact_score = 1.0 - 1.0 / ratio if ratio > 1.0 else 0.0
+
+        candidates.append({
+            "event": event,
+            "lag_seconds": lag,
+            "errors_before": before,
+            "errors_after": after,
+            "error_ratio": ratio,
+            "score": 0.5 * lag_score + 0.5 * impact_score
+        })
+
+    candidates.sort(key=lambda c: c["score"], reverse=True)
+    return candidates[:max_candidates]
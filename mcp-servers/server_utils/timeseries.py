@@ -0,0 +1,277 @@
+"""
+Ring-Buffer Time-Series Store
+
+Fixed-memory metric history for the MCP servers. Each series keeps its
+timestamps and values in two preallocated array('d') buffers, so memory per
+series is constant (16 bytes x capacity) regardless of how long the server
+runs. Range queries downsample on the fly into fixed-width buckets with
+min/max/avg/percentile aggregates.
+"""
+
+import math
+import re
+import time
+from array import array
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+
+DURATION_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}
+
+# Default retention: 24h at 10s resolution
+DEFAULT_CAPACITY = 8640
+
+
+def parse_duration(value: str) -> float:
+    """
+    Parse a duration like '30s', '5m', '2h', '7d' or '1h30m' into seconds.
+
+    Args:
+        value: Duration string (a bare number is treated as seconds)
+
+    Returns:
+        Duration in seconds
+
+    Raises:
+        ValueError: If the string is not a valid duration
+    """
+    value = str(value).strip().lower()
+    if re.fullmatch(r"\d+(\.\d+)?", value):
+        return float(value)
+
+    parts = re.findall(r"(\d+(?:\.\d+)?)\s*([smhdw])", value)
+    if not parts or "".join(n + u for n, u in parts) != value.replace(" ", ""):
+        raise ValueError(f"Invalid duration: {value!r}")
+
+    return sum(float(number) * DURATION_UNITS[unit] for number, unit in parts)
+
+
+def percentile(sorted_values: Sequence[float], pct: float) -> float:
+    """Linear-interpolated percentile of an already sorted sequence"""
+    if not sorted_values:
+        return math.nan
+    if len(sorted_values) == 1:
+        return sorted_values[0]
+    rank = (pct / 100.0) * (len(sorted_values) - 1)
+    low = int(rank)
+    high = min(low + 1, len(sorted_values) - 1)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (rank - low)
+
+
+class RingSeries:
+    """
+    Fixed-capacity time series backed by array('d') ring buffers.
+
+    Samples must be appended in non-decreasing timestamp order; once the
+    buffer is full the oldest sample is overwritten.
+    """
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self.capacity = capacity
+        self._ts = array("d", bytes(8 * capacity))
+        self._values = array("d", bytes(8 * capacity))
+        self._start = 0
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def append(self, ts: float, value: float) -> None:
+        """
+        Append a sample.
+
+        Args:
+            ts: Unix timestamp (seconds)
+            value: Sample value
+
+        Raises:
+            ValueError: If `ts` is older than the latest sample
+        """
+        if self._count and ts < self._ts[(self._start + self._count - 1) % self.capacity]:
+            raise ValueError("Samples must be appended in timestamp order")
+
+        if self._count < self.capacity:
+            idx = (self._start + self._count) % self.capacity
+            self._count += 1
+        else:
+            idx = self._start
+            self._start = (self._start + 1) % self.capacity
+
+        self._ts[idx] = ts
+        self._values[idx] = value
+
+    def latest(self) -> Optional[Tuple[float, float]]:
+        """Return the most recent (ts, value), or None if empty"""
+        if not self._count:
+            return None
+        idx = (self._start + self._count - 1) % self.capacity
+        return self._ts[idx], self._values[idx]
+
+    def first_ts(self) -> Optional[float]:
+        """Return the oldest retained timestamp, or None if empty"""
+        return self._ts[self._start] if self._count else None
+
+    def _bisect_left(self, ts: float) -> int:
+        """Logical index of the first sample with timestamp >= ts"""
+        low, high = 0, self._count
+        while low < high:
+            mid = (low + high) // 2
+            if self._ts[(self._start + mid) % self.capacity] < ts:
+                low = mid + 1
+            else:
+                high = mid
+        return low
+
+    def range(self, start: float, end: float) -> Iterator[Tuple[float, float]]:
+        """
+        Iterate samples with start <= ts < end.
+
+        Binary search on the ring keeps this O(log n + k).
+        """
+        i = self._bisect_left(start)
+        while i < self._count:
+            idx = (self._start + i) % self.capacity
+            ts = self._ts[idx]
+            if ts >= end:
+                break
+            yield ts, self._values[idx]
+            i += 1
+
+    def downsample(
+        self,
+        start: float,
+        end: float,
+        step: float,
+        percentiles: Iterable[float] = (50, 95, 99)
+    ) -> List[Dict[str, float]]:
+        """
+        Aggregate samples in [start, end) into fixed-width buckets.
+
+        Args:
+            start: Range start (unix seconds)
+            end: Range end (unix seconds, exclusive)
+            step: Bucket width in seconds
+            percentiles: Percentiles to compute per bucket
+
+        Returns:
+            One dict per non-empty bucket with ts, count, min, max, avg, pNN
+        """
+        if step <= 0:
+            raise ValueError("step must be positive")
+
+        percentiles = tuple(percentiles)
+        buckets: List[Dict[str, float]] = []
+        bucket_index = None
+        bucket_values: List[float] = []
+
+        def flush():
+            values = sorted(bucket_values)
+            bucket = {
+                "ts": start + bucket_index * step,
+                "count": len(values),
+                "min": values[0],
+                "max": values[-1],
+                "avg": sum(values) / len(values)
+            }
+            for pct in percentiles:
+                bucket[f"p{pct:g}"] = percentile(values, pct)
+            buckets.append(bucket)
+
+        for ts, value in self.range(start, end):
+            index = int((ts - start) // step)
+            if index != bucket_index:
+                if bucket_values:
+                    flush()
+                bucket_index = index
+                bucket_values = []
+            bucket_values.append(value)
+
+        if bucket_values:
+            flush()
+
+        return buckets
+
+
+class MetricsStore:
+    """
+    Collection of named RingSeries sharing one capacity.
+
+    Series are created on first ingest, so new metrics (e.g. per error type)
+    need no registration.
+    """
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        self.capacity = capacity
+        self.series: Dict[str, RingSeries] = {}
+
+    def ingest(self, sample: Dict[str, float], ts: Optional[float] = None) -> None:
+        """
+        Record one sample for several metrics at the same timestamp.
+
+        Args:
+            sample: Mapping of metric name to value (non-numeric values are skipped)
+            ts: Unix timestamp (defaults to now)
+        """
+        ts = time.time() if ts is None else ts
+        for name, value in sample.items():
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                continue
+            series = self.series.get(name)
+            if series is None:
+                series = self.series[name] = RingSeries(self.capacity)
+            series.append(ts, float(value))
+
+    def names(self, prefix: str = "") -> List[str]:
+        """List series names, optionally filtered by prefix"""
+        return sorted(name for name in self.series if name.startswith(prefix))
+
+    def latest(self, names: Optional[Iterable[str]] = None) -> Dict[str, float]:
+        """Return the latest value of each requested (or every) series"""
+        result = {}
+        for name in (names if names is not None else self.series):
+            series = self.series.get(name)
+            point = series.latest() if series is not None else None
+            if point is not None:
+                result[name] = point[1]
+        return result
+
+    def latest_ts(self) -> Optional[float]:
+        """Timestamp of the newest sample across all series"""
+        points = [s.latest() for s in self.series.values()]
+        return max((p[0] for p in points if p), default=None)
+
+    def query(
+        self,
+        name: str,
+        window: str = "1h",
+        resolution: str = "1m",
+        end: Optional[float] = None,
+        percentiles: Iterable[float] = (50, 95, 99)
+    ) -> List[Dict[str, float]]:
+        """
+        Downsampled history for one series, e.g. "last 2h at 1-minute resolution".
+
+        Args:
+            name: Series name
+            window: Lookback duration ('2h', '30m', ...)
+            resolution: Bucket width ('1m', '5m', ...)
+            end: Range end (defaults to now)
+            percentiles: Percentiles to compute per bucket
+
+        Returns:
+            List of bucket dicts (empty if the series is unknown)
+
+        Raises:
+            ValueError: If window/resolution are invalid
+        """
+        series = self.series.get(name)
+        if series is None:
+            return []
+
+        end = time.time() if end is None else end
+        window_seconds = parse_duration(window)
+        step = parse_duration(resolution)
+        # Align bucket boundaries to the resolution so repeated queries line up
+        start = math.floor((end - window_seconds) / step) * step
+        return series.downsample(start, end + 1e-9, step, percentiles)
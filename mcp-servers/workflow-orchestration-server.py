@@ -3,10 +3,19 @@
 
 import asyncio
 from mcp.server.fastmcp import FastMCP
-from typing import Any, Optional, List
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from typing import Any, Dict, Optional, List
 import json
 import logging
 from datetime import datetime
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+from server_utils.alert_grouping import AlertGrouper, IncidentRegistry, ingest
+from server_utils.dataset_store import get_dataset_store
+from server_utils.instrumentation import ToolMetrics, install_metrics_endpoints
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -15,23 +24,47 @@ logger = logging.getLogger(__name__)
 mcp_server = FastMCP("workflow-orchestration", host="127.0.0.1", port=9002)
 
 
+@mcp_server.custom_route("/health", methods=["GET"])
+async def health(request: Request) -> JSONResponse:
+    """Liveness endpoint used by start-servers.sh and the multi-server host"""
+    return JSONResponse({"status": "ok", "server": mcp_server.name})
+
+
+# Per-tool call counts/latency/sizes, served on /metrics and via get_server_stats
+tool_metrics = ToolMetrics(mcp_server.name)
+install_metrics_endpoints(mcp_server, tool_metrics)
+
+# Datasets produced by the other servers, referenced by ID
+dataset_store = get_dataset_store()
+
+# Alerts with the same fingerprint this close together are one problem
+ALERT_WINDOW_SECONDS = 300
+MAX_ALERTS_PER_BATCH = 10_000
+
+# Incidents created here or from alerts, and the open alert groups feeding them
+incident_registry = IncidentRegistry()
+alert_grouper = AlertGrouper(ALERT_WINDOW_SECONDS)
+
+
 @mcp_server.tool()
+@tool_metrics.instrument
 async def create_incident(severity: str, title: str, description: str, root_cause: Optional[str] = None) -> str:
     """Create a new incident ticket with details and initial assessment"""
     logger.info(f"Tool called: create_incident with severity={severity}, title={title}")
     
     try:
         incident_id = f"INC-2024-{hash(title) % 10000}"
+        record = incident_registry.create(severity, title, description, root_cause, incident_id=incident_id)
         result = {
             "success": True,
             "incident": {
-                "id": incident_id,
-                "severity": severity.upper(),
+                "id": record.incident_id,
+                "severity": record.severity,
                 "title": title,
                 "description": description,
                 "root_cause": root_cause,
-                "status": "INVESTIGATING",
-                "created_at": datetime.now().isoformat()
+                "status": record.status,
+                "created_at": record.created_at
             }
         }
         
@@ -41,6 +74,41 @@ async def create_incident(severity: str, title: str, description: str, root_caus
 
 
 @mcp_server.tool()
+@tool_metrics.instrument
+async def ingest_alerts(alerts: List[Dict[str, Any]], create_incidents: bool = True) -> str:
+    """
+    Deduplicate a batch of alerts and group them into incidents.
+
+    Each alert needs 'service' and 'message'; 'error_code', 'timestamp'
+    (ISO-8601 or epoch seconds, default now), 'severity' (SEV1-SEV4) and
+    'id' are optional. Alerts with the same service, error code and message
+    (ignoring numbers, IDs and IP addresses) within 5 minutes of each other form one
+    group, and each group is attached to one incident - an existing open one
+    when there is one. Only the incidents in 'incidents_to_investigate' are
+    new; the other alerts were attached as duplicates.
+
+    Args:
+        alerts: Alert objects
+        create_incidents: Open incidents for new groups (False only groups them)
+    """
+    logger.info(f"Tool called: ingest_alerts with {len(alerts)} alerts")
+    
+    try:
+        if len(alerts) > MAX_ALERTS_PER_BATCH:
+            return f"Error: at most {MAX_ALERTS_PER_BATCH} alerts per call (got {len(alerts)})"
+        result = {
+            "success": True,
+            "window_seconds": ALERT_WINDOW_SECONDS,
+            **ingest(alerts, alert_grouper, incident_registry, create_incidents=create_incidents)
+        }
+        
+        return json.dumps(result, indent=2)
+    except Exception as e:
+        return f"Error: {str(e)}"
+
+
+@mcp_server.tool()
+@tool_metrics.instrument
 async def execute_remediation(incident_id: str, steps: List[str], dry_run: bool = False) -> str:
     """Execute a series of remediation steps to resolve the incident"""
     logger.info(f"Tool called: execute_remediation with incident_id={incident_id}, steps_count={len(steps)}")
@@ -61,16 +129,39 @@ async def execute_remediation(incident_id: str, steps: List[str], dry_run: bool
 
 
 @mcp_server.tool()
-async def document_resolution(incident_id: str, resolution: str, action_items: Optional[List[str]] = None) -> str:
-    """Document incident resolution and create post-mortem"""
+@tool_metrics.instrument
+async def document_resolution(
+    incident_id: str,
+    resolution: str,
+    action_items: Optional[List[str]] = None,
+    evidence_datasets: Optional[List[str]] = None
+) -> str:
+    """
+    Document incident resolution and create post-mortem.
+
+    Pass dataset IDs (from get_raw_logs or get_system_metrics) as
+    evidence_datasets to attach them to the post-mortem by reference.
+    """
     logger.info(f"Tool called: document_resolution with incident_id={incident_id}")
     
     try:
+        evidence = []
+        for dataset_id in evidence_datasets or []:
+            try:
+                info = dataset_store.info(dataset_id)
+                evidence.append({key: value for key, value in dataset_store.handle(info).items() if key != "schema"})
+            except KeyError as e:
+                evidence.append({"dataset_id": dataset_id, "error": e.args[0]})
+
+        # Alerts arriving after this open a new incident
+        incident_registry.resolve(incident_id)
+
         result = {
             "success": True,
             "incident_id": incident_id,
             "resolution": resolution,
             "action_items": action_items or [],
+            "evidence": evidence,
             "resolution_time": "3m 47s",
             "post_mortem_created": True,
             "documented_at": datetime.now().isoformat()
@@ -82,6 +173,7 @@ async def document_resolution(incident_id: str, resolution: str, action_items: O
 
 
 @mcp_server.tool()
+@tool_metrics.instrument
 async def notify_team(incident_id: str, channel: str, message: str) -> str:
     """Send notifications to team channels (Slack, PagerDuty, etc.)"""
     logger.info(f"Tool called: notify_team with incident_id={incident_id}, channel={channel}")
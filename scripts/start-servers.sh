@@ -1,8 +1,26 @@
 #!/bin/bash
 # Start MCP Servers
+#
+# Usage:
+#   ./scripts/start-servers.sh                 # all servers in one process
+#   ./scripts/start-servers.sh --workers 4     # ...with 4 log-analytics workers (SO_REUSEPORT)
+#   ./scripts/start-servers.sh --separate      # one process per server
 
 set -e
 
+MODE="host"
+WORKERS=0
+READY_TIMEOUT=${READY_TIMEOUT:-30}
+
+while [ $# -gt 0 ]; do
+    case "$1" in
+        --separate) MODE="separate" ;;
+        --workers) WORKERS="$2"; shift ;;
+        *) echo "Unknown option: $1"; exit 1 ;;
+    esac
+    shift
+done
+
 echo "════════════════════════════════════════════════════════"
 echo "  Starting MCP Servers"
 echo "════════════════════════════════════════════════════════"
@@ -19,10 +37,24 @@ fi
 cleanup() {
     echo ""
     echo "🛑 Stopping MCP servers..."
+    pkill -f "mcp-servers/server-host.py" || true
     pkill -f "monitoring-analysis-server.py" || true
     pkill -f "workflow-orchestration-server.py" || true
     pkill -f "log-analytics-server.py" || true
-    sleep 1
+}
+
+# Poll a URL until it returns 2xx, instead of sleeping a fixed time
+wait_ready() {
+    local url="$1"
+    local deadline=$((SECONDS + READY_TIMEOUT))
+    until curl -sf -o /dev/null "$url"; do
+        if [ $SECONDS -ge $deadline ]; then
+            echo "   ❌ Not ready after ${READY_TIMEOUT}s: $url"
+            exit 1
+        fi
+        sleep 0.1
+    done
+    echo "   ✅ Ready: $url"
 }
 
 # Trap to cleanup on exit
@@ -31,26 +63,34 @@ trap cleanup EXIT INT TERM
 # Cleanup any existing servers
 cleanup
 
-echo "🚀 Starting Monitoring & Analysis Server on port 9001..."
-python mcp-servers/monitoring-analysis-server.py &
-MONITORING_PID=$!
-echo "   PID: $MONITORING_PID"
-
-sleep 1
+if [ "$MODE" = "separate" ]; then
+    echo "🚀 Starting Monitoring & Analysis Server on port 9001..."
+    python mcp-servers/monitoring-analysis-server.py &
+    echo "   PID: $!"
 
-echo "🚀 Starting Workflow Orchestration Server on port 9002..."
-python mcp-servers/workflow-orchestration-server.py &
-WORKFLOW_PID=$!
-echo "   PID: $WORKFLOW_PID"
+    echo "🚀 Starting Workflow Orchestration Server on port 9002..."
+    python mcp-servers/workflow-orchestration-server.py &
+    echo "   PID: $!"
 
-sleep 1
+    echo "🚀 Starting Log Analytics Server on port 9003..."
+    python mcp-servers/log-analytics-server.py &
+    echo "   PID: $!"
 
-echo "🚀 Starting Log Analytics Server on port 9003..."
-python mcp-servers/log-analytics-server.py &
-ANALYTICS_PID=$!
-echo "   PID: $ANALYTICS_PID"
+    wait_ready http://127.0.0.1:9001/health
+    wait_ready http://127.0.0.1:9002/health
+    wait_ready http://127.0.0.1:9003/health
+else
+    echo "🚀 Starting all MCP servers in one process (ports 9001, 9002, 9003)..."
+    if [ "$WORKERS" -gt 0 ]; then
+        echo "   Log Analytics: $WORKERS worker processes"
+        python mcp-servers/server-host.py --log-analytics-workers "$WORKERS" &
+    else
+        python mcp-servers/server-host.py &
+    fi
+    echo "   PID: $!"
 
-sleep 2
+    wait_ready http://127.0.0.1:9001/ready
+fi
 
 echo ""
 echo "════════════════════════════════════════════════════════"
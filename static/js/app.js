@@ -0,0 +1,303 @@
+let ws = null;
+let toolExecutionCount = 0;
+// stream_id -> { message, text } for assistant text still being streamed
+const streamingMessages = new Map();
+// job_id -> status message of an incident submitted from this page
+const queueMessages = new Map();
+const conversation = document.getElementById('conversation');
+const todoContainer = document.getElementById('todoContainer');
+const toolsContainer = document.getElementById('toolsContainer');
+const toolCount = document.getElementById('toolCount');
+const incidentInput = document.getElementById('incidentInput');
+const submitBtn = document.getElementById('submitBtn');
+const statusIndicator = document.getElementById('statusIndicator');
+
+function connectWebSocket() {
+    ws = new WebSocket(`ws://${window.location.host}/ws`);
+
+    ws.onopen = () => {
+        console.log('WebSocket connected');
+        statusIndicator.className = 'status-indicator connected';
+    };
+
+    ws.onmessage = (event) => {
+        const data = JSON.parse(event.data);
+        handleMessage(data);
+    };
+
+    ws.onclose = () => {
+        console.log('WebSocket disconnected');
+        statusIndicator.className = 'status-indicator disconnected';
+        setTimeout(connectWebSocket, 3000);
+    };
+
+    ws.onerror = (error) => {
+        console.error('WebSocket error:', error);
+    };
+}
+
+function handleMessage(data) {
+    switch(data.type) {
+        case 'conversation':
+            addConversationMessage(data.role, data.content, data.stream_ids || []);
+            break;
+        case 'assistant_delta':
+            appendAssistantDelta(data.stream_id, data.text);
+            break;
+        case 'todo_update':
+            updateTodos(data.todos);
+            break;
+        case 'tool_execution':
+            // Only increment counter when result is null (initial call)
+            addToolExecution(data.tool_name, data.input, data.result, data.result === null, data);
+            break;
+        case 'queue_update':
+            updateQueueStatus(data);
+            break;
+        case 'system':
+            finishStreamingMessages(data.stream_ids || []);
+            addSystemMessage(data.content);
+            break;
+    }
+}
+
+function createConversationMessage(role) {
+    if (conversation.querySelector('.empty-state')) {
+        conversation.innerHTML = '';
+    }
+
+    const message = document.createElement('div');
+    message.className = `message ${role}`;
+
+    const label = document.createElement('div');
+    label.className = 'message-label';
+    label.textContent = role === 'user' ? '👤 You' : '🤖 Claude Agent';
+
+    const text = document.createElement('div');
+    text.className = 'message-content';
+
+    message.appendChild(label);
+    message.appendChild(text);
+    conversation.appendChild(message);
+    return message;
+}
+
+function addConversationMessage(role, content, streamIds = []) {
+    // The complete text takes over the bubble it was streamed into
+    let message = null;
+    streamIds.forEach(streamId => {
+        const streamed = streamingMessages.get(streamId);
+        streamingMessages.delete(streamId);
+        if (!streamed) return;
+        if (message) {
+            streamed.message.remove();
+        } else {
+            message = streamed.message;
+        }
+    });
+    if (!message) {
+        message = createConversationMessage(role);
+    }
+    message.classList.remove('streaming');
+
+    const text = message.querySelector('.message-content');
+    // Render markdown for assistant messages
+    if (role === 'assistant') {
+        text.innerHTML = markdown.parse(content);
+    } else {
+        text.textContent = content;
+    }
+    conversation.scrollTop = conversation.scrollHeight;
+}
+
+function appendAssistantDelta(streamId, delta) {
+    let streamed = streamingMessages.get(streamId);
+    if (!streamed) {
+        const message = createConversationMessage('assistant');
+        message.classList.add('streaming');
+        streamed = { message, text: '' };
+        streamingMessages.set(streamId, streamed);
+    }
+    // Plain text while streaming; markdown is rendered once the message is complete
+    streamed.text += delta;
+    streamed.message.querySelector('.message-content').textContent = streamed.text;
+    conversation.scrollTop = conversation.scrollHeight;
+}
+
+function finishStreamingMessages(streamIds) {
+    // Streams of an ended query cut off before their complete message (e.g. a
+    // stopped session); other investigations' streams keep going
+    streamIds.forEach(streamId => {
+        const streamed = streamingMessages.get(streamId);
+        if (!streamed) return;
+        streamed.message.classList.remove('streaming');
+        streamed.message.querySelector('.message-content').innerHTML = markdown.parse(streamed.text);
+        streamingMessages.delete(streamId);
+    });
+}
+
+function addSystemMessage(content) {
+    if (conversation.querySelector('.empty-state')) {
+        conversation.innerHTML = '';
+    }
+
+    const message = document.createElement('div');
+    message.className = 'message system';
+
+    const label = document.createElement('div');
+    label.className = 'message-label';
+    label.textContent = '⚡ System';
+
+    const text = document.createElement('div');
+    text.textContent = content;
+
+    message.appendChild(label);
+    message.appendChild(text);
+    conversation.appendChild(message);
+    conversation.scrollTop = conversation.scrollHeight;
+    return text;
+}
+
+function queueStatusText(update) {
+    switch(update.status) {
+        case 'queued': return `🕒 ${update.severity} incident queued (position ${update.position})`;
+        case 'running': return `▶️ ${update.severity} incident started` +
+            (update.waited_seconds >= 1 ? ` after ${Math.round(update.waited_seconds)}s in queue` : '');
+        case 'completed': return `✅ ${update.severity} incident finished`;
+        case 'failed': return `❌ ${update.severity} investigation failed: ${update.detail}`;
+        default: return `⛔ ${update.severity} incident not started: ${update.detail}`;
+    }
+}
+
+function updateQueueStatus(update) {
+    // The socket accepts the next incident as soon as this one is admitted
+    submitBtn.disabled = false;
+    incidentInput.disabled = false;
+
+    const text = queueStatusText(update);
+    const existing = queueMessages.get(update.job_id);
+    if (existing) {
+        existing.textContent = text;
+    } else {
+        queueMessages.set(update.job_id, addSystemMessage(text));
+    }
+    if (!['queued', 'running'].includes(update.status)) {
+        queueMessages.delete(update.job_id);
+    }
+}
+
+function updateTodos(todos) {
+    if (todoContainer.querySelector('.empty-state')) {
+        todoContainer.innerHTML = '';
+    }
+
+    todoContainer.innerHTML = '';
+    todos.forEach(todo => {
+        const item = document.createElement('div');
+        item.className = `todo-item ${todo.status}`;
+
+        const icon = document.createElement('div');
+        icon.className = 'todo-icon';
+        icon.textContent = getStatusIcon(todo.status);
+
+        const text = document.createElement('div');
+        text.className = 'todo-text';
+        text.textContent = todo.content;
+
+        item.appendChild(icon);
+        item.appendChild(text);
+        todoContainer.appendChild(item);
+    });
+}
+
+function getStatusIcon(status) {
+    switch(status) {
+        case 'completed': return '✅';
+        case 'in_progress': return '🔧';
+        case 'cancelled': return '❌';
+        default: return '⏳';
+    }
+}
+
+function addToolExecution(toolName, input, result, incrementCounter = true, meta = {}) {
+    if (toolsContainer.querySelector('.empty-state')) {
+        toolsContainer.innerHTML = '';
+    }
+
+    // Only increment counter for new tool calls, not results
+    if (incrementCounter) {
+        toolExecutionCount++;
+        toolCount.textContent = `(${toolExecutionCount})`;
+    }
+
+    const exec = document.createElement('div');
+    exec.className = 'tool-exec';
+
+    const name = document.createElement('div');
+    name.className = 'tool-name';
+    name.innerHTML = `⚙️ ${toolName}`;
+
+    const resultDiv = document.createElement('div');
+    resultDiv.className = 'tool-result';
+    resultDiv.textContent = typeof result === 'string' ? result : JSON.stringify(result, null, 2);
+
+    exec.appendChild(name);
+    if (result) {
+        exec.appendChild(resultDiv);
+    }
+    if (meta.truncated && meta.result_id) {
+        exec.appendChild(createFullResultLink(meta.result_id, meta.result_size, resultDiv));
+    }
+
+    toolsContainer.insertBefore(exec, toolsContainer.firstChild);
+}
+
+function formatBytes(size) {
+    if (size >= 1048576) return `${(size / 1048576).toFixed(1)} MB`;
+    if (size >= 1024) return `${(size / 1024).toFixed(1)} KB`;
+    return `${size} B`;
+}
+
+function createFullResultLink(resultId, resultSize, resultDiv) {
+    // Full results are fetched on demand, first 64 KB via a Range request
+    const link = document.createElement('a');
+    link.className = 'tool-result-link';
+    link.href = `/api/results/${resultId}`;
+    link.target = '_blank';
+    link.textContent = `Show more (${formatBytes(resultSize)} total)`;
+    link.onclick = async (e) => {
+        e.preventDefault();
+        const response = await fetch(link.href, { headers: { 'Range': 'bytes=0-65535' } });
+        resultDiv.textContent = await response.text();
+        if (response.status === 206) {
+            link.textContent = `Open full result (${formatBytes(resultSize)})`;
+            link.onclick = null;
+        } else {
+            link.remove();
+        }
+    };
+    return link;
+}
+
+function submitIncident() {
+    const description = incidentInput.value.trim();
+    if (!description) return;
+
+    submitBtn.disabled = true;
+    incidentInput.disabled = true;
+
+    ws.send(JSON.stringify({
+        type: 'incident',
+        description: description
+    }));
+
+    incidentInput.value = '';
+}
+
+incidentInput.addEventListener('keypress', (e) => {
+    if (e.key === 'Enter') {
+        submitIncident();
+    }
+});
+
+connectWebSocket();
@@ -6,35 +6,224 @@ Right: Live Todo tracker and tool execution results
 """
 
 import asyncio
+import gzip
+import hashlib
 import json
+import logging
+import mimetypes
+import re
+from contextlib import asynccontextmanager
 from pathlib import Path
 from datetime import datetime
 from typing import Optional, List, Dict, Any
+from urllib.parse import parse_qs
 
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Request
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, Response
 from pydantic import BaseModel
+from starlette.datastructures import Headers
+from starlette.exceptions import HTTPException
 
-# Import agent types for message handling
-from claude_agent_sdk import AssistantMessage, UserMessage, ToolUseBlock, ToolResultBlock
-
-# Import the actual agent
+# The agent (and claude_agent_sdk behind it) is imported in handle_query, on
+# the first incident, so the UI starts serving without paying for it
 import sys
-from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent / "claude-agent"))
-from agent import ClaudeAgent
+from utils.incident_scheduler import IncidentScheduler
+from utils.result_store import ResultStore, build_preview, parse_range_header
+
+logger = logging.getLogger(__name__)
+
+STATIC_DIR = Path(__file__).parent / "static"
+
+# Precompressed variants, in order of preference
+STATIC_ENCODINGS = [("br", ".br"), ("gzip", ".gz")]
+COMPRESSIBLE_SUFFIXES = {".html", ".css", ".js", ".json", ".svg", ".txt"}
+
+# Fingerprinted asset URLs (?v=<hash>) never change, so cache them for a year
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "no-cache"
+
+# Rendered index page (built once at startup)
+ui_page: Dict[str, Any] = {}
+
+
+def build_static_assets(static_dir: Path = STATIC_DIR) -> Dict[str, str]:
+    """
+    Precompress static assets and compute their content fingerprints.
+
+    Writes a .gz (and .br when the optional `brotli` package is installed)
+    variant next to each text asset that is missing or older than its source.
+
+    Args:
+        static_dir: Directory holding the UI assets
+
+    Returns:
+        Mapping of asset URL (e.g. '/static/js/app.js') to content fingerprint
+    """
+    try:
+        import brotli
+    except ImportError:
+        brotli = None
+
+    compressors = [(".gz", lambda data: gzip.compress(data, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        compressors.append((".br", lambda data: brotli.compress(data, quality=11)))
+
+    fingerprints = {}
+    for path in sorted(static_dir.rglob("*")):
+        if not path.is_file() or path.suffix in (".gz", ".br"):
+            continue
+
+        data = path.read_bytes()
+        url = "/static/" + path.relative_to(static_dir).as_posix()
+        fingerprints[url] = hashlib.sha256(data).hexdigest()[:12]
+
+        if path.suffix not in COMPRESSIBLE_SUFFIXES:
+            continue
+        for suffix, compress in compressors:
+            variant = path.with_name(path.name + suffix)
+            if variant.exists() and variant.stat().st_mtime >= path.stat().st_mtime:
+                continue
+            variant.write_bytes(compress(data))
+
+    return fingerprints
+
+
+def render_ui_page(static_dir: Path = STATIC_DIR) -> Dict[str, Any]:
+    """
+    Build assets and render index.html with fingerprinted asset URLs.
+
+    Returns:
+        Dict with the page 'body', its 'etag' and a gzip-compressed variant
+        with its own 'gzip_etag'
+    """
+    fingerprints = build_static_assets(static_dir)
+    html = (static_dir / "index.html").read_text(encoding="utf-8")
+
+    def fingerprint_url(match):
+        url = match.group(2)
+        if url in fingerprints:
+            url = f"{url}?v={fingerprints[url]}"
+        return f'{match.group(1)}="{url}"'
+
+    body = re.sub(r'(src|href)="(/static/[^"?]+)"', fingerprint_url, html).encode("utf-8")
+    digest = hashlib.sha256(body).hexdigest()[:16]
+    return {
+        "body": body,
+        "gzip": gzip.compress(body, compresslevel=9, mtime=0),
+        "etag": f'"{digest}"',
+        "gzip_etag": f'"{digest}-gz"'
+    }
+
+
+def accepted_encodings(accept_encoding: str, available: List[str]) -> List[str]:
+    """
+    Encodings of `available` the client accepts, best first.
+
+    Orders by the Accept-Encoding q-values (ties keep the order of
+    `available`); q=0 excludes an encoding, as does leaving it out unless
+    a '*' entry covers it.
+    """
+    qualities = {}
+    for item in accept_encoding.split(","):
+        coding, *params = [part.strip() for part in item.split(";")]
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[coding.lower()] = quality
+
+    ranked = [(qualities.get(encoding, qualities.get("*", 0.0)), encoding) for encoding in available]
+    ranked = [(quality, encoding) for quality, encoding in ranked if quality > 0]
+    return [encoding for _, encoding in sorted(ranked, key=lambda item: -item[0])]
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """
+    StaticFiles that serves prebuilt .br/.gz variants and sets cache headers.
+
+    Fingerprinted requests (?v=...) get long-lived immutable caching; plain
+    URLs are revalidated against the ETag.
+    """
+
+    async def get_response(self, path: str, scope) -> Response:
+        accept_encoding = Headers(scope=scope).get("accept-encoding", "")
+        suffixes = dict(STATIC_ENCODINGS)
+        response = None
+
+        for encoding in accepted_encodings(accept_encoding, list(suffixes)):
+            suffix = suffixes[encoding]
+            try:
+                response = await super().get_response(path + suffix, scope)
+            except HTTPException:
+                continue
+            response.headers["content-encoding"] = encoding
+            if "content-type" in response.headers:
+                media_type, _ = mimetypes.guess_type(path)
+                response.headers["content-type"] = media_type or "application/octet-stream"
+            break
+
+        if response is None:
+            response = await super().get_response(path, scope)
+
+        query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+        response.headers["cache-control"] = (
+            IMMUTABLE_CACHE_CONTROL if "v" in query else REVALIDATE_CACHE_CONTROL
+        )
+        response.headers["vary"] = "Accept-Encoding"
+        return response
+
+
+def preload_agent_modules():
+    """Import the agent stack ahead of the first incident"""
+    import claude_agent_sdk  # noqa: F401
+    import agent  # noqa: F401
+    import utils.todo_tracker  # noqa: F401
+
 
-import os
-from dotenv import load_dotenv
+def log_preload_failure(task: asyncio.Task):
+    """Done callback: a failed preload only shows up otherwise on the first incident"""
+    if not task.cancelled() and task.exception() is not None:
+        logger.error("Preloading the agent modules failed", exc_info=task.exception())
 
-load_dotenv()
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Prebuild static assets before accepting requests"""
+    ui_page.update(await asyncio.to_thread(render_ui_page))
+    # Warm the deferred imports off the event loop once the UI is being served
+    app.state.agent_preload = asyncio.create_task(asyncio.to_thread(preload_agent_modules))
+    app.state.agent_preload.add_done_callback(log_preload_failure)
+    yield
+    app.state.agent_preload.cancel()
+    await asyncio.gather(app.state.agent_preload, return_exceptions=True)
+
+
+app = FastAPI(lifespan=lifespan)
+app.mount("/static", PrecompressedStaticFiles(directory=STATIC_DIR), name="static")
 
 # Store active WebSocket connections
 active_connections: List[WebSocket] = []
 
+# Full tool results (content-addressed); the socket only carries previews
+result_store = ResultStore()
+
+# Max characters of a tool result sent inline over the WebSocket
+RESULT_PREVIEW_CHARS = 500
+
+# Investigations running at once (one worker kept free for SEV1) and queue bounds
+MAX_CONCURRENT_INVESTIGATIONS = 3
+RESERVED_SEV1_WORKERS = 1
+MAX_QUEUED_INVESTIGATIONS = 20
+MAX_QUEUED_PER_SUBMITTER = 5
+
 
 class IncidentRequest(BaseModel):
     description: str
@@ -50,632 +239,69 @@ async def broadcast_message(message: Dict[str, Any]):
 
 
 @app.get("/", response_class=HTMLResponse)
-async def get_ui():
-    """Serve the main UI"""
-    return """
-<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Claude Incident Response Agent</title>
-    <!-- Markdown parser -->
-    <script src="https://cdn.jsdelivr.net/npm/marked/marked.min.js"></script>
-    <style>
-        * {
-            margin: 0;
-            padding: 0;
-            box-sizing: border-box;
-        }
-        
-        body {
-            font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, Oxygen, Ubuntu, sans-serif;
-            height: 100vh;
-            display: flex;
-            flex-direction: column;
-            background: #0f172a;
-            color: #e2e8f0;
-        }
-        
-        header {
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            padding: 1.5rem 2rem;
-            box-shadow: 0 4px 6px rgba(0, 0, 0, 0.3);
-        }
-        
-        header h1 {
-            font-size: 1.75rem;
-            font-weight: 700;
-            color: white;
-            display: flex;
-            align-items: center;
-            gap: 0.75rem;
-        }
-        
-        header p {
-            margin-top: 0.5rem;
-            color: rgba(255, 255, 255, 0.9);
-            font-size: 0.95rem;
-        }
-        
-        .container {
-            display: flex;
-            flex: 1;
-            overflow: hidden;
-        }
-        
-        .left-panel {
-            flex: 1;
-            display: flex;
-            flex-direction: column;
-            border-right: 2px solid #334155;
-            background: #1e293b;
-        }
-        
-        .right-panel {
-            width: 480px;
-            display: flex;
-            flex-direction: column;
-            background: #0f172a;
-        }
-        
-        .panel-header {
-            padding: 1rem 1.5rem;
-            background: #1e293b;
-            border-bottom: 2px solid #334155;
-            font-weight: 600;
-            font-size: 0.95rem;
-            color: #cbd5e1;
-            text-transform: uppercase;
-            letter-spacing: 0.05em;
-        }
-        
-        .conversation {
-            flex: 1;
-            overflow-y: auto;
-            padding: 1.5rem;
-        }
-        
-        .message {
-            margin-bottom: 1.25rem;
-            padding: 1rem 1.25rem;
-            border-radius: 0.75rem;
-            line-height: 1.6;
-            animation: slideIn 0.3s ease-out;
-        }
-        
-        @keyframes slideIn {
-            from {
-                opacity: 0;
-                transform: translateY(10px);
-            }
-            to {
-                opacity: 1;
-                transform: translateY(0);
-            }
-        }
-        
-        .message.user {
-            background: #334155;
-            border-left: 4px solid #667eea;
-        }
-        
-        .message.assistant {
-            background: #1e293b;
-            border-left: 4px solid #10b981;
-        }
-        
-        /* Markdown styling for assistant messages */
-        .message-content h1, .message-content h2, .message-content h3 {
-            margin-top: 1em;
-            margin-bottom: 0.5em;
-            color: #f1f5f9;
-        }
-        
-        .message-content h1 { font-size: 1.5em; border-bottom: 2px solid #10b981; padding-bottom: 0.3em; }
-        .message-content h2 { font-size: 1.3em; color: #a7f3d0; }
-        .message-content h3 { font-size: 1.1em; color: #6ee7b7; }
-        
-        .message-content ul, .message-content ol {
-            margin-left: 1.5em;
-            margin-top: 0.5em;
-            margin-bottom: 0.5em;
-        }
-        
-        .message-content li {
-            margin-bottom: 0.3em;
-            line-height: 1.6;
-        }
-        
-        .message-content code {
-            background: #0f172a;
-            padding: 0.2em 0.4em;
-            border-radius: 3px;
-            font-family: 'Courier New', monospace;
-            font-size: 0.9em;
-            color: #fbbf24;
-        }
-        
-        .message-content pre {
-            background: #0f172a;
-            padding: 1em;
-            border-radius: 5px;
-            overflow-x: auto;
-            margin: 0.5em 0;
-        }
-        
-        .message-content pre code {
-            background: none;
-            padding: 0;
-        }
-        
-        .message-content blockquote {
-            border-left: 3px solid #10b981;
-            padding-left: 1em;
-            margin: 0.5em 0;
-            color: #cbd5e1;
-        }
-        
-        .message-content strong {
-            color: #f1f5f9;
-            font-weight: 600;
-        }
-        
-        .message-content p {
-            margin-bottom: 0.75em;
-            line-height: 1.6;
-        }
-        
-        .message-content a {
-            color: #60a5fa;
-            text-decoration: none;
-        }
-        
-        .message-content a:hover {
-            text-decoration: underline;
-        }
-        
-        .message.tool {
-            background: #172033;
-            border-left: 4px solid #f59e0b;
-            font-size: 0.9rem;
-        }
-        
-        .message.system {
-            background: #1a1f2e;
-            border-left: 4px solid #8b5cf6;
-            font-style: italic;
-            color: #a78bfa;
-        }
-        
-        .message-label {
-            font-weight: 700;
-            margin-bottom: 0.5rem;
-            font-size: 0.85rem;
-            text-transform: uppercase;
-            letter-spacing: 0.05em;
-            opacity: 0.8;
-        }
-        
-        .input-area {
-            padding: 1.5rem;
-            background: #1e293b;
-            border-top: 2px solid #334155;
-        }
-        
-        .input-group {
-            display: flex;
-            gap: 0.75rem;
-        }
-        
-        #incidentInput {
-            flex: 1;
-            padding: 0.875rem 1.125rem;
-            background: #0f172a;
-            border: 2px solid #334155;
-            border-radius: 0.5rem;
-            color: #e2e8f0;
-            font-size: 0.95rem;
-            font-family: inherit;
-            transition: all 0.2s;
-        }
-        
-        #incidentInput:focus {
-            outline: none;
-            border-color: #667eea;
-            box-shadow: 0 0 0 3px rgba(102, 126, 234, 0.1);
-        }
-        
-        button {
-            padding: 0.875rem 2rem;
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            border: none;
-            border-radius: 0.5rem;
-            color: white;
-            font-weight: 600;
-            cursor: pointer;
-            transition: all 0.2s;
-            font-size: 0.95rem;
-        }
-        
-        button:hover:not(:disabled) {
-            transform: translateY(-2px);
-            box-shadow: 0 8px 16px rgba(102, 126, 234, 0.3);
-        }
-        
-        button:disabled {
-            opacity: 0.5;
-            cursor: not-allowed;
-        }
-        
-        .todo-container, .tools-container {
-            flex: 1;
-            overflow-y: auto;
-            padding: 1.25rem;
-        }
-        
-        .todo-item {
-            padding: 0.875rem 1rem;
-            margin-bottom: 0.75rem;
-            background: #1e293b;
-            border-radius: 0.5rem;
-            border-left: 3px solid #475569;
-            display: flex;
-            align-items: center;
-            gap: 0.75rem;
-            transition: all 0.2s;
-        }
-        
-        .todo-item:hover {
-            background: #27364b;
-        }
-        
-        .todo-item.completed {
-            border-left-color: #10b981;
-            opacity: 0.7;
-        }
-        
-        .todo-item.in_progress {
-            border-left-color: #f59e0b;
-            animation: pulse 2s ease-in-out infinite;
-        }
-        
-        @keyframes pulse {
-            0%, 100% { opacity: 1; }
-            50% { opacity: 0.7; }
-        }
-        
-        .todo-icon {
-            font-size: 1.25rem;
-            flex-shrink: 0;
-        }
-        
-        .todo-text {
-            flex: 1;
-            font-size: 0.9rem;
-        }
-        
-        .tool-exec {
-            padding: 1rem;
-            margin-bottom: 1rem;
-            background: #1e293b;
-            border-radius: 0.5rem;
-            border-left: 3px solid #f59e0b;
-            font-size: 0.875rem;
-            animation: slideIn 0.3s ease-out;
-        }
-        
-        .tool-name {
-            font-weight: 700;
-            color: #fbbf24;
-            margin-bottom: 0.5rem;
-            display: flex;
-            align-items: center;
-            gap: 0.5rem;
-        }
-        
-        .tool-result {
-            color: #94a3b8;
-            font-family: 'Monaco', 'Courier New', monospace;
-            white-space: pre-wrap;
-            margin-top: 0.5rem;
-            padding: 0.75rem;
-            background: #0f172a;
-            border-radius: 0.375rem;
-            max-height: 200px;
-            overflow-y: auto;
-        }
-        
-        .status-indicator {
-            display: inline-block;
-            width: 8px;
-            height: 8px;
-            border-radius: 50%;
-            margin-right: 0.5rem;
-        }
-        
-        .status-indicator.connected {
-            background: #10b981;
-            box-shadow: 0 0 8px #10b981;
-        }
-        
-        .status-indicator.disconnected {
-            background: #ef4444;
-        }
-        
-        .empty-state {
-            text-align: center;
-            padding: 3rem 1.5rem;
-            color: #64748b;
-        }
-        
-        .empty-state-icon {
-            font-size: 3rem;
-            margin-bottom: 1rem;
-            opacity: 0.5;
-        }
-        
-        ::-webkit-scrollbar {
-            width: 8px;
-        }
-        
-        ::-webkit-scrollbar-track {
-            background: #0f172a;
-        }
-        
-        ::-webkit-scrollbar-thumb {
-            background: #334155;
-            border-radius: 4px;
-        }
-        
-        ::-webkit-scrollbar-thumb:hover {
-            background: #475569;
-        }
-    </style>
-</head>
-<body>
-    <header>
-        <h1>🤖 Claude Incident Response Agent</h1>
-        <p>Autonomous incident investigation with progressive disclosure & MCP tools</p>
-    </header>
-    
-    <div class="container">
-        <div class="left-panel">
-            <div class="panel-header">
-                <span class="status-indicator connected" id="statusIndicator"></span>
-                Agent Conversation
-            </div>
-            <div class="conversation" id="conversation">
-                <div class="empty-state">
-                    <div class="empty-state-icon">💬</div>
-                    <p>Describe an incident to start the investigation</p>
-                </div>
-            </div>
-            <div class="input-area">
-                <div class="input-group">
-                    <input 
-                        type="text" 
-                        id="incidentInput" 
-                        placeholder="e.g., Production API is slow, error rate elevated, users complaining..."
-                        autocomplete="off"
-                    />
-                    <button id="submitBtn" onclick="submitIncident()">Investigate</button>
-                </div>
-            </div>
-        </div>
-        
-        <div class="right-panel">
-            <div class="panel-header">📋 Todo Progress</div>
-            <div class="todo-container" id="todoContainer">
-                <div class="empty-state">
-                    <div class="empty-state-icon">📝</div>
-                    <p>Tasks will appear here</p>
-                </div>
-            </div>
-            
-            <div class="panel-header">
-                🔧 Tool Executions
-                <span id="toolCount" style="font-size: 0.9em; opacity: 0.8; margin-left: 0.5rem;">(0)</span>
-            </div>
-            <div class="tools-container" id="toolsContainer">
-                <div class="empty-state">
-                    <div class="empty-state-icon">⚙️</div>
-                    <p>Tool calls will appear here</p>
-                </div>
-            </div>
-        </div>
-    </div>
-    
-    <script>
-        let ws = null;
-        let toolExecutionCount = 0;
-        const conversation = document.getElementById('conversation');
-        const todoContainer = document.getElementById('todoContainer');
-        const toolsContainer = document.getElementById('toolsContainer');
-        const toolCount = document.getElementById('toolCount');
-        const incidentInput = document.getElementById('incidentInput');
-        const submitBtn = document.getElementById('submitBtn');
-        const statusIndicator = document.getElementById('statusIndicator');
-        
-        function connectWebSocket() {
-            ws = new WebSocket(`ws://${window.location.host}/ws`);
-            
-            ws.onopen = () => {
-                console.log('WebSocket connected');
-                statusIndicator.className = 'status-indicator connected';
-            };
-            
-            ws.onmessage = (event) => {
-                const data = JSON.parse(event.data);
-                handleMessage(data);
-            };
-            
-            ws.onclose = () => {
-                console.log('WebSocket disconnected');
-                statusIndicator.className = 'status-indicator disconnected';
-                setTimeout(connectWebSocket, 3000);
-            };
-            
-            ws.onerror = (error) => {
-                console.error('WebSocket error:', error);
-            };
-        }
-        
-        function handleMessage(data) {
-            switch(data.type) {
-                case 'conversation':
-                    addConversationMessage(data.role, data.content);
-                    break;
-                case 'todo_update':
-                    updateTodos(data.todos);
-                    break;
-                case 'tool_execution':
-                    // Only increment counter when result is null (initial call)
-                    addToolExecution(data.tool_name, data.input, data.result, data.result === null);
-                    break;
-                case 'system':
-                    addSystemMessage(data.content);
-                    break;
-            }
-        }
-        
-        function addConversationMessage(role, content) {
-            if (conversation.querySelector('.empty-state')) {
-                conversation.innerHTML = '';
-            }
-            
-            const message = document.createElement('div');
-            message.className = `message ${role}`;
-            
-            const label = document.createElement('div');
-            label.className = 'message-label';
-            label.textContent = role === 'user' ? '👤 You' : '🤖 Claude Agent';
-            
-            const text = document.createElement('div');
-            text.className = 'message-content';
-            // Render markdown for assistant messages
-            if (role === 'assistant') {
-                text.innerHTML = marked.parse(content);
-            } else {
-                text.textContent = content;
-            }
-            
-            message.appendChild(label);
-            message.appendChild(text);
-            conversation.appendChild(message);
-            conversation.scrollTop = conversation.scrollHeight;
-        }
-        
-        function addSystemMessage(content) {
-            if (conversation.querySelector('.empty-state')) {
-                conversation.innerHTML = '';
-            }
-            
-            const message = document.createElement('div');
-            message.className = 'message system';
-            
-            const label = document.createElement('div');
-            label.className = 'message-label';
-            label.textContent = '⚡ System';
-            
-            const text = document.createElement('div');
-            text.textContent = content;
-            
-            message.appendChild(label);
-            message.appendChild(text);
-            conversation.appendChild(message);
-            conversation.scrollTop = conversation.scrollHeight;
-        }
-        
-        function updateTodos(todos) {
-            if (todoContainer.querySelector('.empty-state')) {
-                todoContainer.innerHTML = '';
-            }
-            
-            todoContainer.innerHTML = '';
-            todos.forEach(todo => {
-                const item = document.createElement('div');
-                item.className = `todo-item ${todo.status}`;
-                
-                const icon = document.createElement('div');
-                icon.className = 'todo-icon';
-                icon.textContent = getStatusIcon(todo.status);
-                
-                const text = document.createElement('div');
-                text.className = 'todo-text';
-                text.textContent = todo.content;
-                
-                item.appendChild(icon);
-                item.appendChild(text);
-                todoContainer.appendChild(item);
-            });
-        }
-        
-        function getStatusIcon(status) {
-            switch(status) {
-                case 'completed': return '✅';
-                case 'in_progress': return '🔧';
-                case 'cancelled': return '❌';
-                default: return '⏳';
-            }
-        }
-        
-        function addToolExecution(toolName, input, result, incrementCounter = true) {
-            if (toolsContainer.querySelector('.empty-state')) {
-                toolsContainer.innerHTML = '';
-            }
-            
-            // Only increment counter for new tool calls, not results
-            if (incrementCounter) {
-                toolExecutionCount++;
-                toolCount.textContent = `(${toolExecutionCount})`;
-            }
-            
-            const exec = document.createElement('div');
-            exec.className = 'tool-exec';
-            
-            const name = document.createElement('div');
-            name.className = 'tool-name';
-            name.innerHTML = `⚙️ ${toolName}`;
-            
-            const resultDiv = document.createElement('div');
-            resultDiv.className = 'tool-result';
-            resultDiv.textContent = typeof result === 'string' ? result : JSON.stringify(result, null, 2);
-            
-            exec.appendChild(name);
-            if (result) {
-                exec.appendChild(resultDiv);
-            }
-            
-            toolsContainer.insertBefore(exec, toolsContainer.firstChild);
-        }
-        
-        function submitIncident() {
-            const description = incidentInput.value.trim();
-            if (!description) return;
-            
-            submitBtn.disabled = true;
-            incidentInput.disabled = true;
-            
-            ws.send(JSON.stringify({
-                type: 'incident',
-                description: description
-            }));
-            
-            incidentInput.value = '';
-        }
-        
-        incidentInput.addEventListener('keypress', (e) => {
-            if (e.key === 'Enter') {
-                submitIncident();
-            }
-        });
-        
-        connectWebSocket();
-    </script>
-</body>
-</html>
-    """
+async def get_ui(request: Request):
+    """Serve the main UI (static/index.html with fingerprinted asset URLs)"""
+    if not ui_page:
+        ui_page.update(await asyncio.to_thread(render_ui_page))
+
+    # Each encoding is a different representation, so it gets its own ETag
+    use_gzip = bool(accepted_encodings(request.headers.get("accept-encoding", ""), ["gzip"]))
+    etag = ui_page["gzip_etag"] if use_gzip else ui_page["etag"]
+    headers = {
+        "ETag": etag,
+        "Cache-Control": REVALIDATE_CACHE_CONTROL,
+        "Vary": "Accept-Encoding"
+    }
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+
+    if use_gzip:
+        headers["Content-Encoding"] = "gzip"
+        return HTMLResponse(content=ui_page["gzip"], headers=headers)
+    return HTMLResponse(content=ui_page["body"], headers=headers)
+
+
+@app.get("/api/results/{result_id}")
+async def get_tool_result(result_id: str, request: Request):
+    """Serve a stored tool result, honoring single-range requests"""
+    blob = result_store.get(result_id)
+    if blob is None:
+        return Response(status_code=404, content="Result not found or evicted")
+
+    headers = {
+        "Accept-Ranges": "bytes",
+        "ETag": f'"{result_id}"',
+        # Content-addressed: the bytes behind an ID never change
+        "Cache-Control": "private, max-age=31536000, immutable",
+    }
+    media_type = result_store.content_type(result_id)
+
+    if request.headers.get("if-none-match") == headers["ETag"]:
+        return Response(status_code=304, headers=headers)
+
+    try:
+        byte_range = parse_range_header(request.headers.get("range"), len(blob))
+    except ValueError:
+        headers["Content-Range"] = f"bytes */{len(blob)}"
+        return Response(status_code=416, headers=headers)
+
+    if byte_range is None:
+        return Response(content=blob, media_type=media_type, headers=headers)
+
+    start, end = byte_range
+    headers["Content-Range"] = f"bytes {start}-{end}/{len(blob)}"
+    return Response(
+        content=blob[start:end + 1],
+        status_code=206,
+        media_type=media_type,
+        headers=headers
+    )
+
+
+@app.get("/api/queue")
+async def get_queue():
+    """Running investigations, queue depth per severity and admission counts"""
+    return incident_scheduler.stats()
 
 
 @app.websocket("/ws")
@@ -689,22 +315,66 @@ async def websocket_endpoint(websocket: WebSocket):
             data = await websocket.receive_json()
             
             if data['type'] == 'incident':
-                # Start query processing
-                await handle_query(data['description'])
+                # Queue it; the scheduler starts it when a worker is free.
+                # The submitter is never taken from the payload (it would
+                # bypass the per-submitter cap), and the client's severity
+                # can only lower the server's classification
+                await incident_scheduler.submit(
+                    data['description'],
+                    submitter=submitter_id(websocket),
+                    severity=data.get('severity'),
+                    context=websocket
+                )
                 
     except WebSocketDisconnect:
         active_connections.remove(websocket)
 
 
-async def handle_query(description: str):
+def submitter_id(websocket: WebSocket) -> str:
+    """Fair-share identity of a connection: the client address"""
+    client = websocket.client
+    return client.host if client else "unknown"
+
+
+async def run_incident(incident):
+    """Scheduler worker: one investigation"""
+    await handle_query(incident.description, job_id=incident.id)
+
+
+async def send_queue_update(incident):
+    """Tell the submitter where their incident stands"""
+    websocket = incident.context
+    if websocket is None or websocket not in active_connections:
+        return
+    await websocket.send_json({'type': 'queue_update', **incident.to_dict()})
+
+
+incident_scheduler = IncidentScheduler(
+    run_incident,
+    notify=send_queue_update,
+    workers=MAX_CONCURRENT_INVESTIGATIONS,
+    reserved_sev1=RESERVED_SEV1_WORKERS,
+    max_queued=MAX_QUEUED_INVESTIGATIONS,
+    max_queued_per_submitter=MAX_QUEUED_PER_SUBMITTER
+)
+
+
+async def handle_query(description: str, agent=None, job_id: Optional[str] = None):
     """
     Handle user query with live streaming.
     This is a DUMB UI - just calls agent.handle_query() and streams responses to browser.
+
+    Args:
+        description: Incident description from the browser
+        agent: ClaudeAgent to use (default: a new one per query)
+        job_id: Scheduler job this query runs for (sent with its stream frames)
     """
-    
-    # Set Bedrock environment variable
-    os.environ["CLAUDE_CODE_USE_BEDROCK"] = "1"
-    
+    # Deferred imports; ClaudeAgent() also loads .env and selects Bedrock
+    from claude_agent_sdk import AssistantMessage, UserMessage, ToolUseBlock, ToolResultBlock
+    from claude_agent_sdk.types import StreamEvent
+    from agent import ClaudeAgent
+    from utils.text_stream import TextStreamCoalescer
+
     # Send initial message
     await broadcast_message({
         'type': 'conversation',
@@ -718,14 +388,26 @@ async def handle_query(description: str):
     })
     
     # Create agent instance (all logic is in agent.py - includes logging)
-    agent = ClaudeAgent()
+    if agent is None:
+        agent = ClaudeAgent()
     
     # Track tool calls by ID (to match results properly)
     tool_calls = {}
     
+    # Token-level text, sent as one 'assistant_delta' frame per ~50ms
+    async def send_delta(frame):
+        await broadcast_message({'type': 'assistant_delta', 'job_id': job_id, **frame})
+    
+    text_stream = TextStreamCoalescer(send_delta)
+    
     # Callback function to handle each message from the agent
     async def message_callback(message, todo_tracker):
         
+        # Partial text deltas
+        if isinstance(message, StreamEvent):
+            await text_stream.handle_event(message.event, message.parent_tool_use_id)
+            return
+        
         # Update todos in UI
         if todo_tracker.process_message(message):
             await broadcast_message({
@@ -754,11 +436,15 @@ async def handle_query(description: str):
                         })
             
             if text_content:
-                await broadcast_message({
+                conversation_message = {
                     'type': 'conversation',
                     'role': 'assistant',
                     'content': '\n'.join(text_content)
-                })
+                }
+                if message.parent_tool_use_id is None:
+                    # The complete text replaces what was streamed for it
+                    conversation_message['stream_ids'] = await text_stream.finalize()
+                await broadcast_message(conversation_message)
         
         # Handle user messages (tool results)
         elif isinstance(message, UserMessage):
@@ -767,24 +453,46 @@ async def handle_query(description: str):
                     # Match result to tool call by ID (skip if TodoWrite)
                     tool_call = tool_calls.get(block.tool_use_id)
                     if tool_call:
-                        result = str(block.content)[:500] if len(str(block.content)) > 500 else block.content
-                        await broadcast_message({
+                        preview, truncated = build_preview(block.content, RESULT_PREVIEW_CHARS)
+                        message_data = {
                             'type': 'tool_execution',
                             'tool_name': tool_call['name'],
                             'input': tool_call['input'],
-                            'result': result
-                        })
+                            'result': preview,
+                            'truncated': truncated
+                        }
+                        if truncated:
+                            # Hash + store off the event loop; large results can be megabytes
+                            stored = await asyncio.to_thread(result_store.put, block.content)
+                            message_data['result_id'] = stored.result_id
+                            message_data['result_size'] = stored.size
+                        await broadcast_message(message_data)
                         # Clean up
                         del tool_calls[block.tool_use_id]
     
+    # The end notice closes this query's unfinished streams (and only those;
+    # other investigations may still be streaming to the same clients)
+    async def end_notice(content):
+        await text_stream.close()
+        await broadcast_message({
+            'type': 'system',
+            'content': content,
+            'job_id': job_id,
+            'stream_ids': await text_stream.finalize()
+        })
+    
     # Call the agent (all the real work happens here!)
-    await agent.handle_query(description, callback=message_callback)
+    try:
+        budget_report = await agent.handle_query(description, callback=message_callback)
+    except Exception as e:
+        await end_notice(f"❌ Investigation failed: {e}")
+        raise
     
-    # Done!
-    await broadcast_message({
-        'type': 'system',
-        'content': "✅ Investigation complete!"
-    })
+    # Done (or cut off by the session budget)
+    if budget_report and budget_report.get('stopped_reason'):
+        await end_notice(f"⏹ Investigation stopped: session budget exceeded ({budget_report['stopped_detail']})")
+    else:
+        await end_notice("✅ Investigation complete!")
 
 
 if __name__ == "__main__":
@@ -796,5 +504,14 @@ if __name__ == "__main__":
     print("\n📍 Open your browser to: http://localhost:8000")
     print("⚡ Make sure MCP servers are running on ports 9001 & 9002\n")
     
-    uvicorn.run(app, host="0.0.0.0", port=8000, log_level="info")
+    # permessage-deflate compresses WebSocket frames (large todo/tool payloads)
+    # for clients that negotiate it; browsers do by default
+    uvicorn.run(
+        app,
+        host="0.0.0.0",
+        port=8000,
+        log_level="info",
+        ws="websockets",
+        ws_per_message_deflate=True
+    )
 